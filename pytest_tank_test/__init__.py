@@ -10,26 +10,59 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 from tk_toolchain.repo import Repository
-from tk_toolchain import util
+from tk_toolchain.workspace import WorkspaceIndex
+from tk_toolchain import dependencies, util
 from tk_toolchain.tk_testengine import get_test_engine_environment
 from .tk_fixtures import (  # noqa
     tk_test_project,
     tk_test_shotgun,
     tk_test_current_user,
     tk_test_entities,
+    tk_test_uploads,
 )
-from ruamel.yaml import YAML
 
+import fnmatch
 import os
+import pathlib
 import sys
+import time
+
+import pytest
+
+# Key under which the bootstrap state is stored in pytest's cache. Bump the
+# version whenever the layout of the state changes.
+_BOOTSTRAP_CACHE_KEY = "tk_toolchain/bootstrap_v1"
+
+# Key under which the bootstrap state is handed to pytest-xdist workers.
+_WORKER_INPUT_KEY = "tk_toolchain_bootstrap_state"
+
+# Key under which the bootstrap state of this process is stashed on the
+# pytest configuration.
+_bootstrap_state_key = pytest.StashKey()
+
+# Set to True on the pytest configuration while the Toolkit log file still
+# needs to be set up.
+_logging_pending_key = pytest.StashKey()
+
+# Maps each step of the start up to the time it took, in seconds.
+_startup_profile_key = pytest.StashKey()
+
+# Paths and patterns that should not be collected.
+_ignore_rules_key = pytest.StashKey()
 
 
 def _update_sys_path(reason, path):
     """
-    Adds a path to sys.paths if it is missing.
+    Adds a path to the front of sys.path if it is missing.
+
+    If the path is already in sys.path, it is moved to the front, which
+    happens for example with pytest-xdist, which forwards the controller's
+    sys.path to its workers.
     """
     if os.path.exists(path):
         print("{0}: {1}".format(reason, path))
+        if path in sys.path:
+            sys.path.remove(path)
         sys.path.insert(0, path)
 
 
@@ -45,18 +78,114 @@ def _initialize_logging():
     print("Logs for this test run can be found at", tank.LogManager().log_file)
 
 
-def pytest_configure(config):
+def _get_mtime(path):
     """
-    Configures the environment so that tests can
-    - import sgtk
-    - import tank_test
-    - find the repository root via SHOTGUN_CURRENT_REPO_ROOT
-    - find the test engine via SHOTGUN_TEST_ENGINE
-    - write to a Toolkit log file
+    Get the modification time of a path.
+
+    :returns: The modification time in nanoseconds or ``None`` if the path
+        doesn't exist.
     """
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-    cur_dir = os.path.abspath(os.curdir)
 
+def _get_bootstrap_fingerprint(repo_root, tk_core_repo_root):
+    """
+    Compute what the bootstrap state depends on.
+
+    Whenever a repository is cloned or removed, or azure-pipelines.yml is
+    edited, one of these modification times changes.
+
+    :param str repo_root: Root of the repository being tested.
+    :param str tk_core_repo_root: Root of the tk-core repository.
+
+    :returns: List of modification times.
+    """
+    return [
+        _get_mtime(os.path.join(repo_root, "azure-pipelines.yml")),
+        _get_mtime(repo_root),
+        _get_mtime(os.path.dirname(repo_root)),
+        _get_mtime(tk_core_repo_root),
+    ]
+
+
+def _load_bootstrap_state(config, cur_dir):
+    """
+    Load the bootstrap state cached by a previous run.
+
+    :param config: The pytest configuration.
+    :param str cur_dir: Folder pytest was launched from.
+
+    :returns: The state, or ``None`` if nothing was cached or the cache is stale.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return None
+
+    entry = cache.get(_BOOTSTRAP_CACHE_KEY, None)
+    if not isinstance(entry, dict) or entry.get("cur_dir") != cur_dir:
+        return None
+
+    state = entry.get("state", {})
+    try:
+        fingerprint = _get_bootstrap_fingerprint(
+            state["repo_root"], state["tk_core_repo_root"]
+        )
+    except (KeyError, TypeError):
+        return None
+    if fingerprint != entry.get("fingerprint"):
+        return None
+
+    return state
+
+
+def _save_bootstrap_state(config, cur_dir, state):
+    """
+    Cache the bootstrap state for the next runs.
+
+    :param config: The pytest configuration.
+    :param str cur_dir: Folder pytest was launched from.
+    :param dict state: State computed by :func:`_compute_bootstrap_state`.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return
+
+    # Writing to the cache can create the .pytest_cache folder inside the
+    # repository, which changes its modification time. When this happens, the
+    # fingerprint is updated so the next run can still use the state.
+    fingerprint = None
+    while True:
+        new_fingerprint = _get_bootstrap_fingerprint(
+            state["repo_root"], state["tk_core_repo_root"]
+        )
+        if new_fingerprint == fingerprint:
+            break
+        fingerprint = new_fingerprint
+        cache.set(
+            _BOOTSTRAP_CACHE_KEY,
+            {"cur_dir": cur_dir, "fingerprint": fingerprint, "state": state},
+        )
+
+
+def _compute_bootstrap_state(cur_dir, clone_missing=False, mirror=None):
+    """
+    Discover the repository and its dependencies.
+
+    :param str cur_dir: Folder pytest was launched from.
+    :param bool clone_missing: If ``True``, missing dependencies are cloned
+        instead of reported.
+    :param str mirror: Folder of local clones or bare repositories used to
+        speed up cloning.
+
+    :returns: Dictionary with the paths to add to the ``PYTHONPATH`` and the
+        environment variables to set, or ``None`` if the folder is not inside a
+        Shotgun repository.
+
+    :raises RuntimeError: If a dependency of the repository is missing.
+    """
     # The path to the current repo root
     try:
         repo = Repository(cur_dir)
@@ -68,18 +197,7 @@ def pytest_configure(config):
     # If we were unable to construct a Repository object, or if we're not in a
     # shotgun component repo, bail.
     if valid_repo is False:
-        print(
-            "%s does not appear to be inside Shotgun repository. Skipping initialization of 'pytest_tank_test.'"
-            % cur_dir
-        )
-        return
-
-    # Print Python interpreter location so that on CI we know where the
-    # interpreter is on disk. This can be helpful when trying to launch
-    # a specific Python on CI.
-    print("Python running from {0}".format(sys.executable))
-
-    print("Repository found at {0}".format(repo.root))
+        return None
 
     # tk-toolchain assumes that the other repositories are clone alongside
     # the current one with their real name. However, for the current repo,
@@ -91,104 +209,446 @@ def pytest_configure(config):
     # Azure runs a build for tk-core, it will clone it inside a folder not named
     # after the repo. As such, we have to use whatever name we're given for
     # tk-core.
+    #
+    # The other repositories are looked up by name through an index of the
+    # workspace that is persisted between runs. Only the repositories we need
+    # are inspected, the rest of the workspace is never listed.
+    workspace = WorkspaceIndex(repo.parent)
+    _ensure_dependencies(repo, workspace, clone_missing, mirror)
     if repo.is_tk_core() is False:
-        tk_core_repo_root = os.path.join(repo.parent, "tk-core")
-        if not os.path.exists(tk_core_repo_root):
-            raise RuntimeError(
-                "tk-core, which is a dependency of {}, should be cloned before the tests are executed:\n"
-                "pushd .. && git clone git@github.com:shotgunsoftware/tk-core.git && popd".format(
-                    repo.name
-                )
-            )
+        tk_core_repo_root = workspace.get_path("tk-core")
     else:
         tk_core_repo_root = repo.root
 
-    # Adds the tk-core/python folder to the PYTHONPATH so we can import Toolkit
-    _update_sys_path("Adding Toolkit folder", os.path.join(tk_core_repo_root, "python"))
-
-    # Now that Toolkit has been added to the PYTHONPATH, we can set up logging.
-    _initialize_logging()
-
-    # Adds the tk-core/tests/python folder to the PYTHONPATH so TanTestBase
-    # is available.
-    _update_sys_path(
-        "Adding Toolkit test framework",
-        os.path.join(tk_core_repo_root, "tests", "python"),
-    )
-
+    sys_paths = [
+        # Adds the tk-core/python folder to the PYTHONPATH so we can import Toolkit
+        ("Adding Toolkit folder", os.path.join(tk_core_repo_root, "python")),
+        # Adds the tk-core/tests/python folder to the PYTHONPATH so TanTestBase
+        # is available.
+        (
+            "Adding Toolkit test framework",
+            os.path.join(tk_core_repo_root, "tests", "python"),
+        ),
+    ]
     # Add the <current-repo>/tests/python folder to the PYTHONPATH so custom
     # python modules from it can be used in the tests.
     # If we're running tests inside tk-core, we shouldn't add it as tk-toolchain
     # includes everything we need.
     if repo.is_tk_core() is False:
-        _update_sys_path(
-            "Adding repository tests/python folder",
-            os.path.join(repo.root, "tests", "python"),
+        sys_paths.append(
+            (
+                "Adding repository tests/python folder",
+                os.path.join(repo.root, "tests", "python"),
+            )
         )
 
-    util.merge_into_environment_variables(repo.get_roots_environment_variables())
+    return {
+        "repo_root": repo.root,
+        "tk_core_repo_root": tk_core_repo_root,
+        "sys_paths": [
+            [reason, path] for reason, path in sys_paths if os.path.exists(path)
+        ],
+        # These are only set if they are not already defined.
+        "default_environment": repo.get_roots_environment_variables(),
+        "environment": {
+            # Note: This won't be documented (or renamed) as we're not super comfortable
+            # supporting TankTestBase at the moment for clients to write tests with.
+            "TK_TEST_FIXTURES": os.path.join(repo.root, "tests", "fixtures"),
+        },
+    }
+
+
+def _apply_bootstrap_state(state):
+    """
+    Configure the process from a bootstrap state.
+
+    :param dict state: State computed by :func:`_compute_bootstrap_state`.
+    """
+    print("Repository found at {0}".format(state["repo_root"]))
+
+    for reason, path in state["sys_paths"]:
+        _update_sys_path(reason, path)
+
+    util.merge_into_environment_variables(state["default_environment"])
     util.merge_into_environment_variables(get_test_engine_environment())
 
-    print("Fixtures found at", os.path.join(repo.root, "tests", "fixtures"))
-    # Note: This won't be documented (or renamed) as we're not super comfortable
-    # supporting TankTestBase at the moment for clients to write tests with.
-    os.environ["TK_TEST_FIXTURES"] = os.path.join(repo.root, "tests", "fixtures")
+    print("Fixtures found at", state["environment"]["TK_TEST_FIXTURES"])
+    os.environ.update(state["environment"])
 
-    _ensure_dependencies(repo)
+
+def pytest_configure(config):
+    """
+    Configures the environment so that tests can
+    - import sgtk
+    - import tank_test
+    - find the repository root via SHOTGUN_CURRENT_REPO_ROOT
+    - find the test engine via SHOTGUN_TEST_ENGINE
+    - write to a Toolkit log file
+
+    Discovering the repository and validating its dependencies is only done
+    when something changed on disk since the last run. Otherwise the result
+    cached in the ``.pytest_cache`` folder is applied directly.
+
+    Toolkit itself is not imported here. The log file is set up right before
+    the first test that needs Toolkit runs.
+    """
+    config.stash[_startup_profile_key] = {}
+    start_time = time.perf_counter()
+    _configure(config)
+    config.stash[_ignore_rules_key] = _get_ignore_rules(config)
+    _record_startup_time(config, "Plugin configuration", start_time)
 
 
-def _ensure_dependencies(repo):
+def _configure(config):
+    """
+    Applies the bootstrap state, computing it first if needed.
+
+    :param config: The pytest configuration.
+    """
+
+    # When running under pytest-xdist, the controller has already done all the
+    # work and handed us the result, so we only need to apply the paths and
+    # environment variables. Each worker still sets up its own logging before
+    # its first test that needs Toolkit.
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None and _WORKER_INPUT_KEY in workerinput:
+        state = workerinput[_WORKER_INPUT_KEY]
+        if state is not None:
+            _apply_bootstrap_state(state)
+            config.stash[_bootstrap_state_key] = state
+            config.stash[_logging_pending_key] = True
+        return
+
+    cur_dir = os.path.abspath(os.curdir)
+
+    state = _load_bootstrap_state(config, cur_dir)
+    if state is None:
+        state = _compute_bootstrap_state(
+            cur_dir,
+            config.getoption("tk_clone_missing", False),
+            config.getoption("tk_repository_mirror", None),
+        )
+        if state is None:
+            print(
+                "%s does not appear to be inside Shotgun repository. Skipping initialization of 'pytest_tank_test.'"
+                % cur_dir
+            )
+            return
+        _save_bootstrap_state(config, cur_dir, state)
+    else:
+        print("Using cached bootstrap state for {0}".format(cur_dir))
+
+    # Print Python interpreter location so that on CI we know where the
+    # interpreter is on disk. This can be helpful when trying to launch
+    # a specific Python on CI.
+    print("Python running from {0}".format(sys.executable))
+
+    _apply_bootstrap_state(state)
+    config.stash[_bootstrap_state_key] = state
+    # Now that Toolkit has been added to the PYTHONPATH, we can set up logging,
+    # but we'll wait until a test actually needs it.
+    config.stash[_logging_pending_key] = True
+
+
+def _needs_toolkit(item):
+    """
+    Check if a test needs Toolkit.
+
+    :param item: The test item.
+
+    :returns: ``True`` if Toolkit was imported while collecting the tests
+        or if the test uses one of the Toolkit fixtures, ``False`` otherwise.
+    """
+    if "tank" in sys.modules:
+        return True
+    return any(
+        name.startswith("tk_test_") for name in getattr(item, "fixturenames", [])
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """
+    Sets up the Toolkit log file before the first test that needs Toolkit.
+    """
+    config = item.config
+    if not config.stash.get(_logging_pending_key, False) or not _needs_toolkit(item):
+        return
+
+    config.stash[_logging_pending_key] = False
+    start_time = time.perf_counter()
+    _initialize_logging()
+    _record_startup_time(
+        config,
+        "Toolkit import and logging (deferred to {0})".format(item.nodeid),
+        start_time,
+    )
+
+
+def pytest_addoption(parser):
+    """
+    Adds the plugin's command line options.
+    """
+    group = parser.getgroup("tank", "Toolkit")
+    group.addoption(
+        "--tank-startup-profile",
+        action="store_true",
+        default=False,
+        help="Report the time spent setting up Toolkit for the tests.",
+    )
+    group.addoption(
+        "--tk-clone-missing",
+        action="store_true",
+        default=False,
+        help="Clone the repositories required by the tests that are missing "
+        "instead of failing.",
+    )
+    group.addoption(
+        "--tk-repository-mirror",
+        default=os.environ.get(dependencies.MIRROR_ENV_VAR),
+        help="Folder of local clones or bare repositories to borrow objects "
+        "from when cloning missing repositories. Defaults to "
+        "${0}.".format(dependencies.MIRROR_ENV_VAR),
+    )
+    group.addoption(
+        "--tk-reuse-fixtures",
+        action="store_true",
+        default=False,
+        help="Reuse the project and entities created by the tk_test_* fixtures "
+        "in a previous run when they still exist.",
+    )
+    group.addoption(
+        "--tk-project-pool",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Have tk_test_project lease one of N projects shared by the test "
+        "runs of this machine instead of recreating its project.",
+    )
+    group.addoption(
+        "--tk-mock-shotgun",
+        action="store_true",
+        default=False,
+        help="Have the tk_test_* fixtures use an in-memory stand-in for the site.",
+    )
+    group.addoption(
+        "--tk-record-shotgun",
+        metavar="CASSETTE",
+        help="Record the requests sent to the site by the tk_test_* fixtures "
+        "into a cassette file.",
+    )
+    group.addoption(
+        "--tk-replay-shotgun",
+        metavar="CASSETTE",
+        help="Answer the requests sent by the tk_test_* fixtures from a cassette "
+        "file recorded with --tk-record-shotgun instead of a site.",
+    )
+    parser.addini(
+        "tk_ignore_collect",
+        type="linelist",
+        default=[],
+        help="Paths or glob patterns, relative to the root directory, that "
+        "should not be collected.",
+    )
+
+
+def _record_startup_time(config, label, start_time):
+    """
+    Records how long a step of the start up took.
+
+    :param config: The pytest configuration.
+    :param str label: Description of the step.
+    :param float start_time: Value of :func:`time.perf_counter` when the step started.
+    """
+    config.stash[_startup_profile_key][label] = time.perf_counter() - start_time
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Reports the time spent setting up Toolkit when ``--tank-startup-profile``
+    is set.
+    """
+    if not config.getoption("tank_startup_profile", False):
+        return
+
+    timings = config.stash.get(_startup_profile_key, {})
+    terminalreporter.write_sep("=", "tank startup profile")
+    for label, duration in timings.items():
+        terminalreporter.write_line("{0}: {1:.1f} ms".format(label, duration * 1000))
+
+    # If no test needed Toolkit, measure what importing it would have cost so
+    # the user knows how much was saved by deferring it.
+    if config.stash.get(_logging_pending_key, False) and "tank" not in sys.modules:
+        start_time = time.perf_counter()
+        try:
+            import tank  # noqa
+        except ImportError:
+            return
+        terminalreporter.write_line(
+            "Toolkit import: not needed by any test, saved {0:.1f} ms".format(
+                (time.perf_counter() - start_time) * 1000
+            )
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    Hands the bootstrap state of the pytest-xdist controller to a worker.
+
+    This way the repository discovery and the dependency validation are done
+    once per session instead of once per worker.
+    """
+    node.workerinput[_WORKER_INPUT_KEY] = node.config.stash.get(
+        _bootstrap_state_key, None
+    )
+
+
+def _ensure_dependencies(repo, workspace, clone_missing=False, mirror=None):
     """
     Ensure all dependencies to run the tests are present.
 
     info.yml is not sufficient, because it doesn't enumerate the dependencies
     needed to run the tests. Therefore, we're going to look at Azure-Pipelines,
     which has the list of repositories to clone in order to run the tests.
+    See :mod:`tk_toolchain.dependencies`.
+
+    Every missing repository is reported at once, or cloned in parallel if
+    requested.
+
+    :param tk_toolchain.repo.Repository repo: Repository being tested.
+    :param tk_toolchain.workspace.WorkspaceIndex workspace: Index of the
+        repositories cloned alongside it.
+    :param bool clone_missing: If ``True``, missing repositories are cloned
+        instead of reported.
+    :param str mirror: Folder of local clones or bare repositories used to
+        speed up cloning.
+
+    :raises tk_toolchain.dependencies.MissingDependenciesError: If repositories
+        are missing and were not cloned.
     """
+    required = []
+    if repo.is_tk_core() is False:
+        required.append({"name": "tk-core"})
     # azure-pipelines.yml enumerates the repo necessary for the tests to run
     # so let's use that.
-    azurepipelines_yml_path = os.path.join(repo.root, "azure-pipelines.yml")
-    if not os.path.exists(azurepipelines_yml_path):
+    required.extend(dependencies.get_additional_repositories(repo.root))
+
+    missing = dependencies.find_missing_repositories(required, workspace)
+    if not missing:
         return
 
-    # Read azure-pipelines.yml so we can search for test dependencies.
-    with open(azurepipelines_yml_path, "rt") as fh:
-        yaml = YAML()
-        azurepipelines_yml = yaml.load(fh)
-
-    # Here's an example of an azure-pipelines.yml file.
-    # jobs:
-    # - template: build-pipeline.yml@templates
-    #   parameters:
-    #     additional_repositories:
-    #     - name: tk-framework-shotgunutils
-    #     - name: tk-multi-publish2
-    for job in azurepipelines_yml.get("jobs", []):
-        # There can be multiple jobs. Look for the one which has the additional_repositories
-        # parameter. That's the one that enumerates all Toolkit repositories required for
-        # the tests.
-        additional_repositories = job.get("parameters", {}).get(
-            "additional_repositories", []
+    if not clone_missing:
+        raise dependencies.MissingDependenciesError(repo.name, missing)
+
+    print(
+        "Cloning missing repositories: {0}".format(
+            ", ".join(repository["name"] for repository in missing)
         )
-        # For each of the additional repositories...
-        for additional_repository in additional_repositories:
-            # ... look on disk if the repository is cloned ...
-            repo_location = os.path.join(repo.parent, additional_repository["name"])
-            if not os.path.exists(repo_location):
-                # ... Dependency missing. Print helpful message.
-                raise RuntimeError(
-                    "{0}, which is a dependency of {1}, should be cloned before the tests are executed:\n"
-                    "pushd .. && git clone git@github.com:shotgunsoftware/{0}.git && popd".format(
-                        additional_repository["name"], repo.name
-                    )
-                )
-
-
-def pytest_ignore_collect(path, config):
-    """
-    Ignore unit tests for third parties found inside tk-core and any Python
-    source file inside tests/fixtures.
-    """
-    return os.path.join("tests", "python", "third_party") in str(path) or os.path.join(
-        "tests", "fixtures"
-    ) in str(path)
+    )
+    dependencies.clone_repositories(missing, workspace.root, mirror)
+
+
+def _get_ignore_rules(config):
+    """
+    Compute what should not be collected.
+
+    Unit tests for third parties found inside tk-core and any Python
+    source file inside tests/fixtures are always ignored, wherever they are
+    found in the path. Repositories can ignore more files and folders with
+    the ``tk_ignore_collect`` ini option.
+
+    :param config: The pytest configuration.
+
+    :returns: Tuple of the folders that are ignored anywhere in a path, as
+        tuples of path parts, and of the ignored patterns. Each pattern is a
+        tuple of the parts of the folder it is relative to and of its own parts.
+    """
+    folders = (
+        ("tests", "python", "third_party"),
+        ("tests", "fixtures"),
+    )
+
+    roots = {config.rootpath.parts}
+    state = config.stash.get(_bootstrap_state_key, None)
+    if state is not None:
+        roots.add(pathlib.Path(state["repo_root"]).parts)
+
+    patterns = []
+    for pattern in config.getini("tk_ignore_collect"):
+        pattern = pattern.strip().rstrip("/")
+        if not pattern:
+            continue
+        pattern_parts = pathlib.PurePosixPath(pattern).parts
+        for root in roots:
+            patterns.append((root, pattern_parts))
+
+    return folders, tuple(patterns)
+
+
+def _match_parts(parts, pattern_parts):
+    """
+    Check if a path starts with a pattern, one path segment at a time.
+
+    Matching segment by segment keeps wildcards from spanning folders, so
+    ``python/*/external`` matches ``python/app/external`` but not
+    ``python/app/lib/external``.
+
+    :param tuple parts: Parts of the path, relative to the pattern's folder.
+    :param tuple pattern_parts: Parts of the pattern.
+
+    :returns: ``True`` if the path or one of its parents matches the pattern.
+    """
+    if len(parts) < len(pattern_parts):
+        return False
+    return all(
+        fnmatch.fnmatch(part, pattern_part)
+        for part, pattern_part in zip(parts, pattern_parts)
+    )
+
+
+def _contains_parts(parts, folder_parts):
+    """
+    Check if a path goes through a folder, wherever it is in the path.
+
+    :param tuple parts: Parts of the path.
+    :param tuple folder_parts: Parts of the folder.
+
+    :returns: ``True`` if the parts of the folder are found one after the other
+        in the parts of the path.
+    """
+    size = len(folder_parts)
+    first = folder_parts[0]
+    return any(
+        part == first and parts[index : index + size] == folder_parts
+        for index, part in enumerate(parts)
+    )
+
+
+def pytest_ignore_collect(collection_path, config):
+    """
+    Ignore unit tests for third parties found inside tk-core, any Python
+    source file inside tests/fixtures and anything listed in the
+    ``tk_ignore_collect`` ini option.
+
+    Since ignored folders are never walked, large vendored trees are pruned
+    as a whole.
+    """
+    rules = config.stash.get(_ignore_rules_key, None)
+    if rules is None:
+        rules = config.stash[_ignore_rules_key] = _get_ignore_rules(config)
+    folders, patterns = rules
+
+    parts = collection_path.parts
+    for folder_parts in folders:
+        if _contains_parts(parts, folder_parts):
+            return True
+
+    for root, pattern_parts in patterns:
+        if parts[: len(root)] == root and _match_parts(
+            parts[len(root) :], pattern_parts
+        ):
+            return True
+
+    # Let pytest and the other plugins decide.
+    return None
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Recording and replaying of the requests sent to a Shotgun site.
+
+When recording, the requests sent through a :class:`RecordingShotgun` and the
+responses of the site are written to a cassette, which is a JSON file. When
+replaying, a :class:`ReplayShotgun` answers the same requests from the
+cassette, without any network access.
+
+Requests are matched on their normalized form: arguments are bound to their
+names, default values are dropped, files are identified by the hash of their
+content, paths inside the folders of the current checkout are made relative
+to them and the platform specific path fields of a local storage are renamed,
+so a cassette can be replayed from another machine or operating system.
+"""
+
+import abc
+import collections
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+from tk_toolchain import util
+
+# Bump this whenever the layout of the cassette changes.
+_CASSETTE_VERSION = 1
+
+# Methods that are recorded, along with their parameters and default values.
+_METHODS = {
+    "find": (
+        ("entity_type", None),
+        ("filters", None),
+        ("fields", None),
+        ("order", None),
+        ("filter_operator", None),
+        ("limit", 0),
+        ("retired_only", False),
+        ("page", 0),
+        ("include_archived_projects", True),
+        ("additional_filter_presets", None),
+    ),
+    "find_one": (
+        ("entity_type", None),
+        ("filters", None),
+        ("fields", None),
+        ("order", None),
+        ("filter_operator", None),
+        ("retired_only", False),
+        ("include_archived_projects", True),
+        ("additional_filter_presets", None),
+    ),
+    "summarize": (
+        ("entity_type", None),
+        ("filters", None),
+        ("summary_fields", None),
+        ("filter_operator", None),
+        ("grouping", None),
+        ("include_archived_projects", True),
+    ),
+    "create": (("entity_type", None), ("data", None), ("return_fields", None)),
+    "update": (
+        ("entity_type", None),
+        ("entity_id", None),
+        ("data", None),
+        ("multi_entity_update_modes", None),
+    ),
+    "delete": (("entity_type", None), ("entity_id", None)),
+    "revive": (("entity_type", None), ("entity_id", None)),
+    "batch": (("requests", None),),
+    "upload": (
+        ("entity_type", None),
+        ("entity_id", None),
+        ("path", None),
+        ("field_name", None),
+        ("display_name", None),
+        ("tag_list", None),
+        ("created_at", None),
+    ),
+    "upload_thumbnail": (("entity_type", None), ("entity_id", None), ("path", None)),
+    "share_thumbnail": (
+        ("entities", None),
+        ("thumbnail_path", None),
+        ("source_entity", None),
+        ("filmstrip_thumbnail", False),
+    ),
+}
+
+# Arguments holding the path to a file that is uploaded.
+_UPLOADED_FILE_ARGUMENTS = ("path", "thumbnail_path")
+
+# Environment variables pointing to folders that depend on where the tests run.
+_FOLDER_VARIABLES = (
+    "TK_TEST_FIXTURES",
+    "SHOTGUN_CURRENT_REPO_ROOT",
+    "SHOTGUN_REPOS_ROOT",
+)
+
+# Environment variables whose values are added to the names of the entities of
+# a run, so each run and worker gets its own. See create_unique_name.
+_PARTITION_VARIABLES = ("SHOTGUN_TEST_RUN_ID", "PYTEST_XDIST_WORKER")
+
+
+# Fields holding the path of a local storage on each operating system, along
+# with the name they are all replaced with.
+_PLATFORM_PATH_FIELDS = ("windows_path", "linux_path", "mac_path")
+_PLATFORM_PATH_PLACEHOLDER = "${platform_path}"
+
+
+class CassetteError(LookupError):
+    """
+    Raised when a request can't be replayed from a cassette.
+    """
+
+
+class RecordedError(Exception):
+    """
+    Raised when replaying a request that failed while recording.
+    """
+
+
+def _encode(value):
+    """
+    Convert a value into something that can be stored as JSON.
+    """
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    return value
+
+
+def _decode(value):
+    """
+    Convert a value read from JSON back into what the site returned.
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and "__datetime__" in value:
+            return datetime.datetime.fromisoformat(value["__datetime__"])
+        if len(value) == 1 and "__date__" in value:
+            return datetime.date.fromisoformat(value["__date__"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _get_file_hash(path):
+    """
+    Hash the content of a file.
+
+    :returns: A dictionary describing the content, or the path itself if the
+        file can't be read.
+    """
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return path
+    return {"__file__": digest.hexdigest()}
+
+
+def _get_folders():
+    """
+    Get the folders that are replaced by a placeholder in requests.
+
+    :returns: List of tuples of the placeholder and the folder, longest
+        folders first.
+    """
+    folders = []
+    for name in _FOLDER_VARIABLES:
+        folder = os.environ.get(name)
+        if folder:
+            folders.append(("${{{0}}}".format(name), os.path.normpath(folder)))
+    return sorted(folders, key=lambda folder: len(folder[1]), reverse=True)
+
+
+def _get_partition_suffixes():
+    """
+    Get the suffixes added to the names of the entities of this run and
+    worker, which are removed from requests.
+
+    :returns: List of suffixes.
+    """
+    return [
+        " - " + os.environ[name]
+        for name in _PARTITION_VARIABLES
+        if os.environ.get(name)
+    ]
+
+
+def _normalize_field(name):
+    """
+    Replace the platform specific path fields of a local storage with a
+    placeholder.
+    """
+    if name in _PLATFORM_PATH_FIELDS:
+        return _PLATFORM_PATH_PLACEHOLDER
+    return name
+
+
+def _normalize_value(value, folders, suffixes):
+    """
+    Replace the paths and platform specific path fields in a value with
+    placeholders, and remove the run and worker suffixes from names.
+    """
+    if isinstance(value, dict):
+        return {
+            _normalize_field(key): _normalize_value(item, folders, suffixes)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(item, folders, suffixes) for item in value]
+    if isinstance(value, str):
+        if value in _PLATFORM_PATH_FIELDS:
+            # Field names used in filters or in the list of fields to return.
+            return _PLATFORM_PATH_PLACEHOLDER
+        for suffix in suffixes:
+            value = value.replace(suffix, "")
+        for placeholder, folder in folders:
+            if value == folder or value.startswith(folder + os.sep):
+                return placeholder + value[len(folder) :].replace(os.sep, "/")
+    return _encode(value)
+
+
+def normalize_request(method, args, kwargs):
+    """
+    Build the key identifying a request.
+
+    :param str method: Name of the method called.
+    :param tuple args: Positional arguments.
+    :param dict kwargs: Keyword arguments.
+
+    :returns: The key, as a string.
+
+    :raises TypeError: If the method isn't supported or the arguments don't
+        match its parameters.
+    """
+    parameters = _METHODS.get(method)
+    if parameters is None:
+        raise TypeError("{0} can't be recorded.".format(method))
+    if len(args) > len(parameters):
+        raise TypeError("Too many arguments for {0}.".format(method))
+
+    bound = dict(kwargs)
+    for (name, _), value in zip(parameters, args):
+        if name in bound:
+            raise TypeError("{0} got multiple values for {1}.".format(method, name))
+        bound[name] = value
+    for name, default in parameters:
+        if name in bound and bound[name] == default:
+            del bound[name]
+
+    folders = _get_folders()
+    for name in _UPLOADED_FILE_ARGUMENTS:
+        if bound.get(name):
+            bound[name] = _get_file_hash(bound[name])
+    return json.dumps(
+        [method, _normalize_value(bound, folders, _get_partition_suffixes())],
+        sort_keys=True,
+        default=str,
+    )
+
+
+class Cassette(object):
+    """
+    Requests sent to a site and the responses it returned.
+    """
+
+    def __init__(self, path, metadata=None, entries=None):
+        """
+        :param str path: Path to the cassette file.
+        :param dict metadata: Information about the recording, like the site
+            and the user.
+        :param list entries: Recorded requests, in the order they were sent.
+        """
+        self.path = path
+        self.metadata = metadata or {}
+        self.entries = entries or []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a cassette file.
+
+        :param str path: Path to the cassette file.
+
+        :rtype: Cassette
+
+        :raises CassetteError: If the file is missing or can't be read.
+        """
+        data = util.read_json_file(path)
+        if not isinstance(data, dict) or data.get("version") != _CASSETTE_VERSION:
+            raise CassetteError("{0} is not a valid cassette.".format(path))
+        return cls(path, data.get("metadata"), data.get("entries"))
+
+    def save(self):
+        """
+        Write the cassette to disk.
+        """
+        with self._lock:
+            util.write_json_file(
+                self.path,
+                {
+                    "version": _CASSETTE_VERSION,
+                    "metadata": self.metadata,
+                    "entries": list(self.entries),
+                },
+            )
+
+    def append(self, key, response=None, error=None):
+        """
+        Add a request to the cassette.
+
+        :param str key: Normalized request, as returned by :func:`normalize_request`.
+        :param response: What the site returned.
+        :param Exception error: What the site raised, if anything.
+        """
+        entry = {"request": key}
+        if error is not None:
+            entry["error"] = {
+                "type": error.__class__.__name__,
+                "message": str(error),
+            }
+        else:
+            entry["response"] = _encode(response)
+        with self._lock:
+            self.entries.append(entry)
+
+
+class _Proxy(abc.ABC):
+    """
+    Base class for the objects standing in for a connection.
+    """
+
+    @abc.abstractmethod
+    def _call(self, method, args, kwargs):
+        """
+        Handle a call to one of the recorded methods.
+
+        :param str method: Name of the method called.
+        :param tuple args: Positional arguments.
+        :param dict kwargs: Keyword arguments.
+
+        :returns: What the site returned.
+        """
+
+    def __getattr__(self, name):
+        """
+        Route the recorded methods to :meth:`_call`.
+        """
+        if name not in _METHODS:
+            raise AttributeError(name)
+
+        def _method(*args, **kwargs):
+            return self._call(name, args, kwargs)
+
+        _method.__name__ = name
+        return _method
+
+
+class RecordingShotgun(_Proxy):
+    """
+    Sends requests to a site and records them in a cassette.
+
+    Each thread gets its own connection, so the recorder can be shared by
+    threads, e.g. by :class:`pytest_tank_test.uploads.UploadQueue`.
+    """
+
+    def __init__(self, connection_factory, cassette):
+        """
+        :param callable connection_factory: Creates a connection to the site.
+        :param Cassette cassette: Cassette to record into.
+        """
+        self._connection_factory = connection_factory
+        self._local = threading.local()
+        self.cassette = cassette
+        self.base_url = self._get_connection().base_url
+        self.cassette.metadata["base_url"] = self.base_url
+
+    def _get_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connection_factory()
+        return connection
+
+    def _call(self, method, args, kwargs):
+        key = normalize_request(method, args, kwargs)
+        try:
+            response = getattr(self._get_connection(), method)(*args, **kwargs)
+        except Exception as error:
+            self.cassette.append(key, error=error)
+            raise
+        self.cassette.append(key, response=response)
+        return response
+
+
+class ReplayShotgun(_Proxy):
+    """
+    Answers requests from a cassette.
+
+    Responses are indexed by normalized request. When the same request was
+    recorded multiple times, the responses are returned in the order they
+    were recorded, and the last one keeps being returned afterwards.
+    """
+
+    def __init__(self, cassette):
+        """
+        :param Cassette cassette: Cassette to replay.
+        """
+        self.cassette = cassette
+        self.base_url = cassette.metadata.get("base_url")
+        self._lock = threading.Lock()
+        self._responses = collections.defaultdict(collections.deque)
+        for entry in cassette.entries:
+            self._responses[entry["request"]].append(entry)
+
+    def _call(self, method, args, kwargs):
+        key = normalize_request(method, args, kwargs)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise CassetteError(
+                    "{0} was not recorded in {1}: {2}".format(
+                        method, self.cassette.path, key
+                    )
+                )
+            entry = responses.popleft() if len(responses) > 1 else responses[0]
+        if "error" in entry:
+            raise RecordedError("{type}: {message}".format(**entry["error"]))
+        return _decode(entry["response"])
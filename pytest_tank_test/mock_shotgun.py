@@ -0,0 +1,711 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+In-memory stand-in for a Shotgun site.
+
+:class:`MockShotgun` implements the subset of the ``shotgun_api3.Shotgun`` API
+used by the ``tk_test_*`` fixtures and typical app tests. Records are kept per
+entity type. Equality filters on a field are answered from an index of that
+field, which is built the first time the field is queried and kept up to date
+afterwards, so queries stay fast with thousands of entities.
+"""
+
+import collections
+import copy
+import itertools
+import json
+import os
+import threading
+
+# Pipeline steps available on a new mock site, along with the entity type
+# they apply to.
+DEFAULT_STEPS = (
+    ("Comp", "Shot"),
+    ("Light", "Shot"),
+    ("Anim", "Shot"),
+    ("FX", "Shot"),
+    ("Model", "Asset"),
+    ("Rig", "Asset"),
+    ("Surface", "Asset"),
+    ("Art", "Asset"),
+)
+
+# Fields used as the name of an entity when it is linked from another one.
+_NAME_FIELDS = ("name", "code", "content", "title", "login", "original_fname")
+
+
+class MockShotgunError(Exception):
+    """
+    Raised when a request can't be handled, like the Shotgun API raises
+    ``shotgun_api3.Fault``.
+    """
+
+
+def _is_link(value):
+    """
+    Check if a value is a link to an entity.
+    """
+    return isinstance(value, dict) and "type" in value and "id" in value
+
+
+def _get_index_key(value):
+    """
+    Get the hashable value used to index and compare a field value.
+
+    Links are compared on their type and id, text case-insensitively.
+    """
+    if _is_link(value):
+        return (value["type"], value["id"])
+    if isinstance(value, str):
+        return value.lower()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def _get_index_keys(value):
+    """
+    Get the keys a field value is indexed under. Multi-entity fields are
+    indexed under each of their entities.
+    """
+    if isinstance(value, list):
+        return {_get_index_key(item) for item in value} or {None}
+    return {_get_index_key(value)}
+
+
+class MockShotgun(object):
+    """
+    In-memory stand-in for a connection to a Shotgun site.
+
+    The mock can be shared between threads.
+    """
+
+    base_url = "https://mock.shotgunstudio.com"
+
+    def __init__(self, login="tk-toolchain", steps=DEFAULT_STEPS):
+        """
+        :param str login: Login of the user the mock is authenticated as. A
+            HumanUser is created for it.
+        :param steps: Tuples of the code and entity type of the pipeline steps
+            to create.
+        """
+        self._lock = threading.RLock()
+        self._records = collections.defaultdict(dict)
+        self._retired = collections.defaultdict(dict)
+        self._indexes = {}
+        self._ids = itertools.count(1)
+        self.login = login
+        self.create("HumanUser", {"login": login, "name": login})
+        for code, entity_type in steps:
+            self.create("Step", {"code": code, "entity_type": entity_type})
+
+    # Queries
+
+    def find(
+        self,
+        entity_type,
+        filters,
+        fields=None,
+        order=None,
+        filter_operator=None,
+        limit=0,
+        retired_only=False,
+        page=0,
+        include_archived_projects=True,
+        additional_filter_presets=None,
+    ):
+        """
+        Find entities matching the given filters.
+
+        See ``shotgun_api3.Shotgun.find``.
+        """
+        if isinstance(filters, dict):
+            conditions = filters
+        else:
+            conditions = {
+                "filter_operator": filter_operator or "all",
+                "filters": filters,
+            }
+
+        with self._lock:
+            records = self._retired if retired_only else self._records
+            candidates = self._get_candidates(entity_type, conditions, records)
+            matches = [
+                record
+                for record in candidates
+                if self._matches(entity_type, record, conditions)
+            ]
+            for item in reversed(order or [{"field_name": "id", "direction": "asc"}]):
+                matches.sort(
+                    key=lambda record: self._get_sort_key(
+                        entity_type, record, item["field_name"]
+                    ),
+                    reverse=item.get("direction", "asc") == "desc",
+                )
+            if limit:
+                start = (page - 1) * limit if page else 0
+                matches = matches[start : start + limit]
+            return [self._get_fields(entity_type, record, fields) for record in matches]
+
+    def find_one(
+        self,
+        entity_type,
+        filters,
+        fields=None,
+        order=None,
+        filter_operator=None,
+        retired_only=False,
+        include_archived_projects=True,
+        additional_filter_presets=None,
+    ):
+        """
+        Find the first entity matching the given filters.
+
+        See ``shotgun_api3.Shotgun.find_one``.
+        """
+        results = self.find(
+            entity_type,
+            filters,
+            fields,
+            order,
+            filter_operator,
+            limit=1,
+            retired_only=retired_only,
+        )
+        return results[0] if results else None
+
+    # Modifications
+
+    def create(self, entity_type, data, return_fields=None):
+        """
+        Create an entity.
+
+        Like on a site, tasks are created from the ``task_template`` of the new
+        entity, if it has one.
+
+        See ``shotgun_api3.Shotgun.create``.
+        """
+        data = dict(data)
+        image = data.pop("image", None)
+        with self._lock:
+            entity_id = next(self._ids)
+            record = self._normalize(data)
+            record["id"] = entity_id
+            record["type"] = entity_type
+            self._records[entity_type][entity_id] = record
+            self._index(entity_type, record)
+            if image:
+                self.upload_thumbnail(entity_type, entity_id, image)
+            if entity_type != "Task" and record.get("task_template"):
+                self._create_tasks(entity_type, record)
+            result = dict(data, type=entity_type, id=entity_id)
+            if image:
+                result["image"] = record["image"]
+            for field in return_fields or []:
+                result[field] = self._get_value(entity_type, record, field)
+            return result
+
+    def update(self, entity_type, entity_id, data, multi_entity_update_modes=None):
+        """
+        Update an entity.
+
+        See ``shotgun_api3.Shotgun.update``.
+        """
+        with self._lock:
+            record = self._get_record(entity_type, entity_id)
+            self._unindex(entity_type, record)
+            record.update(self._normalize(data))
+            self._index(entity_type, record)
+            return dict(data, type=entity_type, id=entity_id)
+
+    def delete(self, entity_type, entity_id):
+        """
+        Retire an entity.
+
+        :returns: ``True`` if the entity was retired, ``False`` if it was already.
+
+        See ``shotgun_api3.Shotgun.delete``.
+        """
+        with self._lock:
+            record = self._records[entity_type].pop(entity_id, None)
+            if record is None:
+                if entity_id in self._retired[entity_type]:
+                    return False
+                raise MockShotgunError(
+                    "{0} {1} does not exist.".format(entity_type, entity_id)
+                )
+            self._unindex(entity_type, record)
+            self._retired[entity_type][entity_id] = record
+            return True
+
+    def revive(self, entity_type, entity_id):
+        """
+        Revive a retired entity.
+
+        :returns: ``True`` if the entity was revived, ``False`` otherwise.
+
+        See ``shotgun_api3.Shotgun.revive``.
+        """
+        with self._lock:
+            record = self._retired[entity_type].pop(entity_id, None)
+            if record is None:
+                return False
+            self._records[entity_type][entity_id] = record
+            self._index(entity_type, record)
+            return True
+
+    def batch(self, requests):
+        """
+        Run create, update and delete requests.
+
+        Unlike on a site, requests that were run before a failing one are not
+        rolled back.
+
+        See ``shotgun_api3.Shotgun.batch``.
+        """
+        results = []
+        with self._lock:
+            for request in requests:
+                request_type = request["request_type"]
+                if request_type == "create":
+                    results.append(
+                        self.create(
+                            request["entity_type"],
+                            request["data"],
+                            request.get("return_fields") or ["id"],
+                        )
+                    )
+                elif request_type == "update":
+                    results.append(
+                        self.update(
+                            request["entity_type"],
+                            request["entity_id"],
+                            request["data"],
+                            request.get("multi_entity_update_modes"),
+                        )
+                    )
+                elif request_type == "delete":
+                    results.append(
+                        self.delete(request["entity_type"], request["entity_id"])
+                    )
+                else:
+                    raise MockShotgunError(
+                        "Invalid request_type '{0}'.".format(request_type)
+                    )
+        return results
+
+    # Files
+
+    def upload(
+        self,
+        entity_type,
+        entity_id,
+        path,
+        field_name=None,
+        display_name=None,
+        tag_list=None,
+        created_at=None,
+    ):
+        """
+        Upload a file to an entity. Only an Attachment is created, the file is
+        not read.
+
+        :returns: The id of the Attachment.
+
+        See ``shotgun_api3.Shotgun.upload``.
+        """
+        with self._lock:
+            entity = {"type": entity_type, "id": entity_id}
+            self._get_record(entity_type, entity_id)
+            attachment = self.create(
+                "Attachment",
+                {
+                    "this_file": {
+                        "name": display_name or os.path.basename(path),
+                        "url": "{0}/file_serve/attachment/{1}".format(
+                            self.base_url, os.path.basename(path)
+                        ),
+                    },
+                    "original_fname": display_name or os.path.basename(path),
+                    "attachment_links": [entity],
+                    "tag_list": tag_list,
+                },
+            )
+            if field_name:
+                self.update(
+                    entity_type,
+                    entity_id,
+                    {
+                        field_name: {
+                            "type": "Attachment",
+                            "id": attachment["id"],
+                            "name": display_name or os.path.basename(path),
+                        }
+                    },
+                )
+            return attachment["id"]
+
+    def upload_thumbnail(self, entity_type, entity_id, path, **kwargs):
+        """
+        Set the thumbnail of an entity.
+
+        :returns: The id of the Attachment.
+
+        See ``shotgun_api3.Shotgun.upload_thumbnail``.
+        """
+        with self._lock:
+            attachment_id = self.upload(entity_type, entity_id, path)
+            self.update(
+                entity_type,
+                entity_id,
+                {"image": "{0}/thumbnail/{1}".format(self.base_url, attachment_id)},
+            )
+            return attachment_id
+
+    def share_thumbnail(
+        self,
+        entities,
+        thumbnail_path=None,
+        source_entity=None,
+        filmstrip_thumbnail=False,
+        **kwargs
+    ):
+        """
+        Set the same thumbnail on multiple entities.
+
+        :returns: The id of the Attachment.
+
+        See ``shotgun_api3.Shotgun.share_thumbnail``.
+        """
+        with self._lock:
+            if thumbnail_path:
+                attachment_id = self.upload_thumbnail(
+                    entities[0]["type"], entities[0]["id"], thumbnail_path
+                )
+                image = self._get_record(entities[0]["type"], entities[0]["id"])[
+                    "image"
+                ]
+            elif source_entity:
+                image = self._get_record(
+                    source_entity["type"], source_entity["id"]
+                ).get("image")
+                if not image:
+                    raise MockShotgunError(
+                        "{0} {1} has no thumbnail.".format(
+                            source_entity["type"], source_entity["id"]
+                        )
+                    )
+                attachment_id = int(image.rsplit("/", 1)[-1])
+            else:
+                raise MockShotgunError("thumbnail_path or source_entity is required.")
+            for entity in entities:
+                self.update(entity["type"], entity["id"], {"image": image})
+            return attachment_id
+
+    # Implementation
+
+    def _get_record(self, entity_type, entity_id):
+        """
+        Get the record of an entity that is not retired.
+
+        :raises MockShotgunError: If there is no such entity.
+        """
+        record = self._records[entity_type].get(entity_id)
+        if record is None:
+            raise MockShotgunError(
+                "{0} {1} does not exist.".format(entity_type, entity_id)
+            )
+        return record
+
+    def _normalize(self, data):
+        """
+        Copy field values so the records can't be modified by the caller.
+        Links only keep their type and id.
+        """
+        record = {}
+        for field, value in data.items():
+            if _is_link(value):
+                value = {"type": value["type"], "id": value["id"]}
+            elif isinstance(value, list):
+                value = [
+                    (
+                        {"type": item["type"], "id": item["id"]}
+                        if _is_link(item)
+                        else copy.deepcopy(item)
+                    )
+                    for item in value
+                ]
+            else:
+                value = copy.deepcopy(value)
+            record[field] = value
+        return record
+
+    def _create_tasks(self, entity_type, record):
+        """
+        Create the tasks of an entity from its task template.
+        """
+        template = record["task_template"]
+        entity = {"type": entity_type, "id": record["id"]}
+        for task in self.find(
+            "Task",
+            [["task_template", "is", template]],
+            ["content", "step"],
+        ):
+            self.create(
+                "Task",
+                {
+                    "content": task["content"],
+                    "step": task["step"],
+                    "entity": entity,
+                    "project": record.get("project"),
+                },
+            )
+
+    def _get_index(self, entity_type, field):
+        """
+        Get the index of a field, building it if it doesn't exist yet.
+
+        :returns: Dictionary of index keys to sets of ids.
+        """
+        index = self._indexes.get((entity_type, field))
+        if index is None:
+            index = collections.defaultdict(set)
+            for record in self._records[entity_type].values():
+                for key in _get_index_keys(record.get(field)):
+                    index[key].add(record["id"])
+            self._indexes[(entity_type, field)] = index
+        return index
+
+    def _index(self, entity_type, record):
+        """
+        Add a record to the indexes of its entity type.
+        """
+        for (indexed_type, field), index in self._indexes.items():
+            if indexed_type == entity_type:
+                for key in _get_index_keys(record.get(field)):
+                    index[key].add(record["id"])
+
+    def _unindex(self, entity_type, record):
+        """
+        Remove a record from the indexes of its entity type.
+        """
+        for (indexed_type, field), index in self._indexes.items():
+            if indexed_type == entity_type:
+                for key in _get_index_keys(record.get(field)):
+                    index[key].discard(record["id"])
+
+    def _get_candidates(self, entity_type, conditions, records):
+        """
+        Narrow down the records that can match the conditions using the
+        indexes of the fields filtered with ``is`` or ``in``.
+
+        Only used for active records and conditions that must all be met.
+        """
+        all_records = records[entity_type]
+        if records is not self._records or conditions.get(
+            "filter_operator", "all"
+        ) not in (
+            "all",
+            "and",
+        ):
+            return list(all_records.values())
+
+        ids = None
+        for condition in conditions["filters"]:
+            if isinstance(condition, dict):
+                continue
+            field, operator, values = self._parse_condition(condition)
+            # A link to an entity of another type or to a retired entity has
+            # no value for a linked field, so None can't be looked up.
+            if operator not in ("is", "in") or ("." in field and None in values):
+                continue
+            matching = self._get_matching_ids(entity_type, field, values)
+            ids = matching if ids is None else ids & matching
+            if not ids:
+                return []
+        if ids is None:
+            return list(all_records.values())
+        return [all_records[entity_id] for entity_id in sorted(ids)]
+
+    def _get_matching_ids(self, entity_type, field, values):
+        """
+        Get the ids of the active records whose field is one of the values,
+        using the indexes.
+
+        Linked fields like ``entity.Asset.code`` are looked up in the index of
+        the linked type first, then in the index of the link field.
+
+        :returns: Set of ids.
+        """
+        if "." in field:
+            link_field, linked_type, linked_field = field.split(".", 2)
+            index = self._get_index(entity_type, link_field)
+            matching = set()
+            for linked_id in self._get_matching_ids(linked_type, linked_field, values):
+                matching.update(index.get((linked_type, linked_id), ()))
+            return matching
+        if field == "id":
+            return {
+                value
+                for value in values
+                if _get_index_key(value) in self._records[entity_type]
+            }
+        index = self._get_index(entity_type, field)
+        matching = set()
+        for value in values:
+            matching.update(index.get(_get_index_key(value), ()))
+        return matching
+
+    @staticmethod
+    def _parse_condition(condition):
+        """
+        Split a condition into its field, operator and list of values.
+        """
+        field, operator = condition[0], condition[1]
+        values = list(condition[2:])
+        if (
+            operator in ("in", "not_in")
+            and len(values) == 1
+            and isinstance(values[0], (list, tuple))
+        ):
+            values = list(values[0])
+        return field, operator, values
+
+    def _matches(self, entity_type, record, conditions):
+        """
+        Check if a record meets a set of conditions.
+        """
+        results = (
+            (
+                self._matches(entity_type, record, condition)
+                if isinstance(condition, dict)
+                else self._matches_condition(entity_type, record, condition)
+            )
+            for condition in conditions["filters"]
+        )
+        if conditions.get("filter_operator", "all") in ("any", "or"):
+            return any(results)
+        return all(results)
+
+    def _matches_condition(self, entity_type, record, condition):
+        """
+        Check if a record meets a single condition.
+        """
+        field, operator, values = self._parse_condition(condition)
+        value = self._get_value(entity_type, record, field)
+        items = value if isinstance(value, list) else [value]
+        keys = _get_index_keys(value)
+
+        if operator in ("is", "in"):
+            return bool(keys & {_get_index_key(item) for item in values})
+        if operator in ("is_not", "not_in"):
+            return not keys & {_get_index_key(item) for item in values}
+        if operator == "type_is":
+            return any(_is_link(item) and item["type"] == values[0] for item in items)
+        if operator == "type_is_not":
+            return not any(
+                _is_link(item) and item["type"] == values[0] for item in items
+            )
+        if operator in ("contains", "not_contains", "starts_with", "ends_with"):
+            if _is_link(values[0]):
+                found = _get_index_key(values[0]) in keys
+            else:
+                text = str(value or "").lower()
+                needle = str(values[0]).lower()
+                found = {
+                    "contains": needle in text,
+                    "not_contains": needle in text,
+                    "starts_with": text.startswith(needle),
+                    "ends_with": text.endswith(needle),
+                }[operator]
+            return not found if operator == "not_contains" else found
+        if operator in ("less_than", "greater_than", "between", "not_between"):
+            if value is None:
+                return operator == "not_between"
+            if operator == "less_than":
+                return value < values[0]
+            if operator == "greater_than":
+                return value > values[0]
+            inside = values[0] <= value <= values[1]
+            return inside if operator == "between" else not inside
+        raise MockShotgunError("Unsupported operator '{0}'.".format(operator))
+
+    def _get_value(self, entity_type, record, field):
+        """
+        Get the value of a field of a record, following links for paths like
+        ``entity.Asset.code``.
+        """
+        if field == "id":
+            return record["id"]
+        if field == "type":
+            return entity_type
+        parts = field.split(".")
+        value = record.get(parts[0])
+        while len(parts) >= 3:
+            linked_type, linked_field = parts[1], parts[2]
+            if not _is_link(value) or value["type"] != linked_type:
+                return None
+            linked = self._records[linked_type].get(value["id"])
+            if linked is None:
+                return None
+            record, entity_type = linked, linked_type
+            parts = [linked_field] + parts[3:]
+            value = self._get_value(entity_type, record, linked_field)
+        return value
+
+    def _get_link(self, link):
+        """
+        Get a link as returned by the site, with the name of the entity.
+        """
+        linked = self._records[link["type"]].get(link["id"])
+        if linked is None:
+            return None
+        result = {"type": link["type"], "id": link["id"]}
+        for field in _NAME_FIELDS:
+            if field in linked:
+                result["name"] = linked[field]
+                break
+        return result
+
+    def _get_fields(self, entity_type, record, fields):
+        """
+        Build the dictionary returned for a record.
+        """
+        result = {"type": entity_type, "id": record["id"]}
+        for field in fields or []:
+            value = self._get_value(entity_type, record, field)
+            if _is_link(value):
+                value = self._get_link(value)
+            elif isinstance(value, list):
+                value = [
+                    link
+                    for link in (
+                        self._get_link(item) if _is_link(item) else item
+                        for item in value
+                    )
+                    if link is not None
+                ]
+            else:
+                value = copy.deepcopy(value)
+            result[field] = value
+        return result
+
+    def _get_sort_key(self, entity_type, record, field):
+        """
+        Get the key to sort a record on a field. Empty values come first.
+        """
+        value = self._get_value(entity_type, record, field)
+        if _is_link(value):
+            linked = self._get_link(value) or {}
+            value = linked.get("name")
+        key = _get_index_key(value)
+        return (key is not None, key if key is not None else 0)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+import os
+import socket
+import sys
+import time
+import uuid
+
+
+def _is_process_alive(pid):
+    """
+    Check if a process is running on this machine.
+
+    :param int pid: Id of the process.
+    """
+    if sys.platform == "win32":
+        # os.kill would terminate the process on Windows.
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to someone else.
+        return True
+    return True
+
+
+class ProjectPool(object):
+    """
+    Slots of a pool of test projects leased by the processes of this machine.
+
+    A slot is leased by creating its lock file exclusively, so concurrent
+    ``pytest-xdist`` workers and test runs never get the same slot. The lock
+    file records the process that leased the slot, which allows slots leased
+    by a process that died without releasing them to be reclaimed.
+
+    The pool only protects the processes of a single machine. Lock files
+    recorded by another host are never reclaimed, and the lock folder must not
+    be shared between machines, for example on a network drive, since other
+    machines can't tell if their processes are still alive. Machines that
+    test against the same site need their own pools, for example through
+    ``SHOTGUN_TEST_ENTITY_SUFFIX``.
+    """
+
+    def __init__(self, folder, size):
+        """
+        :param str folder: Folder holding the lock files of the pool.
+        :param int size: Number of slots in the pool.
+        """
+        self._folder = folder
+        self._size = size
+
+    def _get_lock_path(self, slot):
+        return os.path.join(self._folder, "slot-{0}.lock".format(slot))
+
+    def _try_lease(self, slot):
+        """
+        Try to lease a slot, reclaiming it if its owner is gone.
+
+        :returns: ``True`` if the slot was leased.
+        """
+        path = self._get_lock_path(slot)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self._is_stale(path) and self._reclaim(path):
+                return self._try_lease(slot)
+            return False
+        with os.fdopen(fd, "wt") as fh:
+            json.dump({"pid": os.getpid(), "host": socket.gethostname()}, fh)
+        return True
+
+    def _reclaim(self, path):
+        """
+        Remove the stale lock file of a slot.
+
+        Other processes may be reclaiming the same slot, and one of them may
+        already have leased it again, so the lock file is first moved to a name
+        only this process uses. Only one process can move a given lock file,
+        and the moved file is checked again before it is removed. If it turns
+        out to be a new lease, it is put back. If it can't be put back, it is
+        left where it is rather than losing a live lease.
+
+        :param str path: Path to the lock file.
+
+        :returns: ``True`` if the stale lock file was removed.
+        """
+        moved_path = "{0}.{1}-{2}.stale".format(path, os.getpid(), uuid.uuid4().hex)
+        try:
+            os.rename(path, moved_path)
+        except OSError:
+            # Another process moved it first.
+            return False
+
+        if self._is_stale(moved_path):
+            os.remove(moved_path)
+            return True
+
+        # Another process leased the slot after we found it stale. Give the
+        # lock back without overwriting a lock created in the meantime.
+        try:
+            os.link(moved_path, path)
+        except OSError:
+            # Keep the moved file rather than losing a live lease.
+            return False
+        os.remove(moved_path)
+        return False
+
+    def _is_stale(self, path):
+        """
+        Check if the process that leased a slot is gone.
+        """
+        try:
+            with open(path, "rt") as fh:
+                owner = json.load(fh)
+        except (OSError, ValueError):
+            # The lock file is being written, or is unreadable. Leave it alone.
+            return False
+        pid = owner.get("pid") if isinstance(owner, dict) else None
+        if not isinstance(pid, int):
+            # We can't tell who owns it, so leave it alone.
+            return False
+        return owner.get("host") == socket.gethostname() and not _is_process_alive(pid)
+
+    def lease(self, timeout=600, poll_interval=1.0):
+        """
+        Lease a free slot, waiting for one to be released if needed.
+
+        Slots are tried starting from one that depends on the process, so
+        concurrent processes don't all compete for the first ones.
+
+        :param float timeout: Number of seconds to wait for a free slot.
+        :param float poll_interval: Number of seconds between attempts.
+
+        :returns: Index of the slot.
+
+        :raises RuntimeError: If no slot was freed in time.
+        """
+        os.makedirs(self._folder, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        start = os.getpid() % self._size
+        while True:
+            for offset in range(self._size):
+                slot = (start + offset) % self._size
+                if self._try_lease(slot):
+                    return slot
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    "All {0} projects of the pool in {1} are in use.".format(
+                        self._size, self._folder
+                    )
+                )
+            time.sleep(poll_interval)
+
+    def release(self, slot):
+        """
+        Return a slot to the pool.
+
+        :param int slot: Index of the slot, as returned by :meth:`lease`.
+        """
+        try:
+            os.remove(self._get_lock_path(slot))
+        except OSError:
+            pass
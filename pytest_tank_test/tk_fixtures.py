@@ -9,42 +9,268 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import hashlib
+import json
 import pytest
 import os
-from tk_toolchain.authentication import get_toolkit_user
+from tk_toolchain.authentication import get_shotgun_connection, get_toolkit_user
 from tk_toolchain.testing import create_unique_name
+from tk_toolchain import util
+
+from .cassette import Cassette, RecordingShotgun, ReplayShotgun, _decode, _encode
+from .mock_shotgun import MockShotgun
+from .project_pool import ProjectPool
+from .uploads import UploadQueue
+
+# Login of the current user and factory of connections for other threads,
+# set by tk_test_shotgun. There is no factory when the stand-in for the site
+# can be shared between threads.
+_site_key = pytest.StashKey()
 
 
 @pytest.fixture(scope="session")
-def tk_test_shotgun():
+def tk_test_shotgun(pytestconfig):
     """
     Getting credentials from TK_TOOLCHAIN
+
+    With ``--tk-mock-shotgun``, an in-memory stand-in for the site is used.
+    With ``--tk-record-shotgun``, the requests sent to the site are recorded
+    into a cassette. With ``--tk-replay-shotgun``, they are answered from a
+    cassette instead of a site.
+    """
+    replay_path = pytestconfig.getoption("tk_replay_shotgun", None)
+    record_path = pytestconfig.getoption("tk_record_shotgun", None)
+    cassette = None
+    if pytestconfig.getoption("tk_mock_shotgun", False):
+        sg = MockShotgun()
+        login = sg.login
+        connection_factory = None
+    elif replay_path:
+        sg = ReplayShotgun(Cassette.load(replay_path))
+        login = sg.cassette.metadata.get("login")
+        connection_factory = None
+    elif record_path:
+        login = str(get_toolkit_user())
+        cassette = Cassette(record_path, {"login": login})
+        sg = RecordingShotgun(get_toolkit_user().create_sg_connection, cassette)
+        connection_factory = None
+    else:
+        sg = get_shotgun_connection()
+        login = str(get_toolkit_user())
+        connection_factory = get_toolkit_user().create_sg_connection
+    pytestconfig.stash[_site_key] = {
+        "login": login,
+        "connection_factory": connection_factory,
+    }
+
+    yield sg
+
+    if cassette is not None:
+        cassette.save()
+
+
+@pytest.fixture(scope="session")
+def tk_test_uploads(tk_test_shotgun, pytestconfig):
     """
-    sg = get_toolkit_user().create_sg_connection()
+    Uploads media to the site in the background.
 
-    return sg
+    Fixtures queue their uploads instead of waiting for them. Tests that need
+    the media of an entity should wait for the futures returned by
+    ``tk_test_uploads.get_futures(entity_type, entity_id)``, or for every
+    upload with ``tk_test_uploads.wait()``. Uploads that failed
+    and were not waited for are reported as an error when the session ends.
+
+    :returns: An :class:`pytest_tank_test.uploads.UploadQueue`.
+    """
+    connection_factory = pytestconfig.stash[_site_key]["connection_factory"]
+    with UploadQueue(connection_factory or (lambda: tk_test_shotgun)) as uploads:
+        yield uploads
 
 
 @pytest.fixture(scope="session")
-def tk_test_current_user(tk_test_shotgun):
+def tk_test_current_user(tk_test_shotgun, pytestconfig):
     """
     Get current user
 
     :returns: The current user id and name
     """
-    user = get_toolkit_user()
-    username = tk_test_shotgun.find_one(
-        "HumanUser", [["login", "is", str(user)]], ["name"]
-    )
+    login = pytestconfig.stash[_site_key]["login"]
+    username = tk_test_shotgun.find_one("HumanUser", [["login", "is", login]], ["name"])
 
     return username
 
 
+# Key under which the entities created by the fixtures are stored in the
+# pytest cache.
+_FIXTURE_STATE_CACHE_KEY = "tk_toolchain/fixture_state"
+
+# Bump this whenever the entities created by the fixtures change.
+_FIXTURE_STATE_VERSION = 2
+
+
+class _MachineCache(object):
+    """
+    Stores values in the tk-toolchain cache folder, so they are shared by all
+    the test runs of a machine, like the projects of a pool are.
+
+    Offers the ``get`` and ``set`` methods of the pytest cache.
+    """
+
+    def __init__(self, folder):
+        """
+        :param str folder: Folder to store the values in.
+        """
+        self._folder = folder
+
+    def _get_path(self, key):
+        return os.path.join(self._folder, *key.split("/")) + ".json"
+
+    def get(self, key, default):
+        value = util.read_json_file(self._get_path(key))
+        return default if value is None else value
+
+    def set(self, key, value):
+        util.write_json_file(self._get_path(key), value)
+
+
+class _FixtureState(object):
+    """
+    Remembers the entities created by a fixture in a previous session.
+
+    When ``--tk-reuse-fixtures`` is passed, the ids of the entities created by
+    a fixture are stored in the pytest cache, along with a fingerprint of what
+    was asked for. The next session reuses them as long as the fingerprint
+    matches and they still exist on the site.
+
+    With ``--tk-project-pool``, they are stored in the tk-toolchain cache
+    folder instead, so the entities of a pool project are reused by every run
+    of the machine that leases it, whatever the repository.
+    """
+
+    def __init__(self, config, sg):
+        """
+        :param config: The pytest configuration.
+        :param sg: Connection to the site.
+        """
+        if config.getoption("tk_project_pool", 0):
+            self._cache = _MachineCache(util.get_cache_location("fixture-state"))
+        elif config.getoption("tk_reuse_fixtures", False):
+            self._cache = getattr(config, "cache", None)
+        else:
+            self._cache = None
+        self._sg = sg
+
+    def get_fingerprint(self, *spec):
+        """
+        Compute the fingerprint of the entities a fixture wants.
+
+        :param spec: JSON serializable values describing the entities.
+
+        :returns: The fingerprint, as a string.
+        """
+        payload = json.dumps(
+            [_FIXTURE_STATE_VERSION, self._sg.base_url, list(spec)],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, name):
+        """
+        Get what a fixture stored in a previous session.
+
+        :param str name: Name of the fixture, along with what identifies its
+            entities, like the project they are in.
+
+        :returns: Dictionary with the ``fingerprint`` and ``entities`` keys, or
+            ``None`` if nothing was stored.
+        """
+        if self._cache is None:
+            return None
+        state = self._cache.get(self._get_key(name), None)
+        if not isinstance(state, dict) or "entities" not in state:
+            return None
+        return state
+
+    def set(self, name, fingerprint, entities, **kwargs):
+        """
+        Store the entities created by a fixture.
+
+        :param str name: Name of the fixture, along with what identifies its
+            entities, like the project they are in.
+        :param str fingerprint: Fingerprint of the entities.
+        :param dict entities: Ids of the entities, by entity type.
+        :param kwargs: Additional JSON serializable values to store.
+        """
+        if self._cache is None:
+            return
+        self._cache.set(
+            self._get_key(name),
+            dict(kwargs, fingerprint=fingerprint, entities=entities),
+        )
+
+    @staticmethod
+    def _get_key(name):
+        """
+        Get the key of the pytest cache a fixture's entities are stored under.
+
+        Each fixture has its own key, so concurrent workers don't overwrite
+        each other's entities.
+        """
+        return "{0}/{1}".format(
+            _FIXTURE_STATE_CACHE_KEY, hashlib.sha1(name.encode("utf-8")).hexdigest()
+        )
+
+    def find(self, entities, fields=None):
+        """
+        Find entities that were stored.
+
+        A single ``find`` is sent per entity type, no matter how many entities
+        of that type there are.
+
+        :param dict entities: Ids of the entities, by entity type.
+        :param dict fields: Fields to retrieve, by entity type.
+
+        :returns: Dictionary of the entities found, by entity type then id.
+        """
+        fields = fields or {}
+        found = {}
+        for entity_type, ids in entities.items():
+            found[entity_type] = {
+                entity["id"]: entity
+                for entity in self._sg.find(
+                    entity_type, [["id", "in", ids]], fields.get(entity_type, [])
+                )
+            }
+        return found
+
+
+def _is_complete(entities, found):
+    """
+    Check if all the entities were found.
+
+    :param dict entities: Ids of the entities, by entity type.
+    :param dict found: Entities found, as returned by :meth:`_FixtureState.find`.
+    """
+    return all(
+        set(ids) <= set(found.get(entity_type, {}))
+        for entity_type, ids in entities.items()
+    )
+
+
 @pytest.fixture(scope="session")
-def tk_test_project(tk_test_shotgun):
+def tk_test_project(tk_test_shotgun, pytestconfig):
     """
     Generates a fresh Shotgun Project to use with the UI Automation.
 
+    With ``--tk-reuse-fixtures``, the project created by a previous session is
+    reused if it still exists.
+
+    With ``--tk-project-pool=N``, a project is leased from a pool of N projects
+    shared by all the test runs of this machine instead. The project is only
+    created the first time it is leased and is returned to the pool at the end
+    of the session.
+
     :returns: Current project name and id
     """
     import sgtk
@@ -73,120 +299,341 @@ def tk_test_project(tk_test_shotgun):
         "LocalStorage", local_storage["id"], {storage_key: local_storage["path"]}
     )
 
-    # Make sure there is not already an automation project created
-    project_name = create_unique_name("Toolkit UI Automation")
-    filters = [["name", "is", project_name]]
-    existed_project = tk_test_shotgun.find_one("Project", filters)
-    if existed_project is not None:
-        tk_test_shotgun.delete(existed_project["type"], existed_project["id"])
+    pool_size = pytestconfig.getoption("tk_project_pool", 0)
+    if not pool_size:
+        yield _get_project(
+            tk_test_shotgun,
+            _FixtureState(pytestconfig, tk_test_shotgun),
+            create_unique_name("Toolkit UI Automation", partitioned=True),
+        )
+        return
+
+    base_name = create_unique_name("Toolkit UI Automation")
+    pool = ProjectPool(
+        util.get_cache_location(
+            "project-pools",
+            hashlib.sha1(
+                "{0}\0{1}".format(tk_test_shotgun.base_url, base_name).encode("utf-8")
+            ).hexdigest()[:16],
+        ),
+        pool_size,
+    )
+    slot = pool.lease()
+    try:
+        project_name = "{0} - Pool {1:02d}".format(base_name, slot)
+        project = tk_test_shotgun.find_one("Project", [["name", "is", project_name]])
+        if project is None:
+            project = _create_project(tk_test_shotgun, project_name)
+        yield project
+    finally:
+        pool.release(slot)
+
 
+def _create_project(sg, project_name):
+    """
+    Creates a project for the UI automation.
+
+    :param sg: Connection to the site.
+    :param str project_name: Name of the project.
+
+    :returns: The new project.
+    """
     # Create a new project with the Film VFX Template
     project_data = {
         "sg_description": "Project Created by Automation",
         "name": project_name,
         "tank_name": project_name,
     }
-    new_project = tk_test_shotgun.create("Project", project_data)
+    return sg.create("Project", project_data)
+
+
+def _get_project(sg, fixture_state, project_name):
+    """
+    Reuses the project of a previous session or creates a fresh one.
+
+    :param sg: Connection to the site.
+    :param fixture_state: The :class:`_FixtureState` to reuse the project from.
+    :param str project_name: Name of the project.
+
+    :returns: The project.
+    """
+    fingerprint = fixture_state.get_fingerprint(project_name)
+    state = fixture_state.get("tk_test_project/" + project_name)
+    if state and state["fingerprint"] == fingerprint:
+        project = sg.find_one(
+            "Project",
+            [["id", "in", state["entities"]["Project"]], ["name", "is", project_name]],
+        )
+        if project is not None:
+            return project
+
+    # Make sure there is not already an automation project created
+    filters = [["name", "is", project_name]]
+    existed_project = sg.find_one("Project", filters)
+    if existed_project is not None:
+        sg.delete(existed_project["type"], existed_project["id"])
+
+    new_project = _create_project(sg, project_name)
+    fixture_state.set(
+        "tk_test_project/" + project_name, fingerprint, {"Project": [new_project["id"]]}
+    )
 
     return new_project
 
 
+# Codes of the task templates created for the UI automation, along with the
+# entity type they apply to and the pipeline steps of their tasks.
+_TASK_TEMPLATES = [
+    ("Automation Shot Task Template", "Shot", ["Comp", "Light"]),
+    ("Automation Asset Task Template", "Asset", ["Model", "Rig"]),
+]
+
+# Types of the entities created in the project by the UI automation, in the
+# order they can be deleted in.
+_PROJECT_ENTITY_TYPES = [
+    "PublishedFile",
+    "Version",
+    "Task",
+    "Shot",
+    "Asset",
+    "Sequence",
+]
+
+
 @pytest.fixture(scope="session")
-def tk_test_entities(tk_test_project, tk_test_shotgun, tk_test_current_user):
+def tk_test_entities(
+    tk_test_project,
+    tk_test_shotgun,
+    tk_test_current_user,
+    tk_test_uploads,
+    pytestconfig,
+):
     """
     Creates Shotgun entities which will be used in different test cases.
 
+    The media of the version and the thumbnail of the published file are
+    uploaded in the background through ``tk_test_uploads``.
+
+    With ``--tk-reuse-fixtures``, the entities created by a previous session
+    are reused if they all still exist. Otherwise the ones that are left are
+    deleted and everything is created again.
+
     :returns: model_task, publish_file and version informations
     """
-    # Create a Sequence to be used by the Shot creation
-    sequence_data = {
-        "project": tk_test_project,
-        "code": "seq_001",
-        "sg_status_list": "ip",
-    }
-    new_sequence = tk_test_shotgun.create("Sequence", sequence_data)
+    return _get_entities(
+        _FixtureState(pytestconfig, tk_test_shotgun),
+        tk_test_shotgun,
+        tk_test_project,
+        tk_test_current_user,
+        tk_test_uploads,
+        clean_project=bool(pytestconfig.getoption("tk_project_pool", 0)),
+    )
+
 
-    # Validate if Automation shot task template exists
-    shot_template_filters = [["code", "is", "Automation Shot Task Template"]]
-    existed_shot_template = tk_test_shotgun.find_one(
-        "TaskTemplate", shot_template_filters
+def _get_entities(
+    fixture_state, sg, project, current_user, uploads=None, clean_project=False
+):
+    """
+    Reuses the entities of a previous session or creates them.
+
+    :param fixture_state: The :class:`_FixtureState` to reuse entities from.
+    :param sg: Connection to the site.
+    :param dict project: Project to create the entities in.
+    :param dict current_user: User the model task will be assigned to.
+    :param uploads: If set, the :class:`UploadQueue` used to upload media.
+    :param bool clean_project: If ``True``, the entities left in the project
+        by sessions that didn't record them, like the ones of another machine,
+        are deleted before creating new ones.
+
+    :returns: model_task, publish_file and version informations
+    """
+    fingerprint = fixture_state.get_fingerprint(
+        project["id"], current_user["id"], _TASK_TEMPLATES
     )
-    if existed_shot_template is not None:
-        tk_test_shotgun.delete(
-            existed_shot_template["type"], existed_shot_template["id"]
-        )
-    # Create a shot task templates
-    shot_template_data = {
-        "code": "Automation Shot Task Template",
-        "description": "This shot task template was created by the Toolkit UI automation",
-        "entity_type": "Shot",
-    }
-    shot_task_template = tk_test_shotgun.create("TaskTemplate", shot_template_data)
-
-    # Create Comp and Light tasks
-    for shot_task_name in ["Comp", "Light"]:
-        # Get the Pipeline step task name
-        shot_pipeline_step_filter = [["code", "is", shot_task_name]]
-        shot_pipeline_step = tk_test_shotgun.find_one("Step", shot_pipeline_step_filter)
-        # Create task
-        shot_task_data = {
-            "content": shot_task_name,
-            "step": shot_pipeline_step,
-            "task_template": shot_task_template,
-        }
-        tk_test_shotgun.create("Task", shot_task_data)
+    name = "tk_test_entities/{0}".format(project["id"])
+    state = fixture_state.get(name)
+    if state:
+        if state["fingerprint"] == fingerprint:
+            found = fixture_state.find(state["entities"])
+            if _is_complete(state["entities"], found):
+                # Return the entities as they were when created, so they are
+                # the same whether they were reused or not.
+                return tuple(_decode(state["result"]))
+        else:
+            # The entities are stale, there's no need to look them up.
+            found = state["entities"]
+        # Something is missing or stale, get rid of what is left so it
+        # doesn't get in the way of the new entities. Deleting an entity
+        # that was already deleted is not an error.
+        requests = [
+            {
+                "request_type": "delete",
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+            }
+            for entity_type, entities in found.items()
+            for entity_id in entities
+        ]
+        if requests:
+            sg.batch(requests)
+    if clean_project:
+        _clean_project(sg, project)
 
-    # Validate if Automation asset task template exists
-    asset_template_filters = [["code", "is", "Automation Asset Task Template"]]
-    existed_asset_template = tk_test_shotgun.find_one(
-        "TaskTemplate", asset_template_filters
+    created = {}
+    result = _create_entities(sg, project, current_user, created, uploads)
+    fixture_state.set(
+        name,
+        fingerprint,
+        created,
+        result=_encode(list(result)),
     )
-    if existed_asset_template is not None:
-        tk_test_shotgun.delete(
-            existed_asset_template["type"], existed_asset_template["id"]
-        )
-    # Create an asset task templates
-    asset_template_data = {
-        "code": "Automation Asset Task Template",
-        "description": "This asset task template was created by the Toolkit UI automation",
-        "entity_type": "Asset",
-    }
-    asset_task_template = tk_test_shotgun.create("TaskTemplate", asset_template_data)
-
-    # Create Model and Rig tasks
-    for task_name in ["Model", "Rig"]:
-        # Get the Pipeline step task name
-        pipeline_step_filter = [["code", "is", task_name]]
-        pipeline_step = tk_test_shotgun.find_one("Step", pipeline_step_filter)
-        # Create task
-        task_data = {
-            "content": task_name,
-            "step": pipeline_step,
-            "task_template": asset_task_template,
+    return result
+
+
+def _clean_project(sg, project):
+    """
+    Deletes the entities created by :func:`_create_entities` in a project.
+
+    :param sg: Connection to the site.
+    :param dict project: Project to clean up.
+    """
+    requests = [
+        {
+            "request_type": "delete",
+            "entity_type": entity["type"],
+            "entity_id": entity["id"],
         }
-        tk_test_shotgun.create("Task", task_data)
-
-    # Create a new shot
-    shot_data = {
-        "project": tk_test_project,
-        "sg_sequence": new_sequence,
-        "code": "shot_001",
-        "description": "This shot was created by the Toolkit UI automation",
-        "sg_status_list": "ip",
-        "task_template": shot_task_template,
+        for entity_type in _PROJECT_ENTITY_TYPES
+        for entity in sg.find(entity_type, [["project", "is", project]])
+    ]
+    if requests:
+        sg.batch(requests)
+
+
+def _create_entities(sg, project, current_user, created=None, uploads=None):
+    """
+    Creates the entities used by the UI automation.
+
+    Requests that don't depend on each other's results are sent together
+    through ``batch()`` to keep the number of round trips to the site low.
+
+    :param sg: Connection to the site.
+    :param dict project: Project to create the entities in.
+    :param dict current_user: User the model task will be assigned to.
+    :param dict created: If set, the ids of the entities created are added
+        to it, by entity type.
+    :param uploads: If set, media is queued on this :class:`UploadQueue`
+        instead of being uploaded before returning.
+
+    :returns: model_task, publish_file and version informations
+    """
+    if created is None:
+        created = {}
+
+    def _record(*entities):
+        for entity in entities:
+            created.setdefault(entity["type"], []).append(entity["id"])
+
+    # Get every pipeline step needed by the task templates at once. Step codes
+    # are matched case-insensitively, like the "is" operator does.
+    step_codes = [code for _, _, codes in _TASK_TEMPLATES for code in codes]
+    steps = {
+        step["code"].lower(): {"type": step["type"], "id": step["id"]}
+        for step in sg.find("Step", [["code", "in", step_codes]], ["code"])
     }
-    tk_test_shotgun.create("Shot", shot_data)
 
-    # Create a new asset
+    # Validate if the Automation task templates exist. They will be recreated.
+    existing_templates = sg.find(
+        "TaskTemplate",
+        [["code", "in", [code for code, _, _ in _TASK_TEMPLATES]]],
+    )
+    requests = [
+        {
+            "request_type": "delete",
+            "entity_type": template["type"],
+            "entity_id": template["id"],
+        }
+        for template in existing_templates
+    ]
+    # Create a Sequence to be used by the Shot creation
+    requests.append(
+        {
+            "request_type": "create",
+            "entity_type": "Sequence",
+            "data": {
+                "project": project,
+                "code": "seq_001",
+                "sg_status_list": "ip",
+            },
+        }
+    )
+    # Create the shot and asset task templates
+    for code, entity_type, _ in _TASK_TEMPLATES:
+        requests.append(
+            {
+                "request_type": "create",
+                "entity_type": "TaskTemplate",
+                "data": {
+                    "code": code,
+                    "description": "This {0} task template was created by the Toolkit UI automation".format(
+                        entity_type.lower()
+                    ),
+                    "entity_type": entity_type,
+                },
+            }
+        )
+    results = sg.batch(requests)[len(existing_templates) :]
+    new_sequence = results[0]
+    shot_task_template, asset_task_template = results[1:]
+    _record(*results)
+
+    # Create Comp, Light, Model and Rig tasks in their templates.
+    requests = []
+    for task_template, (_, _, codes) in zip(results[1:], _TASK_TEMPLATES):
+        for task_name in codes:
+            requests.append(
+                {
+                    "request_type": "create",
+                    "entity_type": "Task",
+                    "data": {
+                        "content": task_name,
+                        "step": steps.get(task_name.lower()),
+                        "task_template": task_template,
+                    },
+                }
+            )
+    _record(*sg.batch(requests))
+
+    # Create a new shot and a new asset. The tasks from the templates are
+    # created along with them.
     asset_data = {
-        "project": tk_test_project,
+        "project": project,
         "code": "AssetAutomation",
         "description": "This asset was created by the Toolkit UI automation",
         "sg_status_list": "ip",
         "sg_asset_type": "Character",
         "task_template": asset_task_template,
     }
-    asset = tk_test_shotgun.create("Asset", asset_data)
+    shot, asset = sg.batch(
+        [
+            {
+                "request_type": "create",
+                "entity_type": "Shot",
+                "data": {
+                    "project": project,
+                    "sg_sequence": new_sequence,
+                    "code": "shot_001",
+                    "description": "This shot was created by the Toolkit UI automation",
+                    "sg_status_list": "ip",
+                    "task_template": shot_task_template,
+                },
+            },
+            {"request_type": "create", "entity_type": "Asset", "data": asset_data},
+        ]
+    )
+    _record(shot, asset)
+    # The tasks created from the templates must be cleaned up as well.
+    _record(*sg.find("Task", [["entity", "in", [shot, asset]]]))
 
     # File to publish
     file_to_publish = os.path.join(
@@ -195,29 +642,31 @@ def tk_test_entities(tk_test_project, tk_test_shotgun, tk_test_current_user):
 
     # Create a version an upload to it
     version_data = {
-        "project": tk_test_project,
+        "project": project,
         "code": "sven.png",
         "description": "This version was created by the Toolkit UI automation",
         "entity": asset,
     }
-    version = tk_test_shotgun.create("Version", version_data)
+    version = sg.create("Version", version_data)
+    _record(version)
     # Upload a version to the published file
-    tk_test_shotgun.upload(
-        "Version", version["id"], file_to_publish, "sg_uploaded_movie"
-    )
+    if uploads is None:
+        sg.upload("Version", version["id"], file_to_publish, "sg_uploaded_movie")
+    else:
+        uploads.upload("Version", version["id"], file_to_publish, "sg_uploaded_movie")
 
     # Find the model task to publish to
     filters = [
-        ["project", "is", tk_test_project],
-        ["entity.Asset.code", "is", asset["code"]],
+        ["project", "is", project],
+        ["entity", "is", asset],
         ["step.Step.code", "is", "model"],
     ]
     fields = ["sg_status_list"]
-    model_task = tk_test_shotgun.find_one("Task", filters, fields)
+    model_task = sg.find_one("Task", filters, fields)
 
-    # Create a published file
+    # Create a published file and assign current user to the task model
     publish_data = {
-        "project": tk_test_project,
+        "project": project,
         "code": "sven.png",
         "name": "sven.png",
         "description": "This file was published by the Toolkit UI automation",
@@ -226,18 +675,30 @@ def tk_test_entities(tk_test_project, tk_test_shotgun, tk_test_current_user):
         "task": model_task,
         "version_number": 1,
         "version": version,
-        "image": file_to_publish,
     }
-    publish_file = tk_test_shotgun.create("PublishedFile", publish_data)
-
-    # Assign current user to the task model
-    tk_test_shotgun.update(
-        "Task",
-        model_task["id"],
-        {
-            "content": "Model",
-            "task_assignees": [{"type": "HumanUser", "id": tk_test_current_user["id"]}],
-        },
+    publish_file, _ = sg.batch(
+        [
+            {
+                "request_type": "create",
+                "entity_type": "PublishedFile",
+                "data": publish_data,
+            },
+            {
+                "request_type": "update",
+                "entity_type": "Task",
+                "entity_id": model_task["id"],
+                "data": {
+                    "content": "Model",
+                    "task_assignees": [{"type": "HumanUser", "id": current_user["id"]}],
+                },
+            },
+        ]
     )
+    _record(publish_file)
+    # batch() doesn't upload thumbnails like create() does, so do it here.
+    if uploads is None:
+        sg.upload_thumbnail("PublishedFile", publish_file["id"], file_to_publish)
+    else:
+        uploads.upload_thumbnail("PublishedFile", publish_file["id"], file_to_publish)
 
     return (model_task, publish_file, version)
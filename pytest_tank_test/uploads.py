@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+import concurrent.futures
+import hashlib
+import os
+import threading
+
+
+def _get_content_hash(path):
+    """
+    Hash the content of a file.
+
+    :param str path: Path to the file.
+
+    :returns: The hexadecimal digest of the file.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _ThumbnailJob(object):
+    """
+    Thumbnail waiting to be uploaded for one or more entities.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entities = []
+        self.started = False
+
+
+class UploadQueue(object):
+    """
+    Uploads files to a site in the background.
+
+    Uploads are run on a bounded thread pool. Since connections to a site are
+    not thread-safe, each thread uses its own connection.
+
+    Duplicate uploads are skipped by looking at the content of the files:
+
+    - Uploading the same content to the same field of the same entity twice
+      returns the future of the first upload.
+    - Thumbnails with the same content that are waiting to be uploaded are
+      uploaded once and shared between the entities with ``share_thumbnail()``.
+
+    Every method returns a :class:`concurrent.futures.Future`, so callers only
+    need to wait when they actually need the media.
+    """
+
+    def __init__(self, connection_factory, max_workers=4):
+        """
+        :param callable connection_factory: Creates a connection to the site.
+            Called once per thread.
+        :param int max_workers: Maximum number of files uploaded at once.
+        """
+        self._connection_factory = connection_factory
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="tk-upload"
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._uploads = {}
+        self._thumbnails = {}
+        self._futures = []
+        # Futures of the uploads of each entity, keyed by type and id.
+        self._entity_futures = collections.defaultdict(list)
+        # Futures whose errors were already raised by wait().
+        self._reported = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.shutdown()
+        else:
+            # Don't hide the error that is already being raised.
+            self._executor.shutdown(wait=True)
+
+    def upload(self, entity_type, entity_id, path, field_name=None, **kwargs):
+        """
+        Queue the upload of a file to an entity.
+
+        :param str entity_type: Type of the entity.
+        :param int entity_id: Id of the entity.
+        :param str path: Path to the file.
+        :param str field_name: Field to upload to. If not set, the file is
+            attached to the entity.
+        :param kwargs: Additional arguments for ``Shotgun.upload()``.
+
+        :returns: Future of the id of the attachment.
+        """
+        key = (entity_type, entity_id, field_name, self._get_hash(path))
+        with self._lock:
+            future = self._uploads.get(key)
+            if future is None:
+                future = self._submit(
+                    self._run_upload, entity_type, entity_id, path, field_name, kwargs
+                )
+                self._uploads[key] = future
+            self._add_entity_future(entity_type, entity_id, future)
+        return future
+
+    def upload_thumbnail(self, entity_type, entity_id, path):
+        """
+        Queue the upload of a thumbnail for an entity.
+
+        :param str entity_type: Type of the entity.
+        :param int entity_id: Id of the entity.
+        :param str path: Path to the image.
+
+        :returns: Future of the id of the thumbnail's attachment.
+        """
+        content_hash = self._get_hash(path)
+        entity = {"type": entity_type, "id": entity_id}
+        with self._lock:
+            job, future = self._thumbnails.get(content_hash, (None, None))
+            if job is None or job.started:
+                job = _ThumbnailJob(path)
+                future = self._submit(self._run_thumbnail, job)
+                self._thumbnails[content_hash] = (job, future)
+            if entity not in job.entities:
+                job.entities.append(entity)
+            self._add_entity_future(entity_type, entity_id, future)
+        return future
+
+    def get_futures(self, entity_type, entity_id):
+        """
+        Get the uploads queued for an entity, so a test can wait for the
+        media it needs instead of every upload.
+
+        :param str entity_type: Type of the entity.
+        :param int entity_id: Id of the entity.
+
+        :returns: List of the futures of the uploads, in the order they were
+            queued. The list is empty if nothing was uploaded for the entity.
+        """
+        with self._lock:
+            return list(self._entity_futures.get((entity_type, entity_id), []))
+
+    def wait(self):
+        """
+        Wait for all the queued uploads to be done.
+
+        :returns: The results of the uploads, in the order they were queued.
+
+        :raises Exception: The first error raised by an upload, once all of them
+            are done.
+        """
+        with self._lock:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
+        with self._lock:
+            self._reported.update(futures)
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting uploads.
+
+        :param bool wait: If ``True``, wait for the queued uploads to be done.
+
+        :raises Exception: When waiting, the first error raised by an upload
+            that was not already raised by :meth:`wait`, so failed uploads are
+            never silently lost.
+        """
+        self._executor.shutdown(wait=wait)
+        if not wait:
+            return
+        with self._lock:
+            futures = [
+                future for future in self._futures if future not in self._reported
+            ]
+            self._reported.update(futures)
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+    def _add_entity_future(self, entity_type, entity_id, future):
+        """
+        Record that a future uploads something for an entity. Must be called
+        with the lock held.
+        """
+        futures = self._entity_futures[(entity_type, entity_id)]
+        if future not in futures:
+            futures.append(future)
+
+    def _submit(self, fn, *args):
+        """
+        Submit a job to the thread pool. Must be called with the lock held.
+        """
+        future = self._executor.submit(fn, *args)
+        self._futures.append(future)
+        return future
+
+    def _get_hash(self, path):
+        """
+        Hash a file, reusing the hash computed previously if the file didn't
+        change.
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        content_hash = self._hashes.get(key)
+        if content_hash is None:
+            content_hash = self._hashes[key] = _get_content_hash(path)
+        return content_hash
+
+    def _get_connection(self):
+        """
+        Get the connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connection_factory()
+        return connection
+
+    def _run_upload(self, entity_type, entity_id, path, field_name, kwargs):
+        """
+        Upload a file.
+        """
+        return self._get_connection().upload(
+            entity_type, entity_id, path, field_name=field_name, **kwargs
+        )
+
+    def _run_thumbnail(self, job):
+        """
+        Upload a thumbnail for all the entities of a job.
+        """
+        with self._lock:
+            job.started = True
+            entities = list(job.entities)
+        sg = self._get_connection()
+        if len(entities) == 1:
+            return sg.upload_thumbnail(entities[0]["type"], entities[0]["id"], job.path)
+        return sg.share_thumbnail(entities, thumbnail_path=job.path)
@@ -13,6 +13,7 @@ import pytest
 from unittest.mock import Mock
 
 
+from tk_toolchain import authentication
 from tk_toolchain.authentication import _get_toolkit_user
 
 
@@ -83,3 +84,128 @@ def test_no_user_specified_auth(sg_auth_mock):
     """
     _get_toolkit_user(sg_auth_mock, {})
     assert sg_auth_mock.get_user.called
+
+
+@pytest.fixture
+def session_user_auth(tmpdir, monkeypatch):
+    """
+    Authenticator creating session users from a password or a session token.
+    """
+    for name in authentication._ENVIRONMENT_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("TK_TOOLCHAIN_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setenv("TK_TOOLCHAIN_HOST", "https://a.b.com")
+    monkeypatch.setenv("TK_TOOLCHAIN_USER_LOGIN", "elvis")
+    monkeypatch.setenv("TK_TOOLCHAIN_USER_PASSWORD", "hailToTheKing")
+    monkeypatch.delenv("TK_TOOLCHAIN_SESSION_CACHE_TTL", raising=False)
+    expired_tokens = set()
+
+    def create_session_user(login, password=None, session_token=None, host=None):
+        user = Mock(
+            spec_set=["impl", "create_sg_connection", "are_credentials_expired"]
+        )
+        user.impl = Mock(spec_set=["get_host", "get_login", "get_session_token"])
+        user.impl.get_host.return_value = host
+        user.impl.get_login.return_value = login
+        user.impl.get_session_token.return_value = session_token or "token"
+        user.are_credentials_expired.side_effect = lambda: (
+            session_token in expired_tokens
+        )
+        user.create_sg_connection.side_effect = lambda: Mock()
+        return user
+
+    sg_auth = Mock(spec_set=["create_session_user", "expired_tokens"])
+    sg_auth.expired_tokens = expired_tokens
+    sg_auth.create_session_user.side_effect = create_session_user
+    monkeypatch.setattr(authentication, "_create_authenticator", lambda: sg_auth)
+    authentication.clear_cache()
+    yield sg_auth
+    authentication.clear_cache()
+
+
+def test_memoized_user(session_user_auth, monkeypatch):
+    """
+    Ensure the user and the connection are only created once per environment.
+    """
+    user = authentication.get_toolkit_user()
+    connection = authentication.get_shotgun_connection()
+    assert authentication.get_toolkit_user() is user
+    assert authentication.get_shotgun_connection() is connection
+    assert session_user_auth.create_session_user.call_count == 1
+    assert user.create_sg_connection.call_count == 1
+
+    # Other credentials mean another user.
+    monkeypatch.setenv("TK_TOOLCHAIN_USER_LOGIN", "priscilla")
+    assert authentication.get_toolkit_user() is not user
+    monkeypatch.setenv("TK_TOOLCHAIN_USER_LOGIN", "elvis")
+    assert authentication.get_toolkit_user() is user
+
+    authentication.clear_cache()
+    assert authentication.get_toolkit_user() is not user
+
+
+def test_session_token_cache(session_user_auth, monkeypatch, tmpdir):
+    """
+    Ensure the session token is reused by other processes until it expires.
+    """
+    monkeypatch.setenv("TK_TOOLCHAIN_SESSION_CACHE_TTL", "3600")
+    authentication.get_toolkit_user()
+    session_user_auth.create_session_user.assert_called_with(
+        "elvis", password="hailToTheKing", host="https://a.b.com"
+    )
+    (session_file,) = tmpdir.join("sessions").listdir()
+    assert "hailToTheKing" not in session_file.read()
+    assert session_file.stat().mode & 0o077 == 0
+
+    # A new process uses the token instead of the password.
+    authentication.clear_cache()
+    authentication.get_toolkit_user()
+    session_user_auth.create_session_user.assert_called_with(
+        "elvis", session_token="token", host="https://a.b.com"
+    )
+
+    # The token expired, so the password is used again.
+    authentication.clear_cache()
+    monkeypatch.setattr(authentication.time, "time", lambda: 2**40)
+    authentication.get_toolkit_user()
+    session_user_auth.create_session_user.assert_called_with(
+        "elvis", password="hailToTheKing", host="https://a.b.com"
+    )
+
+    authentication.clear_cache(session_tokens=True)
+    assert not tmpdir.join("sessions").exists()
+
+
+def test_session_token_rejected(session_user_auth, monkeypatch, tmpdir):
+    """
+    Ensure a session token the site rejects is forgotten and the password is
+    used instead.
+    """
+    monkeypatch.setenv("TK_TOOLCHAIN_SESSION_CACHE_TTL", "3600")
+    authentication.get_toolkit_user()
+    (session_file,) = tmpdir.join("sessions").listdir()
+
+    session_user_auth.expired_tokens.add("token")
+    authentication.clear_cache()
+    session_user_auth.create_session_user.reset_mock()
+    user = authentication.get_toolkit_user()
+    assert [
+        call.kwargs for call in session_user_auth.create_session_user.mock_calls
+    ] == [
+        {"session_token": "token", "host": "https://a.b.com"},
+        {"password": "hailToTheKing", "host": "https://a.b.com"},
+    ]
+    assert user.are_credentials_expired() is False
+    # The token of the new session was stored in place of the rejected one.
+    assert session_file.exists()
+
+
+@pytest.mark.parametrize("ttl", [None, "0"])
+def test_session_token_cache_disabled(session_user_auth, monkeypatch, tmpdir, ttl):
+    """
+    Ensure session tokens are not stored unless a TTL is set.
+    """
+    if ttl is not None:
+        monkeypatch.setenv("TK_TOOLCHAIN_SESSION_CACHE_TTL", ttl)
+    authentication.get_toolkit_user()
+    assert not tmpdir.join("sessions").exists()
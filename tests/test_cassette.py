@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import datetime
+
+import pytest
+
+from pytest_tank_test.cassette import (
+    Cassette,
+    CassetteError,
+    RecordedError,
+    RecordingShotgun,
+    ReplayShotgun,
+    normalize_request,
+)
+from tk_toolchain.testing import create_unique_name
+
+
+class _FakeSite(object):
+    """
+    Stands in for a connection to a site.
+    """
+
+    base_url = "https://example.shotgunstudio.com"
+
+    def __init__(self):
+        self.next_id = 1
+
+    def create(self, entity_type, data, return_fields=None):
+        entity = dict(data, type=entity_type, id=self.next_id)
+        entity["created_at"] = datetime.datetime(2026, 1, 1, 12, 30)
+        self.next_id += 1
+        return entity
+
+    def find_one(self, entity_type, filters, fields=None):
+        return None
+
+    def upload(self, entity_type, entity_id, path, field_name=None):
+        return 42
+
+    def delete(self, entity_type, entity_id):
+        raise ValueError("Entity {0} {1} doesn't exist".format(entity_type, entity_id))
+
+
+def test_normalize_request(tmpdir, monkeypatch):
+    """
+    Ensure equivalent requests have the same key.
+    """
+    assert normalize_request(
+        "find_one", ("Shot", [["code", "is", "a"]]), {"fields": None}
+    ) == normalize_request(
+        "find_one", (), {"entity_type": "Shot", "filters": [("code", "is", "a")]}
+    )
+
+    # Paths inside the test fixtures are made relative to them.
+    monkeypatch.setenv("TK_TEST_FIXTURES", tmpdir.join("fixtures").strpath)
+    first = normalize_request(
+        "create",
+        ("PublishedFile", {"path": tmpdir.join("fixtures", "a.png").strpath}),
+        {},
+    )
+    monkeypatch.setenv("TK_TEST_FIXTURES", tmpdir.join("elsewhere").strpath)
+    second = normalize_request(
+        "create",
+        ("PublishedFile", {"path": tmpdir.join("elsewhere", "a.png").strpath}),
+        {},
+    )
+    assert first == second
+
+    # Uploaded files are identified by their content.
+    tmpdir.join("a.png").write("a")
+    tmpdir.join("b.png").write("a")
+    assert normalize_request(
+        "upload_thumbnail", ("Shot", 1, tmpdir.join("a.png").strpath), {}
+    ) == normalize_request(
+        "upload_thumbnail", ("Shot", 1, tmpdir.join("b.png").strpath), {}
+    )
+
+    # The path of a local storage is the same request on every platform.
+    monkeypatch.setenv("SHOTGUN_CURRENT_REPO_ROOT", tmpdir.strpath)
+    assert (
+        len(
+            {
+                normalize_request(
+                    "update", ("LocalStorage", 1, {field: tmpdir.strpath}), {}
+                )
+                for field in ["windows_path", "linux_path", "mac_path"]
+            }
+        )
+        == 1
+    )
+    assert normalize_request(
+        "find", ("LocalStorage", [["linux_path", "is", tmpdir.strpath]]), {}
+    ) == normalize_request(
+        "find", ("LocalStorage", [["mac_path", "is", tmpdir.strpath]]), {}
+    )
+
+    # Names of entities partitioned by run and worker are the same request
+    # whatever the run and the worker.
+    keys = set()
+    for run_id, worker in [("1", "gw0"), ("2", "gw3")]:
+        monkeypatch.setenv("SHOTGUN_TEST_RUN_ID", run_id)
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", worker)
+        keys.add(
+            normalize_request(
+                "find_one",
+                (
+                    "Project",
+                    [["name", "is", create_unique_name("A", partitioned=True)]],
+                ),
+                {},
+            )
+        )
+    assert len(keys) == 1
+
+    with pytest.raises(TypeError):
+        normalize_request("schema_read", (), {})
+
+
+def test_record_and_replay(tmpdir):
+    """
+    Ensure recorded requests are answered the same way when replayed.
+    """
+    image = tmpdir.join("sven.png")
+    image.write("sven")
+    cassette_path = tmpdir.join("cassette.json").strpath
+
+    cassette = Cassette(cassette_path, {"login": "elvis"})
+    recorder = RecordingShotgun(_FakeSite, cassette)
+    recorded = [
+        recorder.create("Shot", {"code": "shot_001"}),
+        recorder.create("Shot", {"code": "shot_001"}),
+        recorder.find_one("Shot", [["code", "is", "shot_002"]]),
+        recorder.upload("Shot", 1, image.strpath, "sg_movie"),
+    ]
+    with pytest.raises(ValueError):
+        recorder.delete("Shot", 3)
+    cassette.save()
+
+    replay = ReplayShotgun(Cassette.load(cassette_path))
+    assert replay.base_url == _FakeSite.base_url
+    assert replay.cassette.metadata["login"] == "elvis"
+    # The same request recorded twice is answered in the same order.
+    assert [
+        replay.create("Shot", {"code": "shot_001"}),
+        replay.create("Shot", {"code": "shot_001"}),
+        replay.find_one("Shot", [["code", "is", "shot_002"]]),
+        replay.upload("Shot", 1, image.strpath, field_name="sg_movie"),
+    ] == recorded
+    assert recorded[0]["created_at"] == datetime.datetime(2026, 1, 1, 12, 30)
+    # And the last response keeps being returned.
+    assert replay.create("Shot", {"code": "shot_001"})["id"] == 2
+
+    with pytest.raises(RecordedError) as error:
+        replay.delete("Shot", 3)
+    assert str(error.value) == "ValueError: Entity Shot 3 doesn't exist"
+
+    with pytest.raises(CassetteError):
+        replay.find_one("Shot", [["code", "is", "shot_003"]])
+
+    with pytest.raises(CassetteError):
+        Cassette.load(tmpdir.join("missing.json").strpath)
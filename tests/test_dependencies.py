@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import subprocess
+from unittest.mock import Mock
+
+import pytest
+
+from tk_toolchain import dependencies
+
+PIPELINE = """
+jobs:
+- template: build-pipeline.yml@templates
+  parameters:
+    tk_toolchain_ref: $(Build.SourceBranch)
+    additional_repositories:
+    - name: tk-framework-shotgunutils
+    - name: tk-config-basic
+      ref: v1.6.1
+- job: something_else
+"""
+
+
+def test_parse_pipeline(current_repo_root):
+    """
+    Ensure the repositories are read from this repository's pipeline file.
+    """
+    repositories = dependencies.parse_pipeline(
+        os.path.join(current_repo_root, "azure-pipelines.yml")
+    )
+    assert [repository["name"] for repository in repositories] == [
+        "tk-framework-shotgunutils",
+        "tk-multi-publish2",
+        "tk-maya",
+        "tk-config-basic",
+        "python-api",
+    ]
+    assert repositories[3] == {"name": "tk-config-basic", "ref": "v1.6.1"}
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    """
+    Keeps the manifests in a temporary cache folder.
+    """
+    cache_dir = tmpdir.mkdir("cache")
+    monkeypatch.setenv("TK_TOOLCHAIN_CACHE_DIR", cache_dir.strpath)
+    return cache_dir
+
+
+def test_without_pipeline(tmpdir, cache_dir):
+    """
+    Ensure a repository without a pipeline file has no dependencies.
+    """
+    assert dependencies.get_additional_repositories(tmpdir.strpath) == []
+    assert cache_dir.listdir() == []
+
+
+def test_manifest(tmpdir, cache_dir, monkeypatch):
+    """
+    Ensure the manifest is used until the pipeline file changes.
+    """
+    pipeline = tmpdir.join(dependencies.PIPELINE_FILE_NAME)
+    pipeline.write(PIPELINE)
+    expected = [
+        {"name": "tk-framework-shotgunutils"},
+        {"name": "tk-config-basic", "ref": "v1.6.1"},
+    ]
+
+    assert dependencies.get_additional_repositories(tmpdir.strpath) == expected
+    # The manifest is kept out of the repository.
+    manifest_path = dependencies.get_manifest_path(tmpdir.strpath)
+    assert manifest_path.startswith(cache_dir.strpath)
+    assert os.path.exists(manifest_path)
+    assert sorted(path.basename for path in tmpdir.listdir()) == [
+        dependencies.PIPELINE_FILE_NAME,
+        "cache",
+    ]
+
+    parse_pipeline = Mock(wraps=dependencies.parse_pipeline)
+    monkeypatch.setattr(dependencies, "parse_pipeline", parse_pipeline)
+    assert dependencies.get_additional_repositories(tmpdir.strpath) == expected
+    assert parse_pipeline.called is False
+
+    pipeline.write(PIPELINE.replace("tk-config-basic", "tk-config-default2"))
+    assert dependencies.get_additional_repositories(tmpdir.strpath) == [
+        {"name": "tk-framework-shotgunutils"},
+        {"name": "tk-config-default2", "ref": "v1.6.1"},
+    ]
+    assert parse_pipeline.call_count == 1
+
+
+def test_missing_dependencies_error():
+    """
+    Ensure every missing repository is reported at once.
+    """
+    repositories = [{"name": "tk-core"}, {"name": "tk-maya"}, {"name": "tk-nuke"}]
+    missing = dependencies.find_missing_repositories(repositories, {"tk-maya"})
+    assert missing == [{"name": "tk-core"}, {"name": "tk-nuke"}]
+
+    error = dependencies.MissingDependenciesError("tk-multi-app", missing)
+    assert error.missing == missing
+    assert str(error) == (
+        "tk-core, tk-nuke, which are dependencies of tk-multi-app, should be "
+        "cloned before the tests are executed:\n"
+        "pushd .. && git clone git@github.com:shotgunsoftware/tk-core.git && popd\n"
+        "pushd .. && git clone git@github.com:shotgunsoftware/tk-nuke.git && popd"
+    )
+
+
+def _git(*args, **kwargs):
+    subprocess.check_call(
+        ["git", "-c", "user.name=tk", "-c", "user.email=tk@localhost"] + list(args),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs
+    )
+
+
+def test_clone_repositories(tmpdir):
+    """
+    Ensure repositories are cloned, borrowing objects from the mirror.
+    """
+    remotes = tmpdir.mkdir("remotes")
+    for name in ["tk-core", "tk-maya"]:
+        source = tmpdir.mkdir(name)
+        source.join("README").write(name)
+        _git("init", "-q", source.strpath)
+        _git("add", "README", cwd=source.strpath)
+        _git("commit", "-q", "-m", "Initial commit", cwd=source.strpath)
+        _git("tag", "v1.0.0", cwd=source.strpath)
+        _git(
+            "clone", "-q", "--bare", source.strpath, remotes.join(name + ".git").strpath
+        )
+
+    workspace = tmpdir.mkdir("workspace")
+    clones = dependencies.clone_repositories(
+        [{"name": "tk-core", "ref": "v1.0.0"}, {"name": "tk-maya"}],
+        workspace.strpath,
+        mirror=remotes.strpath,
+        remote_url="file://" + remotes.strpath + "/{name}.git",
+    )
+    assert clones == [
+        workspace.join("tk-core").strpath,
+        workspace.join("tk-maya").strpath,
+    ]
+    assert workspace.join("tk-maya", "README").read() == "tk-maya"
+    assert workspace.join("tk-core", ".git", "objects", "info", "alternates").exists()
+
+    with pytest.raises(dependencies.CloneError) as exception:
+        dependencies.clone_repositories(
+            [{"name": "tk-nuke"}],
+            workspace.strpath,
+            remote_url="file://" + remotes.strpath + "/{name}.git",
+        )
+    assert "tk-nuke" in str(exception.value)
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from pytest_tank_test import tk_fixtures
+from pytest_tank_test.mock_shotgun import MockShotgun, MockShotgunError
+
+
+@pytest.fixture
+def sg():
+    """
+    A mock site with a project, a few assets and a few shots.
+    """
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Big Buck Bunny"})
+    sequence = sg.create("Sequence", {"code": "seq_001", "project": project})
+    for index in range(1, 4):
+        sg.create(
+            "Shot",
+            {
+                "code": "shot_{0:03d}".format(index),
+                "project": project,
+                "sg_sequence": sequence,
+                "sg_cut_duration": index * 10,
+            },
+        )
+    for code in ["Bunny", "Butterfly", "Squirrel"]:
+        sg.create(
+            "Asset", {"code": code, "project": project, "sg_asset_type": "Character"}
+        )
+    return sg
+
+
+def test_filters(sg):
+    """
+    Ensure the common filter operators are supported.
+    """
+
+    def codes(entity_type, filters, **kwargs):
+        return [
+            entity["code"]
+            for entity in sg.find(entity_type, filters, ["code"], **kwargs)
+        ]
+
+    assert codes("Asset", [["code", "is", "bunny"]]) == ["Bunny"]
+    assert codes("Asset", [["code", "is_not", "Bunny"]]) == ["Butterfly", "Squirrel"]
+    assert codes("Asset", [["code", "in", ["Bunny", "Squirrel"]]]) == [
+        "Bunny",
+        "Squirrel",
+    ]
+    assert codes("Asset", [["code", "in", "Bunny", "Squirrel"]]) == [
+        "Bunny",
+        "Squirrel",
+    ]
+    assert codes("Asset", [["code", "not_in", ["Bunny"]]]) == ["Butterfly", "Squirrel"]
+    assert codes("Asset", [["code", "starts_with", "bu"]]) == ["Bunny", "Butterfly"]
+    assert codes("Asset", [["code", "ends_with", "rel"]]) == ["Squirrel"]
+    assert codes("Asset", [["code", "contains", "tt"]]) == ["Butterfly"]
+    assert codes("Shot", [["sg_cut_duration", "greater_than", 10]]) == [
+        "shot_002",
+        "shot_003",
+    ]
+    assert codes("Shot", [["sg_cut_duration", "less_than", 20]]) == ["shot_001"]
+    assert codes("Shot", [["description", "is", None]]) == [
+        "shot_001",
+        "shot_002",
+        "shot_003",
+    ]
+    assert codes(
+        "Asset",
+        [["code", "is", "Bunny"], ["code", "is", "Squirrel"]],
+        filter_operator="any",
+    ) == ["Bunny", "Squirrel"]
+    assert codes(
+        "Asset",
+        {
+            "filter_operator": "all",
+            "filters": [
+                ["sg_asset_type", "is", "Character"],
+                {
+                    "filter_operator": "any",
+                    "filters": [
+                        ["code", "is", "Bunny"],
+                        ["code", "is", "Butterfly"],
+                    ],
+                },
+            ],
+        },
+    ) == ["Bunny", "Butterfly"]
+
+    with pytest.raises(MockShotgunError):
+        sg.find("Asset", [["code", "matches", "B*"]])
+
+
+def test_linked_fields_and_order(sg):
+    """
+    Ensure linked fields can be filtered on, returned and ordered on.
+    """
+    shots = sg.find(
+        "Shot",
+        [["sg_sequence.Sequence.code", "is", "seq_001"]],
+        ["code", "sg_sequence", "project.Project.name"],
+        order=[{"field_name": "sg_cut_duration", "direction": "desc"}],
+    )
+    assert [shot["code"] for shot in shots] == ["shot_003", "shot_002", "shot_001"]
+    assert shots[0]["sg_sequence"]["name"] == "seq_001"
+    assert shots[0]["project.Project.name"] == "Big Buck Bunny"
+    assert sg.find("Shot", [["sg_sequence.Sequence.code", "is", "seq_002"]]) == []
+
+    shot = sg.find_one(
+        "Shot", [], ["code"], order=[{"field_name": "code", "direction": "desc"}]
+    )
+    assert shot["code"] == "shot_003"
+
+
+def test_modifications(sg):
+    """
+    Ensure the indexes are kept up to date when entities change.
+    """
+    bunny = sg.find_one("Asset", [["code", "is", "Bunny"]])
+    sg.update("Asset", bunny["id"], {"code": "Rabbit"})
+    assert sg.find_one("Asset", [["code", "is", "Bunny"]]) is None
+    assert sg.find_one("Asset", [["code", "is", "Rabbit"]]) == bunny
+
+    assert sg.delete("Asset", bunny["id"])
+    assert sg.find_one("Asset", [["code", "is", "Rabbit"]]) is None
+    assert sg.find("Asset", [], retired_only=True) == [bunny]
+    assert sg.delete("Asset", bunny["id"]) is False
+    assert sg.revive("Asset", bunny["id"])
+    assert sg.find_one("Asset", [["id", "is", bunny["id"]]]) == bunny
+
+    with pytest.raises(MockShotgunError):
+        sg.update("Asset", 1000, {"code": "Nope"})
+
+
+def test_many_entities():
+    """
+    Ensure indexed queries don't go through every entity.
+    """
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Big"})
+    sg.batch(
+        [
+            {
+                "request_type": "create",
+                "entity_type": "Shot",
+                "data": {"code": "shot_{0:05d}".format(index), "project": project},
+            }
+            for index in range(5000)
+        ]
+    )
+    sg.find_one("Shot", [["code", "is", "shot_00000"]])
+
+    matches = []
+    original_matches = sg._matches
+
+    def _matches(*args):
+        matches.append(args)
+        return original_matches(*args)
+
+    sg._matches = _matches
+    shot = sg.find_one(
+        "Shot", [["project", "is", project], ["code", "is", "shot_04999"]], ["code"]
+    )
+    assert shot["code"] == "shot_04999"
+    assert len(matches) == 1
+
+
+def test_create_entities(monkeypatch):
+    """
+    Ensure the entities of the UI automation can be created on the mock.
+    """
+    monkeypatch.setenv(
+        "TK_TEST_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")
+    )
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Toolkit UI Automation"})
+    user = sg.find_one("HumanUser", [["login", "is", sg.login]], ["name"])
+
+    created = {}
+    model_task, publish_file, version = tk_fixtures._create_entities(
+        sg, project, user, created
+    )
+
+    task = sg.find_one(
+        "Task",
+        [
+            ["project", "is", project],
+            ["entity.Asset.code", "is", "AssetAutomation"],
+            ["step.Step.code", "is", "model"],
+        ],
+        ["content", "task_assignees"],
+    )
+    assert task["id"] == model_task["id"]
+    assert task["task_assignees"] == [
+        {"type": "HumanUser", "id": user["id"], "name": sg.login}
+    ]
+    assert (
+        sg.find_one("Version", [["id", "is", version["id"]]], ["sg_uploaded_movie"])[
+            "sg_uploaded_movie"
+        ]["name"]
+        == "sven.png"
+    )
+    assert sg.find_one("PublishedFile", [["id", "is", publish_file["id"]]], ["image"])[
+        "image"
+    ]
+    # One task per step of the shot and asset templates.
+    assert len(sg.find("Task", [["entity", "type_is", "Shot"]])) == 2
+    # Every entity is recorded, including the tasks created from the templates.
+    assert sorted(created["Task"]) == sorted(task["id"] for task in sg.find("Task", []))
+
+
+def test_create_entities_batches(monkeypatch):
+    """
+    Ensure the entities of the UI automation are created through a few
+    ``batch()`` calls and are linked to each other.
+    """
+    monkeypatch.setenv(
+        "TK_TEST_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")
+    )
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Toolkit UI Automation"})
+    user = sg.find_one("HumanUser", [["login", "is", sg.login]], ["name"])
+    batch = Mock(wraps=sg.batch)
+    monkeypatch.setattr(sg, "batch", batch)
+
+    model_task, publish_file, version = tk_fixtures._create_entities(sg, project, user)
+
+    # The templates and the sequence, the tasks of the templates, the shot and
+    # the asset, and finally the published file along with the task update.
+    assert batch.call_count == 4
+    assert [
+        [request["entity_type"] for request in call.args[0]]
+        for call in batch.call_args_list
+    ] == [
+        ["Sequence", "TaskTemplate", "TaskTemplate"],
+        ["Task", "Task", "Task", "Task"],
+        ["Shot", "Asset"],
+        ["PublishedFile", "Task"],
+    ]
+
+    sequence = sg.find_one("Sequence", [["code", "is", "seq_001"]])
+    shot = sg.find_one(
+        "Shot",
+        [["code", "is", "shot_001"]],
+        ["project", "sg_sequence", "task_template"],
+    )
+    assert shot["project"]["id"] == project["id"]
+    assert shot["sg_sequence"]["id"] == sequence["id"]
+    asset = sg.find_one(
+        "Asset", [["code", "is", "AssetAutomation"]], ["project", "task_template"]
+    )
+    assert asset["project"]["id"] == project["id"]
+
+    # Each template holds the tasks of its steps, and the shot and asset got
+    # their tasks from them.
+    for entity, steps in [(shot, ["comp", "light"]), (asset, ["model", "rig"])]:
+        template_tasks = sg.find(
+            "Task", [["task_template", "is", entity["task_template"]]], ["step"]
+        )
+        assert sorted(task["step"]["name"].lower() for task in template_tasks) == steps
+        entity_tasks = sg.find("Task", [["entity", "is", entity]], ["step", "project"])
+        assert sorted(task["step"]["name"].lower() for task in entity_tasks) == steps
+        assert all(task["project"]["id"] == project["id"] for task in entity_tasks)
+
+    published = sg.find_one(
+        "PublishedFile",
+        [["id", "is", publish_file["id"]]],
+        ["project", "entity", "task", "version"],
+    )
+    assert published["project"]["id"] == project["id"]
+    assert published["entity"]["id"] == asset["id"]
+    assert published["task"]["id"] == model_task["id"]
+    assert published["version"]["id"] == version["id"]
+    assert (
+        sg.find_one("Version", [["id", "is", version["id"]]], ["entity"])["entity"][
+            "id"
+        ]
+        == asset["id"]
+    )
+
+
+def test_many_linked_entities():
+    """
+    Ensure queries on linked fields don't go through every entity.
+    """
+    sg = MockShotgun()
+    assets = sg.batch(
+        [
+            {
+                "request_type": "create",
+                "entity_type": "Asset",
+                "data": {"code": "asset_{0:05d}".format(index)},
+            }
+            for index in range(2000)
+        ]
+    )
+    sg.batch(
+        [
+            {
+                "request_type": "create",
+                "entity_type": "Task",
+                "data": {"content": "model", "entity": asset},
+            }
+            for asset in assets
+        ]
+    )
+    sg.find_one("Task", [["entity.Asset.code", "is", "asset_00000"]])
+
+    matches = []
+    original_matches = sg._matches
+
+    def _matches(*args):
+        matches.append(args)
+        return original_matches(*args)
+
+    sg._matches = _matches
+    task = sg.find_one(
+        "Task", [["entity.Asset.code", "in", ["asset_01999"]]], ["entity"]
+    )
+    assert task["entity"]["id"] == assets[-1]["id"]
+    assert len(matches) == 1
+
+    # Links to entities of other types have no linked value.
+    shot = sg.create("Shot", {"code": "asset_01999"})
+    sg.create("Task", {"content": "anim", "entity": shot})
+    assert len(sg.find("Task", [["entity.Asset.code", "is", "asset_01999"]])) == 1
+    assert len(sg.find("Task", [["entity.Shot.code", "is", "asset_01999"]])) == 1
+    assert len(sg.find("Task", [["entity.Asset.code", "is", None]])) == 1
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from pytest_tank_test.project_pool import ProjectPool
+
+
+def test_lease_and_release(tmpdir):
+    """
+    Ensure a slot can't be leased twice until it is released.
+    """
+    pool = ProjectPool(tmpdir.join("pool").strpath, 2)
+    slots = {pool.lease(timeout=0), pool.lease(timeout=0)}
+    assert slots == {0, 1}
+
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=0)
+
+    pool.release(1)
+    assert pool.lease(timeout=0) == 1
+
+
+def test_reclaim_stale_slot(tmpdir):
+    """
+    Ensure a slot leased by a process that is gone can be leased again.
+    """
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+
+    folder = tmpdir.mkdir("pool")
+    folder.join("slot-0.lock").write(
+        json.dumps({"pid": process.pid, "host": socket.gethostname()})
+    )
+    # A slot leased from another machine is left alone.
+    folder.join("slot-1.lock").write(
+        json.dumps({"pid": process.pid, "host": "elsewhere"})
+    )
+
+    pool = ProjectPool(folder.strpath, 2)
+    assert pool.lease(timeout=0) == 0
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=0)
+    # A lock without a process id is never reclaimed.
+    folder.join("slot-1.lock").write(json.dumps({"host": socket.gethostname()}))
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=0)
+
+
+def test_reclaim_race(tmpdir, monkeypatch):
+    """
+    Ensure a slot leased again by another process while it was being
+    reclaimed is given back to that process.
+    """
+    folder = tmpdir.mkdir("pool")
+    lease = json.dumps({"pid": os.getpid(), "host": socket.gethostname()})
+    folder.join("slot-0.lock").write(lease)
+
+    pool = ProjectPool(folder.strpath, 1)
+    is_stale = pool._is_stale
+    checks = []
+
+    def _is_stale(path):
+        # The lock was stale when first checked, but another process
+        # reclaimed the slot and leased it again right after.
+        checks.append(path)
+        return len(checks) == 1 or is_stale(path)
+
+    monkeypatch.setattr(pool, "_is_stale", _is_stale)
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=0)
+    assert len(checks) == 2
+    assert folder.listdir() == [folder.join("slot-0.lock")]
+    assert folder.join("slot-0.lock").read() == lease
+
+
+def test_reclaim_race_without_link(tmpdir, monkeypatch):
+    """
+    Ensure a lease that can't be given back is kept rather than removed.
+    """
+    folder = tmpdir.mkdir("pool")
+    lease = json.dumps({"pid": os.getpid(), "host": socket.gethostname()})
+    folder.join("slot-0.lock").write(lease)
+
+    pool = ProjectPool(folder.strpath, 1)
+    is_stale = pool._is_stale
+    checks = []
+
+    def _is_stale(path):
+        checks.append(path)
+        return len(checks) == 1 or is_stale(path)
+
+    def _link(src, dst):
+        raise OSError("Hard links are not supported.")
+
+    monkeypatch.setattr(pool, "_is_stale", _is_stale)
+    monkeypatch.setattr(os, "link", _link)
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=0)
+    (moved,) = folder.listdir()
+    assert moved.basename.endswith(".stale")
+    assert moved.read() == lease
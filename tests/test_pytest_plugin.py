@@ -10,6 +10,12 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import pathlib
+from unittest.mock import Mock
+
+import pytest
+
+import pytest_tank_test
 
 
 def test_shotgun_repos_root(repos_root):
@@ -33,3 +39,333 @@ def test_shotgun_test_engine_env_var(current_repo_root):
     assert os.environ.get("SHOTGUN_TEST_ENGINE") == os.path.join(
         os.path.join(current_repo_root, "tk_toolchain", "tk_testengine")
     )
+
+
+class _FakeCache(object):
+    """
+    Stands in for pytest's cache.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, key, default):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+
+def test_bootstrap_cache(tmpdir):
+    """
+    Ensure the bootstrap state is reused until a repository changes.
+    """
+    workspace = tmpdir.mkdir("workspace")
+    repo_root = workspace.mkdir("tk-multi-app")
+    tk_core_root = workspace.mkdir("tk-core")
+    config = Mock(spec=["cache"], cache=_FakeCache())
+    state = {"repo_root": repo_root.strpath, "tk_core_repo_root": tk_core_root.strpath}
+
+    assert pytest_tank_test._load_bootstrap_state(config, repo_root.strpath) is None
+    pytest_tank_test._save_bootstrap_state(config, repo_root.strpath, state)
+    assert pytest_tank_test._load_bootstrap_state(config, repo_root.strpath) == state
+    # The state is only valid for the folder it was computed from.
+    assert pytest_tank_test._load_bootstrap_state(config, tmpdir.strpath) is None
+
+    repo_root.join("azure-pipelines.yml").write("jobs: []")
+    assert pytest_tank_test._load_bootstrap_state(config, repo_root.strpath) is None
+
+
+def test_bootstrap_cache_disabled():
+    """
+    Ensure the bootstrap cache is skipped when pytest's cache is disabled.
+    """
+    config = Mock(spec=["cache"], cache=None)
+    assert pytest_tank_test._load_bootstrap_state(config, os.getcwd()) is None
+    pytest_tank_test._save_bootstrap_state(
+        config,
+        os.getcwd(),
+        {"repo_root": os.getcwd(), "tk_core_repo_root": os.getcwd()},
+    )
+
+
+def test_xdist_worker_uses_controller_state(tmpdir, monkeypatch):
+    """
+    Ensure the controller's bootstrap state is handed to workers, which apply
+    it without discovering the repository again.
+    """
+    state = {
+        "repo_root": tmpdir.strpath,
+        "tk_core_repo_root": tmpdir.strpath,
+        "sys_paths": [["Adding Toolkit folder", tmpdir.strpath]],
+        "default_environment": {},
+        "environment": {"TK_TEST_FIXTURES": tmpdir.join("fixtures").strpath},
+    }
+    controller_config = Mock(spec=["stash"], stash=pytest.Stash())
+    controller_config.stash[pytest_tank_test._bootstrap_state_key] = state
+    node = Mock(spec=["config", "workerinput"], config=controller_config)
+    node.workerinput = {}
+    pytest_tank_test.pytest_configure_node(node)
+
+    monkeypatch.setattr(pytest_tank_test.sys, "path", list(pytest_tank_test.sys.path))
+    monkeypatch.delenv("TK_TEST_FIXTURES", raising=False)
+    monkeypatch.delenv("SHOTGUN_TEST_ENGINE", raising=False)
+    monkeypatch.setattr(
+        pytest_tank_test,
+        "_compute_bootstrap_state",
+        Mock(side_effect=AssertionError("Workers should not discover the repo.")),
+    )
+    monkeypatch.setattr(
+        pytest_tank_test,
+        "_initialize_logging",
+        Mock(side_effect=AssertionError("Logging should be deferred.")),
+    )
+
+    worker_config = Mock(
+        spec=["stash", "workerinput", "rootpath", "getini"],
+        stash=pytest.Stash(),
+        workerinput=node.workerinput,
+        rootpath=pathlib.Path(tmpdir.strpath),
+    )
+    worker_config.getini.return_value = []
+    pytest_tank_test.pytest_configure(worker_config)
+    assert pytest_tank_test.sys.path[0] == tmpdir.strpath
+    assert os.environ["TK_TEST_FIXTURES"] == tmpdir.join("fixtures").strpath
+    # Logging is set up lazily by the worker, like on the controller.
+    assert worker_config.stash[pytest_tank_test._logging_pending_key] is True
+
+
+def test_deferred_logging(monkeypatch):
+    """
+    Ensure the Toolkit log file is only set up once, before the first test
+    that needs Toolkit.
+    """
+    initialize_logging = Mock()
+    monkeypatch.setattr(pytest_tank_test, "_initialize_logging", initialize_logging)
+    monkeypatch.delitem(pytest_tank_test.sys.modules, "tank", raising=False)
+
+    config = Mock(spec=["stash"], stash=pytest.Stash())
+    config.stash[pytest_tank_test._logging_pending_key] = True
+    config.stash[pytest_tank_test._startup_profile_key] = {}
+
+    def _make_item(fixturenames):
+        return Mock(
+            spec=["config", "fixturenames", "nodeid"],
+            config=config,
+            fixturenames=fixturenames,
+            nodeid="test_something",
+        )
+
+    pytest_tank_test.pytest_runtest_setup(_make_item(["tmpdir"]))
+    assert initialize_logging.called is False
+
+    pytest_tank_test.pytest_runtest_setup(_make_item(["tk_test_shotgun"]))
+    pytest_tank_test.pytest_runtest_setup(_make_item(["tk_test_project"]))
+    assert initialize_logging.call_count == 1
+    assert list(config.stash[pytest_tank_test._startup_profile_key]) == [
+        "Toolkit import and logging (deferred to test_something)"
+    ]
+
+
+@pytest.mark.parametrize(
+    "relative_path,ignored",
+    [
+        ("tests/fixtures", True),
+        ("tests/fixtures/config/hooks/test_hook.py", True),
+        ("tests/python/third_party/mock/test_mock.py", True),
+        # The built-in folders are ignored wherever they are in the path.
+        ("tests/fixtures_extra/test_something.py", False),
+        ("hooks/tests/fixtures/test_hook.py", True),
+        ("tests/test_something.py", False),
+        ("vendor", True),
+        ("vendor/lib/test_lib.py", True),
+        # Folders matching a pattern are pruned, so their content is never visited.
+        ("python/tk_multi_app/external", True),
+        ("python/tk_multi_app/test_app.py", False),
+        # Wildcards don't span folders.
+        ("python/tk_multi_app/lib/external", False),
+    ],
+)
+def test_ignore_collect(tmpdir, relative_path, ignored):
+    """
+    Ensure the right paths are not collected.
+    """
+    root = pathlib.Path(tmpdir.strpath)
+    config = Mock(
+        spec=["rootpath", "stash", "getini"],
+        rootpath=root,
+        stash=pytest.Stash(),
+    )
+    config.getini.return_value = ["vendor/", "python/*/external"]
+    result = pytest_tank_test.pytest_ignore_collect(
+        root.joinpath(*relative_path.split("/")), config
+    )
+    assert result is (True if ignored else None)
+
+
+class _FakeSite(object):
+    """
+    Stands in for a connection to a site, only keeping track of entity ids.
+    """
+
+    base_url = "https://example.shotgunstudio.com"
+
+    def __init__(self):
+        self.entities = set()
+        self.finds = []
+
+    def find(self, entity_type, filters, fields):
+        self.finds.append(entity_type)
+        return [
+            {"type": entity_type, "id": entity_id}
+            for entity_id in filters[0][2]
+            if (entity_type, entity_id) in self.entities
+        ]
+
+    def batch(self, requests):
+        for request in requests:
+            self.entities.discard((request["entity_type"], request["entity_id"]))
+
+
+def test_fixture_state(monkeypatch):
+    """
+    Ensure the entities of a previous session are reused while they exist.
+    """
+    from pytest_tank_test import tk_fixtures
+
+    site = _FakeSite()
+    next_ids = iter(range(100))
+
+    def _create_entities(sg, project, current_user, created, uploads):
+        ids = [next(next_ids) for _ in range(3)]
+        created.update({"Task": ids[:1], "Version": ids[1:2], "Asset": ids[2:]})
+        site.entities.update(
+            (entity_type, entity_id)
+            for entity_type, entity_ids in created.items()
+            for entity_id in entity_ids
+        )
+        return ({"type": "Task", "id": ids[0]}, {"type": "Version", "id": ids[1]})
+
+    create_entities = Mock(wraps=_create_entities)
+    monkeypatch.setattr(tk_fixtures, "_create_entities", create_entities)
+    config = Mock(spec=["cache", "getoption"], cache=_FakeCache())
+    config.getoption.side_effect = {"tk_reuse_fixtures": True}.get
+    fixture_state = tk_fixtures._FixtureState(config, site)
+
+    def get_entities(project_id=1):
+        return tk_fixtures._get_entities(
+            fixture_state, site, {"type": "Project", "id": project_id}, {"id": 1}
+        )
+
+    result = get_entities()
+    assert create_entities.call_count == 1
+    assert site.finds == []
+
+    # The entities are only validated the second time around.
+    assert get_entities() == result
+    assert create_entities.call_count == 1
+    assert sorted(site.finds) == ["Asset", "Task", "Version"]
+
+    # An entity is missing, so what's left is deleted and recreated.
+    site.entities.discard(("Asset", 2))
+    assert get_entities() != result
+    assert create_entities.call_count == 2
+    assert ("Task", 0) not in site.entities
+
+    # Entities for another project are not reused.
+    get_entities(project_id=2)
+    assert create_entities.call_count == 3
+
+    # The fingerprint changed, so the entities are deleted without being
+    # looked up first.
+    del site.finds[:]
+    site.base_url = "https://other.shotgunstudio.com"
+    get_entities()
+    assert create_entities.call_count == 4
+    assert site.finds == []
+    assert ("Asset", 5) not in site.entities
+
+
+def test_reused_entities_are_the_same(monkeypatch):
+    """
+    Ensure reused entities are returned with the same fields as when they
+    were created.
+    """
+    from pytest_tank_test import tk_fixtures
+    from pytest_tank_test.mock_shotgun import MockShotgun
+
+    monkeypatch.setenv(
+        "TK_TEST_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")
+    )
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Toolkit UI Automation"})
+    user = sg.find_one("HumanUser", [["login", "is", sg.login]], ["name"])
+    config = Mock(spec=["cache", "getoption"], cache=_FakeCache())
+    config.getoption.side_effect = {"tk_reuse_fixtures": True}.get
+
+    def get_entities():
+        return tk_fixtures._get_entities(
+            tk_fixtures._FixtureState(config, sg), sg, project, user
+        )
+
+    created = get_entities()
+    assert created[1]["code"] == "sven.png"
+    assert get_entities() == created
+    assert len(sg.find("Asset", [])) == 1
+
+
+def test_pool_fixture_state(monkeypatch, tmpdir):
+    """
+    Ensure the entities of a pool project are shared by the runs of a machine
+    and aren't duplicated by the runs of another one.
+    """
+    from pytest_tank_test import tk_fixtures
+    from pytest_tank_test.mock_shotgun import MockShotgun
+
+    monkeypatch.setenv(
+        "TK_TEST_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")
+    )
+    sg = MockShotgun()
+    project = sg.create("Project", {"name": "Toolkit UI Automation - Pool 00"})
+    user = sg.find_one("HumanUser", [["login", "is", sg.login]], ["name"])
+
+    def get_entities():
+        # Each run has its own pytest cache, like separate repositories.
+        config = Mock(spec=["cache", "getoption"], cache=_FakeCache())
+        config.getoption.side_effect = {"tk_project_pool": 2}.get
+        return tk_fixtures._get_entities(
+            tk_fixtures._FixtureState(config, sg),
+            sg,
+            project,
+            user,
+            clean_project=True,
+        )
+
+    monkeypatch.setenv("TK_TOOLCHAIN_CACHE_DIR", tmpdir.join("machine1").strpath)
+    created = get_entities()
+    assert get_entities() == created
+
+    # Another machine doesn't know about the entities, so it replaces them.
+    monkeypatch.setenv("TK_TOOLCHAIN_CACHE_DIR", tmpdir.join("machine2").strpath)
+    model_task, _, _ = get_entities()
+    assert model_task["id"] != created[0]["id"]
+    assert len(sg.find("Asset", [])) == 1
+    assert len(sg.find("Version", [])) == 1
+    assert sg.find("Task", [["entity.Asset.code", "is", "AssetAutomation"]]) == [
+        {"type": "Task", "id": task["id"]}
+        for task in sg.find("Task", [["entity", "type_is", "Asset"]])
+    ]
+
+
+def test_fixture_state_disabled():
+    """
+    Ensure nothing is stored unless --tk-reuse-fixtures is passed.
+    """
+    from pytest_tank_test import tk_fixtures
+
+    config = Mock(spec=["cache", "getoption"], cache=_FakeCache())
+    config.getoption.return_value = False
+    fixture_state = tk_fixtures._FixtureState(config, _FakeSite())
+    fixture_state.set("tk_test_project", "fingerprint", {"Project": [1]})
+    assert fixture_state.get("tk_test_project") is None
+    assert config.cache.get(tk_fixtures._FIXTURE_STATE_CACHE_KEY, None) is None
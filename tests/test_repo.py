@@ -13,7 +13,8 @@ import pytest
 import os
 
 
-from tk_toolchain.repo import Repository
+from tk_toolchain import repo as repo_module
+from tk_toolchain.repo import Repository, RepositoryInfo
 
 
 def test_find_root(current_repo_root, tmpdir):
@@ -168,3 +169,81 @@ def test_ensure_test_repositories_exists(repo_name):
         "Repository %s does not exist. Clone the master branch from Github for the test suite to pass."
         % repo_path
     )
+
+
+def test_find_root_cache_invalidation(tmpdir):
+    """
+    Ensure a repository created after a lookup is found on the next lookup.
+    """
+    sub_folder = tmpdir.mkdir("repo").mkdir("python")
+    with pytest.raises(RuntimeError):
+        Repository.find_root(sub_folder.strpath)
+
+    tmpdir.join("repo").mkdir(".git")
+    assert Repository.find_root(sub_folder.strpath) == tmpdir.join("repo").strpath
+
+
+def test_find_roots(current_repo_root, tmpdir):
+    """
+    Ensure many paths can be resolved at once.
+    """
+    other_repo = tmpdir.mkdir("other_repo")
+    other_repo.mkdir(".hg")
+    not_a_repo = tmpdir.mkdir("not_a_repo")
+
+    paths = [
+        os.path.dirname(__file__),
+        os.path.join(current_repo_root, "tk_toolchain", "cmd_line_tools"),
+        current_repo_root,
+        other_repo.mkdir("a").mkdir("b").strpath,
+        not_a_repo.strpath,
+    ]
+    assert Repository.find_roots(paths) == {
+        paths[0]: current_repo_root,
+        paths[1]: current_repo_root,
+        paths[2]: current_repo_root,
+        paths[3]: other_repo.strpath,
+        paths[4]: None,
+    }
+
+
+def test_repository_info_single_listing(tmpdir, monkeypatch):
+    """
+    Ensure classifying a repository only lists its root once.
+    """
+    root = tmpdir.mkdir("tk-config-test")
+    root.mkdir(".git")
+    root.mkdir("core")
+    root.mkdir("env")
+    RepositoryInfo.clear_cache()
+
+    listed_folders = []
+    listdir = os.listdir
+
+    def _listdir(path):
+        listed_folders.append(path)
+        return listdir(path)
+
+    monkeypatch.setattr(repo_module.os, "listdir", _listdir)
+
+    repo = Repository(root.strpath)
+    _test_component(repo, is_config=True)
+    assert Repository(root.strpath).is_config()
+    assert listed_folders == [root.strpath]
+
+    # A new entry at the root invalidates the snapshot.
+    root.join("app.py").write("")
+    repo.refresh()
+    assert repo.is_app()
+    assert len(listed_folders) == 2
+
+
+def test_repository_info_repr(tmpdir):
+    """
+    Ensure __repr__ behaves correctly.
+    """
+    info = RepositoryInfo(tmpdir.strpath, ["engine.py"])
+    assert info.is_engine
+    assert repr(info) == "<tk_toolchain.repo.RepositoryInfo for {0}>".format(
+        tmpdir.strpath
+    )
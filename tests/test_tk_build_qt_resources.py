@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sys
+
+import pytest
+
+from tk_toolchain.cmd_line_tools import tk_build_qt_resources
+
+COMPILER = """#!{python}
+import sys
+
+with open({log!r}, "a") as fh:
+    fh.write(sys.argv[-1] + "\\n")
+print("from PySide2 import QtCore")
+print("# " + open(sys.argv[-1]).read().strip())
+"""
+
+BUILD_RESOURCES = """
+- ui_src: resources
+  ui_files:
+    - dialog
+  res_files:
+    - resources
+  py_dest: ui
+"""
+
+
+@pytest.fixture
+def app(tmpdir):
+    """
+    App with a .ui and a .qrc file, along with a fake compiler that logs the
+    files it compiles.
+    """
+    compiler = tmpdir.join("compiler")
+    compiler.write(
+        COMPILER.format(python=sys.executable, log=tmpdir.join("log").strpath)
+    )
+    compiler.chmod(0o755)
+    app = tmpdir.mkdir("app")
+    app.join("build_resources.yml").write(BUILD_RESOURCES)
+    resources = app.mkdir("resources")
+    resources.join("dialog.ui").write("<ui/>")
+    resources.join("resources.qrc").write(
+        "<RCC><qresource><file>icon.png</file></qresource></RCC>"
+    )
+    resources.join("icon.png").write("icon")
+    app.mkdir("ui")
+    return app
+
+
+def _build(app, monkeypatch, version="5.15.2", force=False):
+    monkeypatch.chdir(app.strpath)
+    compiler = app.dirpath().join("compiler").strpath
+    log = app.dirpath().join("log")
+    if log.exists():
+        log.remove()
+    tk_build_qt_resources.run_yaml_commands(
+        "build_resources.yml",
+        compiler,
+        compiler,
+        {compiler: version},
+        force,
+    )
+    if not log.exists():
+        return []
+    return [line.rsplit("/", 1)[-1] for line in log.read().splitlines()]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shebang compiler.")
+def test_build_cache(app, monkeypatch):
+    """
+    Ensure files are only built again when something they depend on changed.
+    """
+    assert _build(app, monkeypatch) == ["dialog.ui", "resources.qrc"]
+    assert app.join("ui", "dialog.py").read() == (
+        "from tank.platform.qt import QtCore\n# <ui/>\n"
+    )
+    assert app.join(tk_build_qt_resources.BUILD_CACHE_FILE_NAME).exists()
+    assert _build(app, monkeypatch) == []
+
+    # An asset of the .qrc file changed.
+    app.join("resources", "icon.png").write("new icon")
+    assert _build(app, monkeypatch) == ["resources.qrc"]
+
+    # An output was removed.
+    app.join("ui", "dialog.py").remove()
+    assert _build(app, monkeypatch) == ["dialog.ui"]
+
+    # The compiler changed.
+    assert _build(app, monkeypatch, version="5.15.3") == [
+        "dialog.ui",
+        "resources.qrc",
+    ]
+
+    assert _build(app, monkeypatch, version="5.15.3", force=True) == [
+        "dialog.ui",
+        "resources.qrc",
+    ]
@@ -9,8 +9,11 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import functools
+import json
 import os
 import subprocess
+from unittest.mock import Mock
 
 import pytest
 from ruamel import yaml
@@ -142,6 +145,676 @@ def test_update_config(
     assert expected_cfg == test_config
 
 
+ENV_TEMPLATE = """\
+# Environment {index}
+engines:
+  tk-maya:
+    apps:
+      tk-multi-publish2:
+        location:
+          type: app_store
+          name: tk-multi-publish2
+          version: v2.0.0
+    location: {{type: app_store, name: tk-maya, version: v0.10.0}}
+frameworks:
+  tk-framework-shotgunutils_v5.x.x:
+    location:
+      type: app_store
+      name: tk-framework-shotgunutils
+      version: v5.7.0
+  tk-framework-shotgunutils_v4.x.x:
+    location:
+      type: app_store
+      name: tk-framework-shotgunutils
+      version: v4.4.0
+"""
+
+
+@pytest.fixture
+def generated_config(tmpdir):
+    """
+    Generates a config with many environment files, half of which don't use
+    any bundle.
+    """
+    env = tmpdir.mkdir("config").mkdir("env")
+    for index in range(40):
+        if index % 2:
+            env.join("env_{0:02d}.yml".format(index)).write(
+                "# Environment {0}\nsettings: {{}}\n".format(index)
+            )
+        else:
+            env.join("env_{0:02d}.yml".format(index)).write(
+                ENV_TEMPLATE.format(index=index)
+            )
+    env.join("notes.txt").write("tk-maya")
+    return tmpdir.join("config")
+
+
+def test_file_mentions(generated_config, monkeypatch):
+    """
+    Ensure files are filtered on their raw content.
+    """
+    env = generated_config.join("env")
+    for threshold in (tk_config_update._MMAP_THRESHOLD, 0):
+        monkeypatch.setattr(tk_config_update, "_MMAP_THRESHOLD", threshold)
+        assert tk_config_update.file_mentions(
+            env.join("env_00.yml").strpath, ["tk-maya"]
+        )
+        assert not tk_config_update.file_mentions(
+            env.join("env_01.yml").strpath, ["tk-maya"]
+        )
+        assert tk_config_update.file_mentions(
+            env.join("env_01.yml").strpath, ["tk-maya", "Environment"]
+        )
+    env.join("empty.yml").write("")
+    assert not tk_config_update.file_mentions(env.join("empty.yml").strpath, ["tk"])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_update_generated_config(generated_config, monkeypatch, jobs):
+    """
+    Ensure files are updated the same way whether they are processed in
+    parallel or not.
+    """
+    monkeypatch.setattr(tk_config_update, "_PARALLEL_THRESHOLD", 0)
+    env = generated_config.join("env")
+    updated_files = list(
+        tk_config_update.update_files(
+            generated_config.strpath, "tk-framework-shotgunutils", "v5.8.0", jobs
+        )
+    )
+    assert updated_files == [
+        env.join("env_{0:02d}.yml".format(index)).strpath for index in range(0, 40, 2)
+    ]
+    assert env.join("env_00.yml").read() == ENV_TEMPLATE.format(index=0).replace(
+        "v5.7.0", "v5.8.0"
+    )
+    assert env.join("env_01.yml").read() == "# Environment 1\nsettings: {}\n"
+
+
+def test_descriptor_index(generated_config, tmpdir, monkeypatch):
+    """
+    Ensure the descriptors of a config are indexed and cached by content.
+    """
+    cache = tmpdir.join("index").strpath
+    index = tk_config_update.DescriptorIndex.build(generated_config.strpath, cache)
+    assert index.get_bundles() == {
+        "tk-framework-shotgunutils": {"v4.4.0": 20, "v5.7.0": 20},
+        "tk-maya": {"v0.10.0": 20},
+        "tk-multi-publish2": {"v2.0.0": 20},
+    }
+
+    descriptors = index.find("tk-framework-shotgunutils", "v4.x")
+    assert len(descriptors) == 20
+    assert descriptors[0].file == "env/env_00.yml"
+    assert descriptors[0].path == [
+        "frameworks",
+        "tk-framework-shotgunutils_v4.x.x",
+        "location",
+    ]
+    assert descriptors[0].line == 20
+    assert descriptors[0].column == 15
+    assert index.find("tk-maya", "v0.10.0")[0].path == [
+        "engines",
+        "tk-maya",
+        "location",
+    ]
+    assert index.find("tk-maya", "v1.x") == []
+
+    # Only the files that changed are parsed again.
+    generated_config.join("env", "env_02.yml").write(
+        ENV_TEMPLATE.format(index=2).replace("v0.10.0", "v0.11.0")
+    )
+    get_file_descriptors = Mock(wraps=tk_config_update.get_file_descriptors)
+    monkeypatch.setattr(tk_config_update, "get_file_descriptors", get_file_descriptors)
+    index = tk_config_update.DescriptorIndex.build(generated_config.strpath, cache)
+    get_file_descriptors.assert_called_once_with(
+        generated_config.join("env", "env_02.yml").strpath
+    )
+    assert index.get_bundles()["tk-maya"] == {"v0.10.0": 19, "v0.11.0": 1}
+
+
+def test_descriptor_index_bundles(generated_config, tmpdir):
+    """
+    Ensure only the files mentioning the given bundles are indexed.
+    """
+    generated_config.join("env", "env_02.yml").write(
+        ENV_TEMPLATE.format(index=2).replace("tk-maya", "tk-nuke")
+    )
+    cache = tmpdir.join("index").strpath
+    index = tk_config_update.DescriptorIndex.build(
+        generated_config.strpath, cache, bundles=["tk-nuke"]
+    )
+    assert {descriptor.file for descriptor in index.descriptors} == {"env/env_02.yml"}
+    assert index.get_bundles()["tk-nuke"] == {"v0.10.0": 1}
+    assert len(tmpdir.join("index").listdir()) == 1
+
+
+def test_prune_descriptor_index(generated_config, tmpdir):
+    """
+    Ensure only the cache entries that were not used recently are removed.
+    """
+    cache = tmpdir.join("index").strpath
+    tk_config_update.DescriptorIndex.build(generated_config.strpath, cache)
+    entries = sorted(str(entry) for entry in tmpdir.join("index").visit("*.json"))
+    assert entries
+    assert tk_config_update.DescriptorIndex.prune_cache(cache, max_age=1) == []
+
+    # A file that was modified leaves an entry nobody uses anymore.
+    for entry in entries:
+        os.utime(entry, (0, 0))
+    generated_config.join("env", "env_02.yml").write(
+        ENV_TEMPLATE.format(index=2).replace("v0.10.0", "v0.11.0")
+    )
+    tk_config_update.DescriptorIndex.build(generated_config.strpath, cache)
+    removed = tk_config_update.DescriptorIndex.prune_cache(cache, max_age=1)
+    assert len(removed) == 1
+    assert removed[0] in entries
+    assert len(list(tmpdir.join("index").visit("*.json"))) == len(entries)
+
+
+NON_STRING_KEYS = """1:
+  2020-01-01:
+    location:
+      type: app_store
+      name: tk-maya
+      version: v0.10.0
+"""
+
+
+def test_non_string_keys(tmpdir):
+    """
+    Ensure descriptors under keys that are not strings can be cached and
+    updated by rewriting the whole file.
+    """
+    tmpdir.mkdir("config").join("env.yml").write(NON_STRING_KEYS)
+    cache = tmpdir.join("index").strpath
+    for version in ["v0.11.0", "v0.12.0"]:
+        # The second time around, the descriptors come from the cache.
+        index = tk_config_update.DescriptorIndex.build(
+            tmpdir.join("config").strpath, cache
+        )
+        (descriptor,) = index.find("tk-maya")
+        assert descriptor.path == [1, "2020-01-01", "location"]
+        ((yml_file, edits),) = index.get_edits({"tk-maya": [version]}).items()
+        assert tk_config_update.apply_edits(yml_file, edits, surgical=False) == [
+            ("tk-maya", version)
+        ]
+        assert tmpdir.join("config", "env.yml").read() == NON_STRING_KEYS.replace(
+            "v0.10.0", version
+        )
+
+
+def test_query_config(generated_config, capsys):
+    """
+    Ensure the bundles used by a local config can be listed.
+    """
+    assert (
+        tk_config_update.main(
+            [generated_config.strpath, "--list-bundles", "--no-cache"]
+        )
+        == 0
+    )
+    assert capsys.readouterr().out.splitlines() == [
+        "tk-framework-shotgunutils v4.4.0 (20 references)",
+        "tk-framework-shotgunutils v5.7.0 (20 references)",
+        "tk-maya v0.10.0 (20 references)",
+        "tk-multi-publish2 v2.0.0 (20 references)",
+    ]
+
+    assert (
+        tk_config_update.main(
+            [generated_config.strpath, "--where", "tk-maya@v0.x", "--no-cache"]
+        )
+        == 0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 20
+    assert lines[0] == "env/env_00.yml:10: engines.tk-maya.location v0.10.0"
+
+    assert (
+        tk_config_update.main(
+            [generated_config.strpath, "--where", "tk-nuke", "--no-cache"]
+        )
+        == 1
+    )
+
+
+def test_dry_run(generated_config, capsys):
+    """
+    Ensure a dry run reports the changes without making them.
+    """
+    env_00 = generated_config.join("env", "env_00.yml")
+    assert (
+        tk_config_update.main(
+            [
+                generated_config.strpath,
+                "tk-framework-shotgunutils",
+                "v5.8.0",
+                "--dry-run",
+                "--format",
+                "json",
+                "--no-cache",
+            ]
+        )
+        == 0
+    )
+    report = json.loads(capsys.readouterr().out)
+    assert report["schema_version"] == 1
+    assert report["updates"] == [
+        {"bundle": "tk-framework-shotgunutils", "version": "v5.8.0"}
+    ]
+    assert len(report["configs"]) == 1
+    assert report["configs"][0]["config"] == generated_config.strpath
+    assert report["configs"][0]["error"] is None
+    changes = report["configs"][0]["changes"]
+    assert len(changes) == 20
+    assert changes[0] == {
+        "file": "env/env_00.yml",
+        "line": 16,
+        "path": ["frameworks", "tk-framework-shotgunutils_v5.x.x", "location"],
+        "bundle": "tk-framework-shotgunutils",
+        "old_version": "v5.7.0",
+        "new_version": "v5.8.0",
+    }
+    assert env_00.read() == ENV_TEMPLATE.format(index=0)
+
+    assert (
+        tk_config_update.main(
+            [generated_config.strpath, "tk-maya", "v0.11.0", "--dry-run", "--no-cache"]
+        )
+        == 0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 20
+    assert lines[0] == "env/env_00.yml:10: tk-maya v0.10.0 -> v0.11.0"
+    assert env_00.read() == ENV_TEMPLATE.format(index=0)
+
+
+def test_parse_version():
+    """
+    Ensure versions are compared by their numbers.
+    """
+    assert tk_config_update.parse_version("v1.10.0") == (1, 10, 0)
+    assert tk_config_update.parse_version("v1.10.0") > (
+        tk_config_update.parse_version("v1.9.12")
+    )
+    assert tk_config_update.parse_version("v1.10.0").major == 1
+    assert tk_config_update.parse_version("master") is None
+    assert tk_config_update.parse_version("v1.2") is None
+    assert tk_config_update.is_descriptor_matching(
+        {"name": "tk-framework-qtwidgets", "version": "v2.9.0"},
+        "tk-framework-qtwidgets",
+        "v2.10.0",
+    )
+    assert not tk_config_update.is_descriptor_matching(
+        {"name": "tk-framework-qtwidgets", "version": "v2.9.0"},
+        "tk-framework-qtwidgets",
+        "v20.0.0",
+    )
+    # Versions that can't be parsed are compared on the text of their major
+    # version.
+    assert tk_config_update.is_descriptor_matching(
+        {"name": "tk-framework-x", "version": "v2.3"}, "tk-framework-x", "v2.4.0"
+    )
+
+
+def test_upgrade_all(generated_config, tmpdir, capsys):
+    """
+    Ensure every bundle is upgraded to its latest compatible version.
+    """
+    catalog = tmpdir.join("catalog.yml")
+    catalog.write(
+        "tk-maya: [v0.9.0, v1.0.0, v0.10.5]\n"
+        "tk-framework-shotgunutils: [v4.4.1, v4.5.0, v5.7.0, v6.0.0]\n"
+        "tk-multi-publish2: [v1.0.0]\n"
+    )
+    assert tk_config_update.load_catalog(catalog.strpath)["tk-maya"] == [
+        "v0.9.0",
+        "v0.10.5",
+        "v1.0.0",
+    ]
+
+    assert (
+        tk_config_update.main(
+            [
+                generated_config.strpath,
+                "--upgrade-all",
+                catalog.strpath,
+                "--dry-run",
+                "--format",
+                "json",
+                "--no-cache",
+            ]
+        )
+        == 0
+    )
+    report = json.loads(capsys.readouterr().out)
+    assert report["updates"] == [
+        {"bundle": "tk-maya", "version": "v1.0.0"},
+        {"bundle": "tk-framework-shotgunutils", "version": "v4.5.0"},
+    ]
+    assert [
+        (change["bundle"], change["old_version"], change["new_version"])
+        for change in report["configs"][0]["changes"][:2]
+    ] == [
+        ("tk-maya", "v0.10.0", "v1.0.0"),
+        ("tk-framework-shotgunutils", "v4.4.0", "v4.5.0"),
+    ]
+    assert len(report["configs"][0]["changes"]) == 40
+
+    catalog.write("tk-maya: [latest]\n")
+    with pytest.raises(ValueError):
+        tk_config_update.load_catalog(catalog.strpath)
+
+
+def test_apply_many_updates(generated_config):
+    """
+    Ensure every bundle is updated in a single pass.
+    """
+    env = generated_config.join("env")
+    updates = tk_config_update.get_updates(
+        [
+            ("tk-maya", "v0.11.0"),
+            ("tk-framework-shotgunutils", "v5.8.0"),
+            ("tk-framework-shotgunutils", "v4.4.1"),
+            ("tk-multi-publish2", "v2.0.0"),
+        ]
+    )
+    results = list(tk_config_update.apply_updates(generated_config.strpath, updates))
+    assert results == [
+        (
+            env.join("env_{0:02d}.yml".format(index)).strpath,
+            [
+                ("tk-maya", "v0.11.0"),
+                ("tk-framework-shotgunutils", "v5.8.0"),
+                ("tk-framework-shotgunutils", "v4.4.1"),
+            ],
+        )
+        for index in range(0, 40, 2)
+    ]
+    assert env.join("env_00.yml").read() == (
+        ENV_TEMPLATE.format(index=0)
+        .replace("version: v0.10.0", "version: v0.11.0")
+        .replace("v5.7.0", "v5.8.0")
+        .replace("v4.4.0", "v4.4.1")
+    )
+
+
+@pytest.mark.parametrize(
+    "pairs",
+    [
+        [("tk-core", "v0.19.0"), ("tk-core", "v0.20.0")],
+        [("tk-framework-qtwidgets", "v2.1.0"), ("tk-framework-qtwidgets", "v2.2.0")],
+        [("tk-framework-qtwidgets", "v2.1"), ("tk-framework-qtwidgets", "v2.2.0")],
+    ],
+)
+def test_conflicting_updates(pairs):
+    """
+    Ensure a bundle can't be updated to two versions that would apply to the
+    same descriptors.
+    """
+    with pytest.raises(ValueError):
+        tk_config_update.get_updates(pairs)
+
+
+def _git(*args, **kwargs):
+    subprocess.check_call(
+        ["git", "-c", "init.defaultBranch=master"] + list(args),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs
+    )
+
+
+def test_manifest(generated_config, tmpdir, monkeypatch):
+    """
+    Ensure every config of a manifest is cloned, updated and pushed.
+    """
+    for name in ["GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"]:
+        monkeypatch.setenv(name, "tk")
+    for name in ["GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"]:
+        monkeypatch.setenv(name, "tk@localhost")
+    monkeypatch.setenv("TK_TOOLCHAIN_CACHE_DIR", tmpdir.join("cache").strpath)
+
+    _git("init", "-q", generated_config.strpath)
+    _git("add", ".", cwd=generated_config.strpath)
+    _git("commit", "-q", "-m", "Initial commit", cwd=generated_config.strpath)
+    remotes = []
+    for name in ["tk-config-basic", "tk-config-default2"]:
+        remote = tmpdir.join(name + ".git").strpath
+        _git("clone", "-q", "--bare", generated_config.strpath, remote)
+        remotes.append(remote)
+
+    manifest = tmpdir.join("manifest.yml")
+    manifest.write(
+        "configs:\n"
+        + "".join("- {0}\n".format(remote) for remote in remotes)
+        + "bundles:\n"
+        "  tk-maya: v0.11.0\n"
+        "  tk-framework-shotgunutils: [v5.8.0, v4.4.1]\n"
+    )
+    assert (
+        tk_config_update.main(["--manifest", manifest.strpath, "--push-changes"]) == 0
+    )
+
+    for remote in remotes:
+        message = subprocess.check_output(
+            ["git", "log", "-1", "--format=%B"], cwd=remote, universal_newlines=True
+        )
+        assert message.strip() == (
+            "Updated 3 bundles\n"
+            "\n"
+            "- tk-maya to v0.11.0\n"
+            "  Release notes: https://github.com/shotgunsoftware/tk-maya/releases/tag/v0.11.0\n"
+            "- tk-framework-shotgunutils to v5.8.0\n"
+            "  Release notes: https://github.com/shotgunsoftware/tk-framework-shotgunutils/releases/tag/v5.8.0\n"
+            "- tk-framework-shotgunutils to v4.4.1\n"
+            "  Release notes: https://github.com/shotgunsoftware/tk-framework-shotgunutils/releases/tag/v4.4.1"
+        )
+
+
+def test_invalid_manifest(tmpdir):
+    """
+    Ensure a manifest must list configs and bundles.
+    """
+    manifest = tmpdir.join("manifest.json")
+    manifest.write('{"bundles": {"tk-core": "v0.19.0"}}')
+    with pytest.raises(ValueError):
+        tk_config_update.load_manifest(manifest.strpath)
+
+    manifest.write(
+        '{"configs": ["tk-config-basic"], "bundles": {"tk-core": "v0.19.0"}}'
+    )
+    assert tk_config_update.load_manifest(manifest.strpath) == (
+        ["tk-config-basic"],
+        [("tk-core", "v0.19.0")],
+    )
+
+
+FRAMEWORKS = """\
+# Frameworks
+frameworks:
+  tk-framework-shotgunutils_v5.x.x:
+    location:
+      type: app_store
+      name: tk-framework-shotgunutils
+      version: "v5.7.0"  # Pinned
+  tk-framework-qtwidgets_v2.x.x:
+    location: {type: app_store, name: tk-framework-qtwidgets, version: 'v2.9.0'}
+  tk-framework-widget_v1.x.x:
+    location:   {type: app_store, version: v1.0.0, name: tk-framework-widget}
+"""
+
+
+@pytest.fixture
+def frameworks_config(tmpdir):
+    """
+    Config whose frameworks file is formatted by hand.
+    """
+    config = tmpdir.mkdir("frameworks_config")
+    frameworks = config.join("frameworks.yml")
+    frameworks.write(FRAMEWORKS)
+    frameworks.chmod(0o640)
+    return config
+
+
+FRAMEWORK_UPDATES = [
+    ("tk-framework-shotgunutils", "v5.8.0"),
+    ("tk-framework-qtwidgets", "v2.10.0"),
+    ("tk-framework-widget", "v1.1.0"),
+]
+
+
+def test_surgical_update(frameworks_config):
+    """
+    Ensure only the versions are replaced in the files.
+    """
+    frameworks = frameworks_config.join("frameworks.yml")
+    updates = tk_config_update.get_updates(FRAMEWORK_UPDATES)
+    assert list(tk_config_update.apply_updates(frameworks_config.strpath, updates)) == [
+        (frameworks.strpath, FRAMEWORK_UPDATES)
+    ]
+    assert frameworks.read() == (
+        FRAMEWORKS.replace("v5.7.0", "v5.8.0")
+        .replace("v2.9.0", "v2.10.0")
+        .replace("v1.0.0", "v1.1.0")
+    )
+    assert frameworks.stat().mode & 0o777 == 0o640
+    # No temporary file is left behind.
+    assert frameworks_config.listdir() == [frameworks]
+
+
+def test_surgical_update_fallback(frameworks_config):
+    """
+    Ensure files are written back entirely when a version is not where the
+    index found it.
+    """
+    frameworks = frameworks_config.join("frameworks.yml")
+    updates = tk_config_update.get_updates(FRAMEWORK_UPDATES)
+    index = tk_config_update.DescriptorIndex.build(frameworks_config.strpath)
+    index.descriptors[0].column += 1
+    assert (
+        tk_config_update.patch_file(
+            frameworks.strpath, list(index.get_edits(updates).values())[0]
+        )
+        is None
+    )
+    assert frameworks.read() == FRAMEWORKS
+
+    list(
+        tk_config_update.apply_updates(frameworks_config.strpath, updates, index=index)
+    )
+    _yaml = yaml.YAML()
+    data = _yaml.load(frameworks.read())
+    assert [
+        framework["location"]["version"] for framework in data["frameworks"].values()
+    ] == ["v5.8.0", "v2.10.0", "v1.1.0"]
+
+
+@pytest.mark.parametrize("plumbing", [False, True])
+def test_batched_commit(generated_config, monkeypatch, plumbing):
+    """
+    Ensure updated files are staged and committed with a fixed number of git
+    commands.
+    """
+    for name in ["GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"]:
+        monkeypatch.setenv(name, "tk")
+    for name in ["GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"]:
+        monkeypatch.setenv(name, "tk@localhost")
+    _git("init", "-q", generated_config.strpath)
+    _git("add", ".", cwd=generated_config.strpath)
+    _git("commit", "-q", "-m", "Initial commit", cwd=generated_config.strpath)
+
+    repo = tk_config_update.Repository(generated_config.strpath)
+    updated_files = list(
+        tk_config_update.update_files(
+            generated_config.strpath, "tk-maya", "v0.11.0", jobs=1
+        )
+    )
+    assert len(updated_files) == 20
+
+    run = Mock(wraps=subprocess.run)
+    monkeypatch.setattr(subprocess, "run", run)
+    if plumbing:
+        repo.stage_files(updated_files)
+        repo.commit_tree("Updated tk-maya to v0.11.0")
+        assert run.call_count == 5
+    else:
+        repo.add_files(updated_files)
+        repo.commit("Updated tk-maya to v0.11.0")
+        assert run.call_count == 2
+
+    assert (
+        subprocess.check_output(
+            ["git", "status", "--porcelain"],
+            cwd=generated_config.strpath,
+            universal_newlines=True,
+        )
+        == ""
+    )
+    assert subprocess.check_output(
+        ["git", "show", "--format=%s", "--name-only", "HEAD"],
+        cwd=generated_config.strpath,
+        universal_newlines=True,
+    ).split() == ["Updated", "tk-maya", "to", "v0.11.0"] + [
+        "env/env_{0:02d}.yml".format(index) for index in range(0, 40, 2)
+    ]
+
+
+def test_mirror_cache(tmpdir):
+    """
+    Ensure clones only fetch what changed in the remote since the last clone,
+    and can push back to it.
+    """
+    git = functools.partial(_git, "-c", "user.name=tk", "-c", "user.email=tk@localhost")
+    source = tmpdir.mkdir("source")
+    source.join("info.yml").write("version: 1\n")
+    git("init", "-q", source.strpath)
+    git("add", ".", cwd=source.strpath)
+    git("commit", "-q", "-m", "Initial commit", cwd=source.strpath)
+    remote = "file://" + tmpdir.join("remote.git").strpath
+    git("clone", "-q", "--bare", source.strpath, tmpdir.join("remote.git").strpath)
+
+    mirrors = tk_config_update.MirrorCache(tmpdir.join("mirrors").strpath)
+    first = tmpdir.join("first")
+    mirrors.clone(remote, first.strpath)
+    assert first.join("info.yml").read() == "version: 1\n"
+    assert first.join(".git", "objects", "info", "alternates").exists()
+
+    # Push a change to the remote from the clone.
+    first.join("info.yml").write("version: 2\n")
+    git("commit", "-q", "-a", "-m", "Bump", cwd=first.strpath)
+    git("push", "-q", "origin", "master", cwd=first.strpath)
+
+    second = tmpdir.join("second")
+    mirrors.clone(remote, second.strpath)
+    assert second.join("info.yml").read() == "version: 2\n"
+    assert (
+        subprocess.check_output(
+            ["git", "remote", "get-url", "origin"],
+            cwd=second.strpath,
+            universal_newlines=True,
+        ).strip()
+        == remote
+    )
+
+    # Only mirrors that were not used recently are removed.
+    assert mirrors.prune(max_age=1) == []
+    last_used = os.path.join(mirrors.get_path(remote), "tk-toolchain-last-used")
+    os.utime(last_used, (0, 0))
+    assert mirrors.prune(max_age=1) == [mirrors.get_path(remote)]
+    assert not os.path.exists(mirrors.get_path(remote))
+
+    # What git printed is reported when it fails.
+    with pytest.raises(tk_config_update.GitError) as error:
+        mirrors.clone(
+            "file://" + tmpdir.join("missing").strpath, tmpdir.join("third").strpath
+        )
+    assert error.value.stderr.strip()
+    assert error.value.stderr.strip() in str(error.value)
+
+
 # This will of files will not change over time as the repository for the tests
 # was cloned from a tag.
 expected_config_files = set(
@@ -226,3 +899,26 @@ expected_config_files = set(
         "env/includes/shotgun/playlist.yml",
     ]
 )
+
+
+def test_git_output_is_captured(generated_config, tmpdir, monkeypatch, capfd):
+    """
+    Ensure git doesn't write to the terminal, so the reports of configs
+    updated concurrently aren't interleaved, and that its output is kept in
+    the errors.
+    """
+    for name in ["GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"]:
+        monkeypatch.setenv(name, "tk")
+    for name in ["GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"]:
+        monkeypatch.setenv(name, "tk@localhost")
+    _git("init", "-q", generated_config.strpath)
+    _git("add", ".", cwd=generated_config.strpath)
+    capfd.readouterr()
+
+    repo = tk_config_update.Repository(generated_config.strpath)
+    assert "Initial commit" in repo.commit("Initial commit")
+
+    with pytest.raises(tk_config_update.GitError) as error:
+        tk_config_update.Repository.clone(tmpdir.join("missing").strpath)
+    assert "missing" in str(error.value).splitlines()[-1]
+    assert capfd.readouterr() == ("", "")
@@ -18,7 +18,7 @@ def test_create_project(tk_test_shotgun, tk_test_project):
     Ensure the project gets created successfully.
     """
     # Get project info
-    project_name = create_unique_name("Toolkit UI Automation")
+    project_name = create_unique_name("Toolkit UI Automation", partitioned=True)
     filters = [["name", "is", project_name]]
     existed_project = tk_test_shotgun.find_one("Project", filters)
 
@@ -9,9 +9,20 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import pytest
+
 from tk_toolchain.testing import create_unique_name
 
 
+@pytest.fixture(autouse=True)
+def single_run(monkeypatch):
+    """
+    Ensure the tests behave the same when run with pytest-xdist.
+    """
+    monkeypatch.delenv("SHOTGUN_TEST_RUN_ID", raising=False)
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+
+
 def test_with_env_var(monkeypatch):
     """
     Ensure the env var is added to the name.
@@ -29,3 +40,18 @@ def test_without_env_var(monkeypatch):
     monkeypatch.delenv("SHOTGUN_TEST_ENTITY_SUFFIX", raising=False)
     project_name = create_unique_name("Test")
     assert project_name == "Test"
+
+
+def test_with_worker_and_run(monkeypatch):
+    """
+    Ensure the run and worker ids are added after the suffix.
+    """
+    monkeypatch.setenv("SHOTGUN_TEST_ENTITY_SUFFIX", "Potatoe")
+    monkeypatch.setenv("SHOTGUN_TEST_RUN_ID", "1234")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+    assert create_unique_name("Test", partitioned=True) == "Test - Potatoe - 1234 - gw1"
+    # The ids are only added when asked for, so existing callers are unaffected.
+    assert create_unique_name("Test") == "Test - Potatoe"
+
+    monkeypatch.delenv("SHOTGUN_TEST_ENTITY_SUFFIX")
+    assert create_unique_name("Test", partitioned=True) == "Test - 1234 - gw1"
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import threading
+
+import pytest
+
+from pytest_tank_test.uploads import UploadQueue
+
+
+class _FakeConnection(object):
+    """
+    Records the uploads sent to the site.
+    """
+
+    def __init__(self, calls, unblocked):
+        self._calls = calls
+        self._unblocked = unblocked
+
+    def upload(self, entity_type, entity_id, path, field_name=None, **kwargs):
+        self._unblocked.wait()
+        if path.endswith("broken.png"):
+            raise RuntimeError("Upload failed")
+        self._calls.append(("upload", entity_type, entity_id, field_name))
+        return len(self._calls)
+
+    def upload_thumbnail(self, entity_type, entity_id, path):
+        self._calls.append(("upload_thumbnail", entity_type, entity_id))
+        return len(self._calls)
+
+    def share_thumbnail(self, entities, thumbnail_path=None):
+        self._calls.append(
+            ("share_thumbnail", [(entity["type"], entity["id"]) for entity in entities])
+        )
+        return len(self._calls)
+
+
+@pytest.fixture
+def images(tmpdir):
+    """
+    Two files with the same content and one with different content.
+    """
+    tmpdir.join("a.png").write("a")
+    tmpdir.join("copy_of_a.png").write("a")
+    tmpdir.join("b.png").write("b")
+    return tmpdir
+
+
+def test_deduplication(images):
+    """
+    Ensure files with the same content are only uploaded once.
+    """
+    calls = []
+    unblocked = threading.Event()
+    connections = []
+
+    def connection_factory():
+        connections.append(_FakeConnection(calls, unblocked))
+        return connections[-1]
+
+    with UploadQueue(connection_factory, max_workers=1) as uploads:
+        # Keep the only thread busy so the thumbnails wait in the queue.
+        movie = uploads.upload("Version", 1, images.join("a.png").strpath, "movie")
+        assert (
+            uploads.upload("Version", 1, images.join("copy_of_a.png").strpath, "movie")
+            is movie
+        )
+        first = uploads.upload_thumbnail("Shot", 1, images.join("a.png").strpath)
+        second = uploads.upload_thumbnail(
+            "Asset", 2, images.join("copy_of_a.png").strpath
+        )
+        other = uploads.upload_thumbnail("Asset", 3, images.join("b.png").strpath)
+        assert first is second
+        assert other is not first
+        assert not movie.done()
+        assert uploads.get_futures("Version", 1) == [movie]
+        assert uploads.get_futures("Asset", 2) == [first]
+        assert uploads.get_futures("Asset", 4) == []
+
+        unblocked.set()
+        uploads.wait()
+
+    assert calls == [
+        ("upload", "Version", 1, "movie"),
+        ("share_thumbnail", [("Shot", 1), ("Asset", 2)]),
+        ("upload_thumbnail", "Asset", 3),
+    ]
+    assert len(connections) == 1
+
+
+def test_errors(images):
+    """
+    Ensure errors are reported once every upload is done.
+    """
+    calls = []
+    unblocked = threading.Event()
+    unblocked.set()
+    images.join("broken.png").write("broken")
+
+    with UploadQueue(lambda: _FakeConnection(calls, unblocked)) as uploads:
+        broken = uploads.upload("Version", 1, images.join("broken.png").strpath)
+        uploads.upload("Version", 2, images.join("a.png").strpath)
+        with pytest.raises(RuntimeError):
+            uploads.wait()
+
+    assert isinstance(broken.exception(), RuntimeError)
+    assert calls == [("upload", "Version", 2, None)]
+
+
+def test_errors_on_shutdown(images):
+    """
+    Ensure errors that were not waited for are raised on shutdown.
+    """
+    calls = []
+    unblocked = threading.Event()
+    unblocked.set()
+    images.join("broken.png").write("broken")
+
+    with pytest.raises(RuntimeError):
+        with UploadQueue(lambda: _FakeConnection(calls, unblocked)) as uploads:
+            uploads.upload("Version", 1, images.join("broken.png").strpath)
+            uploads.upload("Version", 2, images.join("a.png").strpath)
+
+    assert calls == [("upload", "Version", 2, None)]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import pytest
+
+from tk_toolchain import workspace as workspace_module
+from tk_toolchain.workspace import WorkspaceIndex
+
+
+@pytest.fixture
+def workspace_root(tmpdir):
+    """
+    Creates a workspace with a few repositories in it.
+    """
+    root = tmpdir.mkdir("workspace")
+    for name, marker in [
+        ("tk-core", "_core_upgrader.py"),
+        ("tk-maya", "engine.py"),
+        ("tk-framework-shotgunutils", "framework.py"),
+        ("tk-multi-publish2", "app.py"),
+    ]:
+        repo = root.mkdir(name)
+        repo.mkdir(".git")
+        repo.join(marker).write("")
+    # A folder that is not a repository and a file, which should be ignored.
+    root.mkdir("downloads")
+    root.join("notes.txt").write("")
+    return root
+
+
+@pytest.fixture
+def classified_folders(monkeypatch):
+    """
+    Records the folders classified by the index.
+    """
+    folders = []
+    classify = workspace_module._classify
+
+    def _classify(path):
+        folders.append(path)
+        return classify(path)
+
+    monkeypatch.setattr(workspace_module, "_classify", _classify)
+    return folders
+
+
+def test_scan(workspace_root, tmpdir):
+    """
+    Ensure every folder of the workspace is found and classified.
+    """
+    index = WorkspaceIndex.load(
+        workspace_root.strpath, tmpdir.join("index.json").strpath
+    )
+    assert list(index) == [
+        "downloads",
+        "tk-core",
+        "tk-framework-shotgunutils",
+        "tk-maya",
+        "tk-multi-publish2",
+    ]
+    assert "tk-maya" in index
+    assert "notes.txt" not in index
+    assert index.get_path("tk-core") == workspace_root.join("tk-core").strpath
+    assert index.get_path("tk-nuke") is None
+    assert index.is_repository("tk-core")
+    assert index.is_repository("downloads") is False
+    assert index.get_kinds("tk-maya") == ["engine"]
+    assert index.get_kinds("downloads") == []
+    assert index.find("framework") == ["tk-framework-shotgunutils"]
+
+
+def test_incremental_refresh(workspace_root, tmpdir, classified_folders):
+    """
+    Ensure only the folders that changed are classified again.
+    """
+    index_path = tmpdir.join("index.json").strpath
+    WorkspaceIndex.load(workspace_root.strpath, index_path)
+    assert len(classified_folders) == 5
+
+    # A new index reuses what was persisted by the previous one.
+    del classified_folders[:]
+    index = WorkspaceIndex.load(workspace_root.strpath, index_path)
+    assert classified_folders == []
+
+    workspace_root.join("downloads").mkdir(".git")
+    workspace_root.join("downloads").join("app.py").write("")
+    workspace_root.join("tk-core").remove()
+    assert index.refresh()
+    assert classified_folders == [workspace_root.join("downloads").strpath]
+    assert index.find("app") == ["downloads", "tk-multi-publish2"]
+    assert "tk-core" not in index
+
+    assert index.refresh() is False
+
+
+def test_lookup_on_demand(workspace_root, tmpdir, classified_folders):
+    """
+    Ensure looking up folders by name only inspects those folders.
+    """
+    index_path = tmpdir.join("index.json").strpath
+    index = WorkspaceIndex(workspace_root.strpath, index_path)
+    assert "tk-core" in index
+    assert index.get_kinds("tk-maya") == ["engine"]
+    assert "tk-nuke" not in index
+    assert "../workspace" not in index
+    assert classified_folders == [
+        workspace_root.join("tk-core").strpath,
+        workspace_root.join("tk-maya").strpath,
+    ]
+
+    # A new index reuses what was looked up by the previous one.
+    del classified_folders[:]
+    index = WorkspaceIndex(workspace_root.strpath, index_path)
+    assert index.get_path("tk-core") == workspace_root.join("tk-core").strpath
+    assert classified_folders == []
+
+    # Folders cloned after the first lookup are found.
+    workspace_root.mkdir("tk-nuke").mkdir(".git")
+    workspace_root.join("tk-nuke").join("engine.py").write("")
+    assert index.get_kinds("tk-nuke") == ["engine"]
+
+    # Iterating scans the whole workspace.
+    assert len(index) == 6
+    assert sorted(classified_folders) == [
+        workspace_root.join("downloads").strpath,
+        workspace_root.join("tk-framework-shotgunutils").strpath,
+        workspace_root.join("tk-multi-publish2").strpath,
+        workspace_root.join("tk-nuke").strpath,
+    ]
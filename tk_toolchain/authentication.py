@@ -9,13 +9,157 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import hashlib
 import os
+import shutil
+import threading
+import time
 
+from tk_toolchain import util
 
-def _get_toolkit_user(sg_auth, environment):
+# Environment variables the user is created from.
+_ENVIRONMENT_VARIABLES = (
+    "TK_TOOLCHAIN_HOST",
+    "TK_TOOLCHAIN_USER_LOGIN",
+    "TK_TOOLCHAIN_USER_PASSWORD",
+    "TK_TOOLCHAIN_SCRIPT_NAME",
+    "TK_TOOLCHAIN_SCRIPT_KEY",
+)
+
+# Number of seconds a session token is reused for, unless overridden by
+# TK_TOOLCHAIN_SESSION_CACHE_TTL. 0 disables the on disk cache, which is
+# opt-in.
+_DEFAULT_SESSION_CACHE_TTL = 0
+
+# Users and connections created by this process, keyed on the environment.
+_users = {}
+_connections = {}
+_lock = threading.Lock()
+
+
+def _get_cache_key(environment):
+    """
+    Build the key identifying the credentials found in the environment.
+
+    The values are hashed so that secrets are not kept around in clear.
+
+    :param environment: Dictionary of environment variables.
+
+    :returns: The key, as a string.
+    """
+    values = "\0".join(environment.get(name) or "" for name in _ENVIRONMENT_VARIABLES)
+    return hashlib.sha256(values.encode("utf-8")).hexdigest()
+
+
+def _get_session_cache_ttl(environment):
+    """
+    Get for how many seconds session tokens are reused.
+
+    :param environment: Dictionary of environment variables.
+
+    :returns: Number of seconds. 0 means session tokens are not stored on disk.
+    """
+    try:
+        return max(
+            int(
+                environment.get(
+                    "TK_TOOLCHAIN_SESSION_CACHE_TTL", _DEFAULT_SESSION_CACHE_TTL
+                )
+            ),
+            0,
+        )
+    except ValueError:
+        return _DEFAULT_SESSION_CACHE_TTL
+
+
+def _get_session_cache_path(environment):
+    """
+    Get where the session token for the credentials found in the environment
+    is stored.
+
+    :param environment: Dictionary of environment variables.
+
+    :returns: Path to the file, or ``None`` if session tokens should not be
+        stored on disk.
+    """
+    if _get_session_cache_ttl(environment) == 0:
+        return None
+    return util.get_cache_location(
+        "sessions", "{0}.json".format(_get_cache_key(environment)[:32])
+    )
+
+
+def _load_session_token(session_cache_path, host, login):
+    """
+    Read a session token that was stored on disk.
+
+    :param str session_cache_path: Path to the file the token is stored in.
+    :param str host: Site the token is for.
+    :param str login: Login of the user the token is for.
+
+    :returns: The session token, or ``None`` if there is none or it expired.
+    """
+    data = util.read_json_file(session_cache_path)
+    if (
+        not isinstance(data, dict)
+        or data.get("host") != host
+        or data.get("login") != login
+        or data.get("expires_at", 0) <= time.time()
+    ):
+        return None
+    return data.get("session_token")
+
+
+def _remove_session_token(session_cache_path):
+    """
+    Forget a session token that was stored on disk.
+
+    :param str session_cache_path: Path to the file the token is stored in.
+    """
+    try:
+        os.remove(session_cache_path)
+    except OSError:
+        pass
+
+
+def _save_session_token(session_cache_path, user, ttl):
+    """
+    Store the session token of a user on disk.
+
+    The file is only readable by the current user. The password is never
+    stored. Failing to store the token is not an error.
+
+    :param str session_cache_path: Path to the file the token is stored in.
+    :param user: The Toolkit user.
+    :param int ttl: Number of seconds the token can be reused for.
+    """
+    try:
+        impl = user.impl
+        data = {
+            "host": impl.get_host(),
+            "login": impl.get_login(),
+            "session_token": impl.get_session_token(),
+            "expires_at": time.time() + ttl,
+        }
+    except AttributeError:
+        # Not a session user.
+        return
+    try:
+        # The temporary file is created with 0600 permissions and renamed.
+        util.write_json_file(session_cache_path, data)
+    except OSError:
+        pass
+
+
+def _get_toolkit_user(sg_auth, environment, session_cache_path=None):
     """
     Retrieves the Toolkit user using the passed in authenticator and
     environment.
+
+    :param sg_auth: The authenticator.
+    :param environment: Dictionary of environment variables.
+    :param str session_cache_path: If set, the session token of a user
+        authenticated with a password is reused from, and stored in, this file.
     """
 
     host = environment.get("TK_TOOLCHAIN_HOST")
@@ -27,7 +171,23 @@ def _get_toolkit_user(sg_auth, environment):
     # If all the variables were set, we can authenticate.
     if host and login and password:
         print("Authenticating from environment variables.")
-        return sg_auth.create_session_user(login, password=password, host=host)
+        if session_cache_path:
+            session_token = _load_session_token(session_cache_path, host, login)
+            if session_token:
+                user = sg_auth.create_session_user(
+                    login, session_token=session_token, host=host
+                )
+                # The site may have expired the token before we did, in which
+                # case we forget it and authenticate with the password.
+                if not user.are_credentials_expired():
+                    return user
+                _remove_session_token(session_cache_path)
+        user = sg_auth.create_session_user(login, password=password, host=host)
+        if session_cache_path:
+            _save_session_token(
+                session_cache_path, user, _get_session_cache_ttl(environment)
+            )
+        return user
     if host and script_name and script_key:
         print("Authenticating from environment variables.")
         return sg_auth.create_script_user(script_name, script_key, host=host)
@@ -54,6 +214,18 @@ def _get_toolkit_user(sg_auth, environment):
     return sg_auth.get_user()
 
 
+def _create_authenticator():
+    """
+    Create the authenticator used to create users.
+
+    :rtype: sgtk.authentication.ShotgunAuthenticator
+    """
+    # Lazy loading as Toolkit might not be available yet.
+    from sgtk.authentication import ShotgunAuthenticator
+
+    return ShotgunAuthenticator()
+
+
 def get_toolkit_user():
     """
     Authenticate with a Shotgun site.
@@ -67,13 +239,60 @@ def get_toolkit_user():
     User based authentication has precedence over script based
     authentication.
 
+    The user is only authenticated once per process for a given set of
+    ``TK_TOOLCHAIN_*`` values. When authenticating with a password and
+    ``TK_TOOLCHAIN_SESSION_CACHE_TTL`` is set to a number of seconds, the
+    session token is also stored in the tk-toolchain cache folder and reused by
+    other processes for that long, as long as the site accepts it.
+
     :returns: A Shotgun user.
     :rtype: sgtk.authentication.ShotgunUser
     """
+    key = _get_cache_key(os.environ)
+    with _lock:
+        user = _users.get(key)
+        if user is None:
+            user = _get_toolkit_user(
+                _create_authenticator(), os.environ, _get_session_cache_path(os.environ)
+            )
+            _users[key] = user
+    return user
 
-    # Lazy loading as Toolkit might not be available yet.
-    from sgtk.authentication import ShotgunAuthenticator
 
-    sg_auth = ShotgunAuthenticator()
+def get_shotgun_connection():
+    """
+    Get a connection to the Shotgun site for the user returned by
+    :func:`get_toolkit_user`.
+
+    The connection is created once per process for a given set of
+    ``TK_TOOLCHAIN_*`` values. Connections are not thread-safe, so threads
+    should create their own with ``get_toolkit_user().create_sg_connection()``.
+
+    :returns: A Shotgun connection.
+    :rtype: shotgun_api3.Shotgun
+    """
+    user = get_toolkit_user()
+    key = _get_cache_key(os.environ)
+    with _lock:
+        connection = _connections.get(key)
+        if connection is None:
+            connection = user.create_sg_connection()
+            _connections[key] = connection
+    return connection
+
 
-    return _get_toolkit_user(sg_auth, os.environ)
+def clear_cache(session_tokens=False):
+    """
+    Forget the users and connections created so far by this process.
+
+    The next call to :func:`get_toolkit_user` or :func:`get_shotgun_connection`
+    will authenticate again, for example after the credentials were revoked.
+
+    :param bool session_tokens: If ``True``, the session tokens stored on disk
+        are removed as well.
+    """
+    with _lock:
+        _users.clear()
+        _connections.clear()
+        if session_tokens:
+            shutil.rmtree(util.get_cache_location("sessions"), ignore_errors=True)
@@ -14,13 +14,14 @@ Toolkit Build Qt resources
 Compile Qt interface and resource files with a specified PySide compiler.
 
 Usage:
-    tk-build-qt-resources [-y <yamlfile>] (-p <pyenv> | [-u <uic>] [-r <rcc>])
+    tk-build-qt-resources [-y <yamlfile>] (-p <pyenv> | [-u <uic>] [-r <rcc>]) [-f]
 
 Options:
     -y --yamlfile   The path to the YAML file with commands.
     -p --pyenv      The Python environment path.
     -u --uic        The PySide uic compiler.
     -r --rcc        The PySide rcc compiler.
+    -f --force      Build every file, even the ones that are up to date.
 
 Examples:
     tk-build-qt-resources
@@ -33,13 +34,24 @@ Examples:
 """
 
 import argparse
+import hashlib
+import json
 import os
 import re
 import subprocess
 import sys
+from xml.etree import ElementTree
 
 from ruamel.yaml import YAML
 
+from tk_toolchain import util
+
+# File recording how the outputs were built, next to the YAML file.
+BUILD_CACHE_FILE_NAME = ".tk-qt-build-cache.json"
+
+# Bump this whenever build_qt changes the content of the files it writes.
+BUILD_CACHE_VERSION = 1
+
 
 def process_import_line(module, import_text):
     return (
@@ -98,6 +110,87 @@ def build_res(
     }
 
 
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_qrc_assets(qrc_path):
+    """
+    List the files referenced by a .qrc file.
+    """
+    qrc_dir = os.path.dirname(qrc_path)
+    return sorted(
+        os.path.normpath(os.path.join(qrc_dir, node.text.strip()))
+        for node in ElementTree.parse(qrc_path).getroot().iter("file")
+        if node.text and node.text.strip()
+    )
+
+
+def get_build_key(build_qt_params, input_path, compiler_version):
+    """
+    Hash everything the output of a build depends on: the command, the
+    compiler version, the import pattern and the content of the input file,
+    along with the assets it references when it is a .qrc file.
+    """
+    inputs = [input_path]
+    if input_path.endswith(".qrc"):
+        inputs += get_qrc_assets(input_path)
+    key = {
+        "version": BUILD_CACHE_VERSION,
+        "compiler": build_qt_params["compiler"],
+        "compiler_version": compiler_version,
+        "import_text": build_qt_params["import_text"],
+        "inputs": {
+            path: hash_file(path) if os.path.isfile(path) else None for path in inputs
+        },
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class BuildCache:
+    """
+    Records the key of the build of each output, along with the hash of the
+    output, so an output is only built again when its inputs changed or when
+    it was modified or removed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._root = os.path.dirname(path)
+        data = util.read_json_file(path)
+        if isinstance(data, dict) and data.get("version") == BUILD_CACHE_VERSION:
+            self._outputs = data.get("outputs", {})
+        else:
+            self._outputs = {}
+
+    def _get_name(self, output_path):
+        return os.path.relpath(output_path, self._root).replace(os.path.sep, "/")
+
+    def is_up_to_date(self, output_path, key):
+        entry = self._outputs.get(self._get_name(output_path))
+        return (
+            entry is not None
+            and entry["key"] == key
+            and os.path.isfile(output_path)
+            and hash_file(output_path) == entry["output"]
+        )
+
+    def record(self, output_path, key):
+        self._outputs[self._get_name(output_path)] = {
+            "key": key,
+            "output": hash_file(output_path),
+        }
+
+    def save(self):
+        util.write_json_file(
+            self.path, {"version": BUILD_CACHE_VERSION, "outputs": self._outputs}
+        )
+
+
 def build_absolute_path(path_or_file):
     dir = os.getcwd()
     combined_path = os.path.normpath(os.path.join(dir, path_or_file))
@@ -105,10 +198,35 @@ def build_absolute_path(path_or_file):
     return combined_path
 
 
-def run_yaml_commands(yaml_file, uic, rcc):
+def build_qt_cached(build_qt_params, input_path, compiler_version, cache, force):
+    output_path = os.path.join(
+        build_qt_params["py_built_path"], f"{build_qt_params['py_filename']}.py"
+    )
+    key = get_build_key(build_qt_params, input_path, compiler_version)
+    if not force and cache.is_up_to_date(output_path, key):
+        print(f"Up to date: {output_path}")
+        return False
+    build_qt(**build_qt_params)
+    cache.record(output_path, key)
+    return True
+
+
+def run_yaml_commands(yaml_file, uic, rcc, versions=None, force=False):
     yaml = YAML()
-    yaml_commands = yaml.load(open(build_absolute_path(yaml_file)))
+    yaml_path = build_absolute_path(yaml_file)
+    yaml_commands = yaml.load(open(yaml_path))
+    versions = versions or {}
+    cache = BuildCache(os.path.join(os.path.dirname(yaml_path), BUILD_CACHE_FILE_NAME))
+    try:
+        _run_commands(yaml_commands, uic, rcc, versions, cache, force)
+    finally:
+        # Keep track of what was built, even if a later build failed.
+        cache.save()
 
+    return 1
+
+
+def _run_commands(yaml_commands, uic, rcc, versions, cache, force):
     for command_set in yaml_commands:
         ui_src = command_set.get("ui_src")
         if not ui_src:
@@ -134,7 +252,13 @@ def run_yaml_commands(yaml_file, uic, rcc):
                 ),
             }
             build_qt_params = build_ui(**build_params_ui_files)
-            build_qt(**build_qt_params)
+            build_qt_cached(
+                build_qt_params,
+                f"{build_params['qt_ui_path']}/{ui_file}.ui",
+                versions.get(uic),
+                cache,
+                force,
+            )
 
         print("Building resources...")
         for index, res_file in enumerate(command_set.get("res_files", [])):
@@ -149,9 +273,13 @@ def run_yaml_commands(yaml_file, uic, rcc):
                 ),
             }
             build_qt_params = build_res(**build_params_res_files)
-            build_qt(**build_qt_params)
-
-    return 1
+            build_qt_cached(
+                build_qt_params,
+                f"{build_params['qt_ui_path']}/{res_file}.qrc",
+                versions.get(rcc),
+                cache,
+                force,
+            )
 
 
 def main():
@@ -170,6 +298,12 @@ def main():
         default="build_resources.yml",
         help="The path to the YAML file with commands",
     )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Build every file, even the ones that are up to date",
+    )
     args = parser.parse_args()
 
     if (not args.uic and not args.rcc) and args.pyenv:
@@ -185,10 +319,12 @@ def main():
             print("or Python env must be specified with the -p parameter")
         return 1
 
+    versions = {}
     for compiler in [args.uic, args.rcc]:
         version = verify_compiler(compiler)
         if not version:
             return 1
         print(f"Using PySide compiler version: {version}")
+        versions[compiler] = version
 
-    run_yaml_commands(args.yamlfile, args.uic, args.rcc)
+    run_yaml_commands(args.yamlfile, args.uic, args.rcc, versions, args.force)
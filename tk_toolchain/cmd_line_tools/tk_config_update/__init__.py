@@ -12,14 +12,49 @@
 
 import argparse
 import atexit
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
 import os
+import re
 import shutil
-import subprocess
 import tempfile
 import textwrap
+import time
 
 from ruamel import yaml
 
+from tk_toolchain import util
+
+from .git import GitError, _run_git
+from .mirrors import DEFAULT_MAX_AGE, MirrorCache
+
+# Files larger than this are memory-mapped instead of read when looking for a
+# bundle name.
+_MMAP_THRESHOLD = 1024 * 1024
+
+# Below this number of files, parsing them in other processes costs more than
+# it saves.
+_PARALLEL_THRESHOLD = 32
+
+# Versions that can be parsed.
+_VERSION_REGEX = re.compile(r"^v(\d+)\.(\d+)\.(\d+)$")
+
+# Versions matching this can be written as plain scalars.
+_PLAIN_SCALAR_REGEX = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.+-]*$")
+
+# Bump this whenever the layout of the --dry-run --format json report changes.
+DRY_RUN_SCHEMA_VERSION = 1
+
+# Maximum number of configs updated at once. Each of them may also use a few
+# processes to update its files.
+_MAX_CONCURRENT_CONFIGS = 4
+
 
 # FIXME: Maybe we should rename the other repository class (tk_toolchain.repo.Repository)
 # to Bundle?
@@ -29,13 +64,20 @@ class Repository(object):
     """
 
     @classmethod
-    def clone(cls, remote):
+    def clone(cls, remote, mirrors=None):
         """
         Clone a repository from a remote.
+
+        :param str remote: URL of the remote.
+        :param MirrorCache mirrors: If set, the repository is cloned from its
+            mirror, which only fetches what changed since the last clone.
         """
         root = tempfile.mkdtemp()
         atexit.register(lambda: shutil.rmtree(root))
-        subprocess.check_call(["git", "clone", remote, root, "--depth", "1"])
+        if mirrors is not None:
+            mirrors.clone(remote, root)
+        else:
+            _run_git(["clone", "--quiet", remote, root, "--depth", "1"])
         return Repository(root)
 
     def __init__(self, root):
@@ -43,6 +85,9 @@ class Repository(object):
         :param str root: Root of the repository.
         """
         self._root = root
+        # Disable the pager, we don't want git calls to be blocking.
+        self._environ = os.environ.copy()
+        self._environ["PAGER"] = ""
 
     @property
     def root(self):
@@ -59,39 +104,122 @@ class Repository(object):
         """
         self._git("add", location)
 
+    def add_files(self, paths):
+        """
+        Add files to the index with a single git command.
+
+        :param list paths: Paths to the files.
+        """
+        if not paths:
+            return
+        self._git(
+            "add",
+            "--pathspec-from-file=-",
+            "--pathspec-file-nul",
+            input="".join(self._get_relative_path(path) + "\0" for path in paths),
+        )
+
+    def stage_files(self, paths):
+        """
+        Add files to the index with git plumbing commands.
+
+        The content of the files is written to the object database and their
+        entries in the index are replaced directly, which skips the index
+        refresh :meth:`add_files` does. Two git commands are run, regardless of
+        the number of files.
+
+        :param list paths: Paths to the files. They must not be symbolic links.
+        """
+        if not paths:
+            return
+        relative_paths = [self._get_relative_path(path) for path in paths]
+        hashes = self._git_output(
+            "hash-object",
+            "-w",
+            "--stdin-paths",
+            input="".join(path + "\n" for path in relative_paths),
+        ).split()
+        entries = []
+        for path, relative_path, object_hash in zip(paths, relative_paths, hashes):
+            mode = "100755" if os.access(path, os.X_OK) else "100644"
+            entries.append("{0} {1}\t{2}\0".format(mode, object_hash, relative_path))
+        self._git("update-index", "-z", "--index-info", input="".join(entries))
+
     def commit(self, msg):
         """
         Commit the index.
 
         :param str msg: Message for the commit.
+
+        :returns: What git printed.
+        """
+        return self._git("commit", "-m", "{0}".format(msg))
+
+    def commit_tree(self, msg):
         """
-        self._git("commit", "-m", "{0}".format(msg))
+        Commit the index with git plumbing commands.
+
+        Unlike :meth:`commit`, the hooks of the repository are not run. Three
+        git commands are run.
+
+        :param str msg: Message for the commit.
+        """
+        tree = self._git_output("write-tree").strip()
+        commit = self._git_output("commit-tree", tree, "-p", "HEAD", input=msg).strip()
+        self._git("update-ref", "-m", "commit: " + msg.splitlines()[0], "HEAD", commit)
 
     def push(self):
         """
         Push the repository back to the remote.
+
+        :returns: What git printed.
         """
-        self._git("push", "origin", "master")
+        return self._git("push", "origin", "master")
 
     def diff(self):
         """
         Diff with the head.
         """
-        self._git("diff", "HEAD")
+        print(self.get_diff())
+
+    def get_diff(self):
+        """
+        Diff with the head.
+
+        :returns: The diff, as text.
+        """
+        return self._git_output("diff", "HEAD")
+
+    def _get_relative_path(self, path):
+        """
+        Get the path of a file relative to the root, with ``/`` separators.
+        """
+        return os.path.relpath(path, self._root).replace(os.path.sep, "/")
+
+    def _git_output(self, *args, input=None):
+        """
+        Run a git command and return its output.
 
-    def _git(self, *args):
+        :param args: List of arguments for the git command.
+        :param str input: Text sent to the command.
+        """
+        return _run_git(
+            args, self._root, self._environ, input=input, merge_output=False
+        )
+
+    def _git(self, *args, input=None):
         """
         Run a git command.
 
         :param args: List of arguments for the git command.
+        :param str input: Text sent to the command.
+
+        :returns: What git printed, on its standard output and error.
 
         If invoking the method as _git("push", "origin", "master"), then the
-        result would be subprocess.check_call(["git", "push", "origin", "master"])
+        result would be the output of ``git push origin master``.
         """
-        # Disable the pager, we don't want this call to be blocking.
-        environ = os.environ.copy()
-        environ["PAGER"] = ""
-        subprocess.check_call(["git"] + list(args), cwd=self._root, env=environ)
+        return _run_git(args, self._root, self._environ, input=input)
 
 
 def enumerate_yaml_files(root):
@@ -100,10 +228,11 @@ def enumerate_yaml_files(root):
 
     :param str root: Path to the repository/
 
-    :returns: Iterator on all files ending with .yml.
+    :returns: Iterator on all files ending with .yml, in a stable order.
     """
-    for dirpath, _, filenames in os.walk(root):
-        for filename in filenames:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
             filepath = os.path.join(dirpath, filename)
             if filepath.endswith(".yml"):
                 yield filepath
@@ -124,6 +253,52 @@ def is_app_store_descriptor(data):
     )
 
 
+Version = collections.namedtuple("Version", ["major", "minor", "patch"])
+
+
+@functools.lru_cache(maxsize=None)
+def parse_version(version):
+    """
+    Parse a version like ``v1.2.3``.
+
+    Results are cached, since the same versions are found over and over in a
+    config.
+
+    :param str version: Version to parse.
+
+    :returns: A :class:`Version`, which compares by major, minor and patch
+        numbers, or ``None`` if the version doesn't follow the
+        ``vMAJOR.MINOR.PATCH`` format.
+    """
+    match = _VERSION_REGEX.match(version)
+    if match is None:
+        return None
+    return Version(*(int(number) for number in match.groups()))
+
+
+def _get_major(version):
+    """
+    Get the major version of a version, like ``v2`` for ``v2.3.4``.
+
+    The major version is always text, so versions that can be parsed compare
+    with the ones that can't, like ``v2.3``.
+    """
+    parsed = parse_version(version)
+    if parsed is None:
+        return version.split(".", 1)[0]
+    return "v{0}".format(parsed.major)
+
+
+def _is_newer(version, other):
+    """
+    Check if a version is newer than another. Versions that can't be parsed
+    are never newer.
+    """
+    parsed = parse_version(version)
+    parsed_other = parse_version(other)
+    return parsed is not None and parsed_other is not None and parsed > parsed_other
+
+
 def is_descriptor_matching(data, bundle, version):
     """
     Check if the descriptor that is passed in matches the bundle name
@@ -142,14 +317,76 @@ def is_descriptor_matching(data, bundle, version):
     # To do this, we'll make sure that the major version of the descriptor
     # is the same as the new version's.
     if bundle.startswith("tk-framework"):
-        major_released, _ = data["version"].split(".", 1)
-        major_update, _ = version.split(".", 1)
-        if major_released != major_update:
+        if _get_major(data["version"]) != _get_major(version):
             return False
 
     return True
 
 
+def get_updates(pairs):
+    """
+    Group new versions by bundle.
+
+    :param list pairs: List of (bundle, version) tuples.
+
+    :returns: Dictionary of the list of new versions of each bundle.
+
+    :raises ValueError: If a bundle that is not a framework has multiple
+        versions, or if a framework has multiple versions for the same major
+        version.
+    """
+    updates = {}
+    for bundle, version in pairs:
+        versions = updates.setdefault(bundle, [])
+        if version in versions:
+            continue
+        if versions and not bundle.startswith("tk-framework"):
+            raise ValueError(
+                "{0} can't be updated to both {1} and {2}.".format(
+                    bundle, versions[0], version
+                )
+            )
+        major = _get_major(version)
+        for other in versions:
+            if _get_major(other) == major:
+                raise ValueError(
+                    "{0} can't be updated to both {1} and {2}.".format(
+                        bundle, other, version
+                    )
+                )
+        versions.append(version)
+    return updates
+
+
+def update_descriptors(data, updates):
+    """
+    Recursively visit a dictionary looking for descriptors and updates the ones
+    of the given bundles.
+
+    :param dict-like data: Data to visit.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+
+    :returns: List of the (bundle, version) tuples that were applied.
+    """
+    if not isinstance(data, yaml.comments.CommentedMap):
+        return []
+
+    if is_app_store_descriptor(data):
+        bundle = data["name"]
+        for version in updates.get(bundle, []):
+            # If we've found the bundle and we have a new version
+            if is_descriptor_matching(data, bundle, version):
+                data["version"] = version
+                return [(bundle, version)]
+        return []
+
+    applied = []
+    for value in data.values():
+        applied.extend(update_descriptors(value, updates))
+    return applied
+
+
 def update_yaml_data(data, bundle, version):
     """
     Recursively visit a dictionary looking for a descriptor and updates them
@@ -159,25 +396,598 @@ def update_yaml_data(data, bundle, version):
     :param str bundle: Name of the bundle to search for.
     :param str version: New version of the bundle.
     """
+    return bool(update_descriptors(data, {bundle: [version]}))
+
+
+def file_mentions(path, names):
+    """
+    Check if a file contains any of the given names.
+
+    The raw bytes of the file are searched, which is much faster than parsing
+    it. Large files are memory-mapped.
+
+    :param str path: Path to the file.
+    :param list names: Names to look for.
+
+    :returns: True if one of the names is found, False otherwise.
+    """
+    needles = [name.encode("utf-8") for name in names]
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            return False
+        if size < _MMAP_THRESHOLD:
+            data = fh.read()
+            return any(needle in data for needle in needles)
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return any(data.find(needle) != -1 for needle in needles)
+
+
+def _get_mp_context():
+    """
+    Get how the processes used to parse and update files are started.
+
+    Configs are updated from multiple threads, and forking a process while
+    other threads hold locks can deadlock it, so processes are never forked
+    from this one. They are forked from a server process where available,
+    and spawned otherwise.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _map_files(fn, files, jobs=None):
+    """
+    Call a function on files, in parallel processes when there are many.
+
+    :param callable fn: Function to call with each file. It must be picklable.
+    :param list files: Paths to the files.
+    :param int jobs: Maximum number of processes to use. Defaults to the
+        number of processors. 1 disables the parallel processing.
+
+    :returns: Iterator on the results, in the order of the files.
+    """
+    if jobs == 1 or len(files) < _PARALLEL_THRESHOLD:
+        for path in files:
+            yield fn(path)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    # Send the files in a few chunks per process to limit the overhead.
+    chunksize = max(1, len(files) // (4 * jobs))
+    with concurrent.futures.ProcessPoolExecutor(
+        jobs, mp_context=_get_mp_context()
+    ) as executor:
+        # map returns the results in the order of the files.
+        for result in executor.map(fn, files, chunksize=chunksize):
+            yield result
+
+
+def _get_content_hash(path):
+    """
+    Hash the content of a file.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _walk_descriptors(data, path):
+    """
+    Recursively visit a dictionary looking for descriptors.
+
+    :returns: Generator of dictionaries describing the descriptors.
+    """
     if not isinstance(data, yaml.comments.CommentedMap):
+        return
+
+    if is_app_store_descriptor(data):
+        line, column = data.lc.value("version")
+        yield {
+            "bundle": data["name"],
+            "version": str(data["version"]),
+            "path": path,
+            "line": line,
+            "column": column,
+        }
+        return
+
+    for key, value in data.items():
+        # The path is stored in the cache of the index, so keys JSON can't
+        # represent, like dates, are stored as text. See _get_child.
+        if not isinstance(key, (str, int, float, bool, type(None))):
+            key = str(key)
+        for descriptor in _walk_descriptors(value, path + [key]):
+            yield descriptor
+
+
+def _get_child(data, key):
+    """
+    Get a value of a dictionary from a key of a descriptor's path.
+
+    :param dict data: The dictionary.
+    :param key: Key as found in the path, which may be the text of the
+        original key, see :func:`_walk_descriptors`.
+
+    :raises KeyError: If there is no such key.
+    """
+    try:
+        return data[key]
+    except (KeyError, TypeError):
+        pass
+    for other_key, value in data.items():
+        if type(other_key) is not type(key) and str(other_key) == str(key):
+            return value
+    raise KeyError(key)
+
+
+def get_file_descriptors(yml_file):
+    """
+    Find the descriptors of a file.
+
+    :param str yml_file: Path to the file.
+
+    :returns: List of dictionaries with the ``bundle``, ``version``, ``path``,
+        ``line`` and ``column`` of each descriptor. The path is the list of keys
+        leading to the descriptor, and the line and column, which start at 0,
+        are the position of the version.
+    """
+    with open(yml_file, "r") as fh:
+        _yaml = yaml.YAML()
+        yaml_data = _yaml.load(fh)
+    return list(_walk_descriptors(yaml_data, []))
+
+
+def _version_matches(version, pattern):
+    """
+    Check if a version matches a pattern like ``v2.x`` or ``v2.3.x``.
+
+    Components of the pattern set to ``x`` or ``*`` match anything, and the
+    components missing from the pattern match anything too.
+    """
+    parts = version.split(".")
+    pattern_parts = pattern.split(".")
+    if len(pattern_parts) > len(parts):
         return False
+    return all(
+        expected in ("x", "*") or expected == part
+        for part, expected in zip(parts, pattern_parts)
+    )
 
-    file_updated = False
 
-    if is_app_store_descriptor(data):
-        # If we've found the bundle and we have a new version
-        if is_descriptor_matching(data, bundle, version):
-            data["version"] = version
-            file_updated = True
+class Descriptor(object):
+    """
+    An ``app_store`` descriptor found in a config.
+    """
+
+    def __init__(self, file, bundle, version, path, line, column):
+        """
+        :param str file: Path to the file, relative to the config, with ``/``
+            separators.
+        :param str bundle: Name of the bundle.
+        :param str version: Version of the bundle.
+        :param list path: Keys leading to the descriptor in the file.
+        :param int line: Line of the version in the file, starting at 0.
+        :param int column: Column of the version in the file, starting at 0.
+        """
+        self.file = file
+        self.bundle = bundle
+        self.version = version
+        self.path = path
+        self.line = line
+        self.column = column
+
+    def __repr__(self):
+        return "<Descriptor {0} {1} at {2}:{3}>".format(
+            self.bundle, self.version, self.file, self.line + 1
+        )
+
+
+class DescriptorIndex(object):
+    """
+    Every ``app_store`` descriptor of a config.
+
+    The descriptors of each file are cached by the hash of its content, so
+    only the files that changed since the index was last built are parsed.
+    Cache entries that were not used recently are removed by
+    :meth:`prune_cache`.
+    """
+
+    # Bump this whenever the content of the cache changes.
+    _CACHE_VERSION = 1
+
+    def __init__(self, root, descriptors):
+        """
+        :param str root: Root of the config.
+        :param list descriptors: The :class:`Descriptor` of the config.
+        """
+        self.root = root
+        self.descriptors = descriptors
+
+    @classmethod
+    def build(cls, root, cache=None, jobs=None, bundles=None):
+        """
+        Index a config.
+
+        :param str root: Root of the config.
+        :param str cache: Folder caching the descriptors of the files. If not
+            set, every file is parsed.
+        :param int jobs: Maximum number of processes used to parse the files.
+        :param list bundles: If set, only the files mentioning one of these
+            bundles are indexed. The index can then only be used to find or
+            update these bundles.
+
+        :rtype: DescriptorIndex
+        """
+        entries = {}
+        missing = []
+        for yml_file in enumerate_yaml_files(root):
+            # Files without a descriptor don't need to be parsed or hashed.
+            if not file_mentions(yml_file, ["app_store"]):
+                continue
+            if bundles is not None and not file_mentions(yml_file, bundles):
+                continue
+            content_hash = _get_content_hash(yml_file)
+            cached = None
+            if cache:
+                cache_path = cls._get_cache_path(cache, content_hash)
+                cached = util.read_json_file(cache_path)
+            if cached and cached.get("version") == cls._CACHE_VERSION:
+                entries[yml_file] = cached["descriptors"]
+                # Record that the entry is still in use, so it isn't pruned.
+                try:
+                    os.utime(cache_path, None)
+                except OSError:
+                    pass
+            else:
+                entries[yml_file] = None
+                missing.append((yml_file, content_hash))
+
+        results = _map_files(
+            get_file_descriptors, [yml_file for yml_file, _ in missing], jobs
+        )
+        for (yml_file, content_hash), file_descriptors in zip(missing, results):
+            entries[yml_file] = file_descriptors
+            if cache:
+                util.write_json_file(
+                    cls._get_cache_path(cache, content_hash),
+                    {"version": cls._CACHE_VERSION, "descriptors": file_descriptors},
+                )
+
+        descriptors = []
+        for yml_file, file_descriptors in entries.items():
+            relative_path = os.path.relpath(yml_file, root).replace(os.path.sep, "/")
+            for descriptor in file_descriptors:
+                descriptors.append(Descriptor(relative_path, **descriptor))
+        return cls(root, descriptors)
+
+    @staticmethod
+    def _get_cache_path(cache, content_hash):
+        return os.path.join(cache, content_hash[:2], content_hash + ".json")
+
+    @staticmethod
+    def prune_cache(cache, max_age=DEFAULT_MAX_AGE):
+        """
+        Remove the cached descriptors of files that were not indexed recently.
+
+        The cache is shared by every config and keyed by the content of the
+        files, so the entries of files that were modified or removed are only
+        found by their age.
+
+        :param str cache: Folder caching the descriptors of the files.
+        :param float max_age: Number of days after which an unused entry is
+            removed.
+
+        :returns: Paths of the removed entries.
+        """
+        if not os.path.isdir(cache):
+            return []
+
+        deadline = time.time() - max_age * 24 * 60 * 60
+        removed = []
+        for name in sorted(os.listdir(cache)):
+            folder = os.path.join(cache, name)
+            if not os.path.isdir(folder):
+                continue
+            for file_name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, file_name)
+                try:
+                    if os.path.getmtime(path) < deadline:
+                        os.remove(path)
+                        removed.append(path)
+                except OSError:
+                    # Another process removed or is writing it.
+                    pass
+            try:
+                os.rmdir(folder)
+            except OSError:
+                # The folder still has entries.
+                pass
+        return removed
+
+    def get_path(self, descriptor):
+        """
+        Get the absolute path to the file of a descriptor.
+
+        :param Descriptor descriptor: A descriptor of the config.
+        """
+        return os.path.join(self.root, *descriptor.file.split("/"))
+
+    def get_bundles(self):
+        """
+        List the bundles used by the config.
+
+        :returns: Dictionary of the number of references to each version of
+            each bundle, sorted by bundle and version.
+        """
+        bundles = {}
+        for descriptor in self.descriptors:
+            versions = bundles.setdefault(descriptor.bundle, {})
+            versions[descriptor.version] = versions.get(descriptor.version, 0) + 1
+        return {
+            bundle: dict(sorted(bundles[bundle].items())) for bundle in sorted(bundles)
+        }
+
+    def find(self, bundle, version=None):
+        """
+        Find where a bundle is referenced.
+
+        :param str bundle: Name of the bundle.
+        :param str version: If set, only the descriptors matching this version
+            or pattern, like ``v2.x``, are returned.
+
+        :returns: List of :class:`Descriptor`, in the order of the files.
+        """
+        return [
+            descriptor
+            for descriptor in self.descriptors
+            if descriptor.bundle == bundle
+            and (version is None or _version_matches(descriptor.version, version))
+        ]
+
+    def get_edits(self, updates, upgrade_only=False):
+        """
+        Find the descriptors affected by updates.
+
+        :param dict updates: New versions of each bundle, as returned by
+            :func:`get_updates`.
+        :param bool upgrade_only: If ``True``, descriptors are only updated to
+            newer versions.
+
+        :returns: Dictionary of the lists of (:class:`Descriptor`, version)
+            tuples to apply to each file, in the order of the files.
+        """
+        edits = {}
+        for descriptor in self.descriptors:
+            data = {"name": descriptor.bundle, "version": descriptor.version}
+            for version in updates.get(descriptor.bundle, []):
+                if not is_descriptor_matching(data, descriptor.bundle, version):
+                    continue
+                if upgrade_only and not _is_newer(version, descriptor.version):
+                    continue
+                edits.setdefault(self.get_path(descriptor), []).append(
+                    (descriptor, version)
+                )
+                break
+        return edits
+
+
+def update_file(yml_file, updates):
+    """
+    Update the descriptors of the given bundles in a file.
+
+    :param str yml_file: Path to the file.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+
+    :returns: List of the (bundle, version) tuples that were applied.
+    """
+    # Load it and preserve the formatting
+    with open(yml_file, "r") as fh:
+        _yaml = yaml.YAML()
+        yaml_data = _yaml.load(fh)
+
+    # If we found no descriptor to update
+    applied = update_descriptors(yaml_data, updates)
+    if not applied:
+        return applied
+
+    _dump_file(yml_file, yaml_data)
+    return applied
+
+
+def _patch_scalar(line, column, old_value, new_value):
+    """
+    Replace a scalar in a line, keeping its quotes.
+
+    :param str line: Line holding the scalar.
+    :param int column: Column where the scalar, or its opening quote, starts.
+    :param str old_value: Expected value of the scalar.
+    :param str new_value: New value of the scalar.
+
+    :returns: The patched line, or ``None`` if the scalar is not at that
+        column or the new value can't be written in the same style.
+    """
+    quote = line[column : column + 1]
+    if quote in ("'", '"'):
+        start = column + 1
+        end = start + len(old_value)
+        if line[start:end] != old_value or line[end : end + 1] != quote:
+            return None
+        if quote in new_value or "\\" in new_value:
+            return None
     else:
-        for value in data.values():
-            if update_yaml_data(value, bundle, version):
-                file_updated = True
+        start = column
+        end = start + len(old_value)
+        if line[start:end] != old_value:
+            return None
+        # The plain scalar must end there.
+        if end < len(line) and line[end] not in " \t\r\n,]}#":
+            return None
+        if not _PLAIN_SCALAR_REGEX.match(new_value):
+            return None
+    return line[:start] + new_value + line[end:]
+
 
-    return file_updated
+def patch_file(yml_file, edits):
+    """
+    Update descriptors of a file by replacing their version where the index
+    found it, leaving the rest of the file untouched.
 
+    :param str yml_file: Path to the file.
+    :param list edits: List of (:class:`Descriptor`, version) tuples, as
+        returned by :meth:`DescriptorIndex.get_edits`.
 
-def update_files(repo_root, bundle, version):
+    :returns: List of the (bundle, version) tuples that were applied, or
+        ``None`` if a version was not where the index found it, in which case
+        the file is not modified.
+    """
+    with open(yml_file, "rb") as fh:
+        content = fh.read()
+    # Split on the same line breaks as the parser.
+    lines = content.splitlines(keepends=True)
+
+    patched = {}
+    # Patch from the end of each line so the columns of the other edits of
+    # the line don't move.
+    for descriptor, version in sorted(
+        edits, key=lambda edit: (edit[0].line, edit[0].column), reverse=True
+    ):
+        if descriptor.line >= len(lines):
+            return None
+        line = patched.get(descriptor.line)
+        if line is None:
+            try:
+                line = lines[descriptor.line].decode("utf-8")
+            except UnicodeDecodeError:
+                return None
+        line = _patch_scalar(line, descriptor.column, descriptor.version, version)
+        if line is None:
+            return None
+        patched[descriptor.line] = line
+
+    for index, line in patched.items():
+        lines[index] = line.encode("utf-8")
+    _write_file(yml_file, b"".join(lines))
+    return [(descriptor.bundle, version) for descriptor, version in edits]
+
+
+def apply_edits(yml_file, edits, surgical=True):
+    """
+    Update descriptors of a file at the locations found by the index.
+
+    :param str yml_file: Path to the file.
+    :param list edits: List of (:class:`Descriptor`, version) tuples, as
+        returned by :meth:`DescriptorIndex.get_edits`.
+    :param bool surgical: If ``True``, only the versions are replaced in the
+        file, see :func:`patch_file`. Otherwise, or if that fails, the file is
+        parsed and written back entirely.
+
+    :returns: List of the (bundle, version) tuples that were applied.
+    """
+    if surgical:
+        applied = patch_file(yml_file, edits)
+        if applied is not None:
+            return applied
+
+    with open(yml_file, "r") as fh:
+        _yaml = yaml.YAML()
+        yaml_data = _yaml.load(fh)
+
+    applied = []
+    for descriptor, version in edits:
+        data = yaml_data
+        for key in descriptor.path:
+            data = _get_child(data, key)
+        data["version"] = version
+        applied.append((descriptor.bundle, version))
+
+    _dump_file(yml_file, yaml_data)
+    return applied
+
+
+def _dump_file(yml_file, yaml_data):
+    """
+    Write back a file, if its content changed.
+    """
+    stream = io.StringIO()
+    _yaml = yaml.YAML()
+    _yaml.default_flow_style = False
+    _yaml.width = 500
+    _yaml.dump(yaml_data, stream)
+    content = stream.getvalue()
+
+    with open(yml_file, "r") as fh:
+        if fh.read() == content:
+            return
+    _write_file(yml_file, content)
+
+
+def _write_file(path, content):
+    """
+    Write a file atomically.
+
+    The content is written to a temporary file next to the file, which is then
+    renamed over it, so the file is never left partially written.
+
+    :param str path: Path to the file.
+    :param content: Bytes or text to write.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "wt") as fh:
+            fh.write(content)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _apply_file_edits(item, surgical=True):
+    return apply_edits(*item, surgical=surgical)
+
+
+def apply_updates(
+    repo_root, updates, jobs=None, index=None, surgical=True, upgrade_only=False
+):
+    """
+    Update the files in the repository that contain a descriptor to one of
+    the given bundles.
+
+    Every bundle is updated in a single pass. Only the descriptors found by
+    the index of the repository are updated. When there are many files to
+    update, they are updated in parallel processes.
+
+    :param str repo_root: Root of the repository to update.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+    :param int jobs: Maximum number of processes to use. Defaults to the
+        number of processors. 1 disables the parallel processing.
+    :param DescriptorIndex index: Index of the repository. Built if not set.
+    :param bool surgical: If ``True``, only the versions are replaced in the
+        files. Otherwise the files are parsed and written back entirely.
+    :param bool upgrade_only: If ``True``, descriptors are only updated to
+        newer versions.
+
+    :returns: Generator of tuples of a modified file and the list of
+        (bundle, version) tuples that were applied to it, in a stable order.
+    """
+    if index is None:
+        index = DescriptorIndex.build(repo_root, jobs=jobs, bundles=list(updates))
+    edits = list(index.get_edits(updates, upgrade_only).items())
+    apply = functools.partial(_apply_file_edits, surgical=surgical)
+    for (yml_file, _), applied in zip(edits, _map_files(apply, edits, jobs)):
+        yield yml_file, applied
+
+
+def update_files(repo_root, bundle, version, jobs=None):
     """
     Update files in the repository that contain a descriptor
     to the given bundle.
@@ -185,25 +995,413 @@ def update_files(repo_root, bundle, version):
     :param str repo_root: Root of the repository to update.
     :param str bundle: Name of the bundle to search for.
     :param str version: Name of the new version.
+    :param int jobs: Maximum number of processes to use. Defaults to the
+        number of processors. 1 disables the parallel processing.
+
+    :returns: Generator of modified files, in a stable order.
+    """
+    for yml_file, _ in apply_updates(repo_root, {bundle: [version]}, jobs):
+        yield yml_file
+
+
+def load_manifest(path):
+    """
+    Read a manifest listing the configs to update and the new versions of
+    the bundles.
+
+    The manifest is a YAML or JSON file like::
+
+        configs:
+        - git@github.com:shotgunsoftware/tk-config-default2.git
+        - git@github.com:shotgunsoftware/tk-config-basic.git
+        bundles:
+          tk-core: v0.19.0
+          tk-framework-shotgunutils: [v5.8.0, v4.4.1]
+
+    :param str path: Path to the manifest.
+
+    :returns: Tuple of the list of configs and the list of (bundle, version)
+        tuples.
+
+    :raises ValueError: If the manifest is invalid.
+    """
+    with open(path, "rt") as fh:
+        data = yaml.YAML(typ="safe").load(fh)
+
+    if not isinstance(data, dict):
+        raise ValueError("{0} is not a valid manifest.".format(path))
+
+    configs = data.get("configs") or []
+    bundles = data.get("bundles") or {}
+    if not isinstance(configs, list) or not isinstance(bundles, dict):
+        raise ValueError("{0} is not a valid manifest.".format(path))
+    if not configs:
+        raise ValueError("{0} must list configs.".format(path))
 
-    :returns: Generator of modified files.
+    pairs = []
+    for bundle, versions in bundles.items():
+        if isinstance(versions, str):
+            versions = [versions]
+        for version in versions:
+            pairs.append((bundle, version))
+    return configs, pairs
+
+
+def load_catalog(path):
     """
-    # For every yml file in the repo
-    for yml_file in enumerate_yaml_files(repo_root):
-        # Load it and preserve the formatting
-        with open(yml_file, "r") as fh:
-            _yaml = yaml.YAML()
-            yaml_data = _yaml.load(fh)
+    Read a catalog of the versions available for each bundle.
+
+    The catalog is a YAML or JSON file like::
+
+        tk-core: [v0.19.0, v0.19.1, v0.20.0]
+        tk-framework-shotgunutils: [v4.4.1, v5.8.0, v5.8.1]
 
-        # If we found a descriptor to update
-        if update_yaml_data(yaml_data, bundle, version):
-            # Write back the changes and update the git index.
-            with open(yml_file, "w") as fh:
-                _yaml = yaml.YAML()
-                _yaml.default_flow_style = False
-                _yaml.width = 500
-                _yaml.dump(yaml_data, fh)
-            yield yml_file
+    :param str path: Path to the catalog.
+
+    :returns: Dictionary of the versions of each bundle, from oldest to newest.
+
+    :raises ValueError: If the catalog is invalid.
+    """
+    with open(path, "rt") as fh:
+        data = yaml.YAML(typ="safe").load(fh)
+
+    if not isinstance(data, dict):
+        raise ValueError("{0} is not a valid catalog.".format(path))
+
+    catalog = {}
+    for bundle, versions in data.items():
+        if isinstance(versions, str):
+            versions = [versions]
+        if not isinstance(versions, list):
+            raise ValueError("{0} is not a valid catalog.".format(path))
+        for version in versions:
+            if parse_version(str(version)) is None:
+                raise ValueError(
+                    "{0} is not a valid version of {1} in {2}.".format(
+                        version, bundle, path
+                    )
+                )
+        catalog[bundle] = sorted(
+            set(str(version) for version in versions), key=parse_version
+        )
+    return catalog
+
+
+def resolve_upgrades(index, catalog):
+    """
+    Find the latest compatible version of every bundle used by a config.
+
+    Frameworks are upgraded to the latest version with the same major version,
+    since a config can use several major versions of a framework side by side.
+    Other bundles are upgraded to their latest version. Descriptors are never
+    downgraded, and the ones whose version can't be parsed are left alone.
+
+    :param DescriptorIndex index: Index of the config.
+    :param dict catalog: Versions of each bundle, as returned by
+        :func:`load_catalog`.
+
+    :returns: New versions of each bundle, like :func:`get_updates`.
+    """
+    pairs = []
+    for descriptor in index.descriptors:
+        current = parse_version(descriptor.version)
+        if current is None:
+            continue
+        is_framework = descriptor.bundle.startswith("tk-framework")
+        latest = None
+        for version in catalog.get(descriptor.bundle, []):
+            parsed = parse_version(version)
+            if parsed > current and (not is_framework or parsed.major == current.major):
+                latest = version
+        if latest is not None:
+            pairs.append((descriptor.bundle, latest))
+    return get_updates(pairs)
+
+
+def get_commit_message(applied):
+    """
+    Build the message of the commit updating bundles.
+
+    :param list applied: List of the (bundle, version) tuples that were applied.
+
+    :returns: The message, with links to the release notes.
+    """
+    release_notes = "https://github.com/shotgunsoftware/{bundle}/releases/tag/{version}"
+    if len(applied) == 1:
+        bundle, version = applied[0]
+        return (
+            "Updated {bundle} to {version}\nRelease notes: " + release_notes
+        ).format(bundle=bundle, version=version)
+
+    lines = ["Updated {0} bundles".format(len(applied)), ""]
+    for bundle, version in applied:
+        lines.append(
+            ("- {bundle} to {version}\n  Release notes: " + release_notes).format(
+                bundle=bundle, version=version
+            )
+        )
+    return "\n".join(lines)
+
+
+def update_config(
+    remote,
+    updates,
+    jobs=None,
+    push_changes=False,
+    mirrors=None,
+    index_cache=None,
+    surgical=True,
+    plumbing=False,
+    catalog=None,
+):
+    """
+    Clone a config, update the given bundles and commit the changes.
+
+    :param str remote: URL of the config.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+    :param int jobs: Maximum number of processes used to update the files.
+    :param bool push_changes: If ``True``, push the commit to the remote.
+    :param MirrorCache mirrors: If set, the config is cloned from its mirror.
+    :param str index_cache: Folder caching the descriptors of the files.
+    :param bool surgical: If ``True``, only the versions are replaced in the
+        files. Otherwise the files are parsed and written back entirely.
+    :param bool plumbing: If ``True``, the changes are staged and committed
+        with git plumbing commands, which skips the hooks of the config.
+    :param dict catalog: If set, the updates are ignored and every bundle is
+        upgraded to its latest compatible version in the catalog, as returned
+        by :func:`load_catalog`.
+
+    :returns: Text describing the changes, so the output of configs updated
+        concurrently isn't interleaved.
+    """
+    repo = Repository.clone(remote, mirrors)
+
+    report = []
+    applied = set()
+    files_updated = []
+
+    # Without a catalog, only the files mentioning the bundles to update are
+    # needed.
+    index = DescriptorIndex.build(
+        repo.root, index_cache, jobs, None if catalog is not None else list(updates)
+    )
+    if catalog is not None:
+        updates = resolve_upgrades(index, catalog)
+    for yml_file, file_applied in apply_updates(
+        repo.root, updates, jobs, index, surgical, catalog is not None
+    ):
+        report.append("Updated '{0}'".format(yml_file))
+        files_updated.append(yml_file)
+        applied.update(file_applied)
+
+    # If the repository was not updated, we're done.
+    if not applied:
+        report.append("No files were updated.")
+        return "\n".join(report)
+
+    # Stage every file at once.
+    if plumbing:
+        repo.stage_files(files_updated)
+    else:
+        repo.add_files(files_updated)
+
+    report.append(repo.get_diff())
+
+    # Commit the repo and link to the release notes in the comments, listing
+    # the bundles in the order they were requested.
+    message = get_commit_message(
+        [
+            (bundle, version)
+            for bundle, versions in updates.items()
+            for version in versions
+            if (bundle, version) in applied
+        ]
+    )
+    if plumbing:
+        repo.commit_tree(message)
+    else:
+        report.append(repo.commit(message).rstrip())
+
+    # This script does not upload changes by default.
+    if push_changes is True:
+        report.append(repo.push().rstrip())
+    else:
+        report.append("Specify --push-changes to update the remote repository.")
+
+    return "\n".join(report)
+
+
+def get_config_root(config, mirrors=None):
+    """
+    Get a local copy of a config.
+
+    :param str config: URL of the config, or path to a local copy of it.
+    :param MirrorCache mirrors: If set, the config is cloned from its mirror.
+
+    :returns: The path to the local copy, or to a clone of the config.
+    """
+    if os.path.isdir(config):
+        return config
+    return Repository.clone(config, mirrors).root
+
+
+def get_changes(index, updates, upgrade_only=False):
+    """
+    List the changes updates would make to a config, without making them.
+
+    :param DescriptorIndex index: Index of the config.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+    :param bool upgrade_only: If ``True``, descriptors are only updated to
+        newer versions.
+
+    :returns: List of dictionaries with the ``file``, ``line``, ``path``,
+        ``bundle``, ``old_version`` and ``new_version`` of each descriptor
+        to update, in the order of the files. Lines start at 1.
+    """
+    changes = []
+    for file_edits in index.get_edits(updates, upgrade_only).values():
+        for descriptor, version in file_edits:
+            changes.append(
+                {
+                    "file": descriptor.file,
+                    "line": descriptor.line + 1,
+                    "path": descriptor.path,
+                    "bundle": descriptor.bundle,
+                    "old_version": descriptor.version,
+                    "new_version": version,
+                }
+            )
+    return changes
+
+
+def preview_config(
+    config, updates, jobs=None, mirrors=None, index_cache=None, catalog=None
+):
+    """
+    List the changes updates would make to a config, without making them.
+
+    :param str config: URL of the config, or path to a local copy of it.
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+    :param int jobs: Maximum number of processes used to parse the files.
+    :param MirrorCache mirrors: If set, the config is cloned from its mirror.
+    :param str index_cache: Folder caching the descriptors of the files.
+    :param dict catalog: If set, the updates are ignored and every bundle is
+        upgraded to its latest compatible version in the catalog, as returned
+        by :func:`load_catalog`.
+
+    :returns: The changes, as returned by :func:`get_changes`.
+    """
+    index = DescriptorIndex.build(
+        get_config_root(config, mirrors),
+        index_cache,
+        jobs,
+        None if catalog is not None else list(updates),
+    )
+    if catalog is None:
+        return get_changes(index, updates)
+    return get_changes(index, resolve_upgrades(index, catalog), True)
+
+
+def _map_configs(fn, configs):
+    """
+    Call a function on configs concurrently.
+
+    :param callable fn: Function to call with each config.
+    :param list configs: The configs.
+
+    :returns: Generator of tuples of the config, the result and the exception
+        raised, if any, in the order of the configs.
+    """
+    with concurrent.futures.ThreadPoolExecutor(
+        min(len(configs), _MAX_CONCURRENT_CONFIGS)
+    ) as executor:
+        futures = [executor.submit(fn, config) for config in configs]
+        for config, future in zip(configs, futures):
+            try:
+                yield config, future.result(), None
+            except Exception as e:
+                yield config, None, e
+
+
+def get_dry_run_report(updates, results):
+    """
+    Build the report of a dry run.
+
+    The layout of the report only changes along with its ``schema_version``.
+
+    :param dict updates: New versions of each bundle, as returned by
+        :func:`get_updates`.
+    :param list results: Tuples of a config, its changes and the exception
+        raised while looking for them, if any.
+
+    :returns: The report, as a dictionary that can be encoded to JSON.
+    """
+    return {
+        "schema_version": DRY_RUN_SCHEMA_VERSION,
+        "updates": [
+            {"bundle": bundle, "version": version}
+            for bundle, versions in updates.items()
+            for version in versions
+        ],
+        "configs": [
+            {
+                "config": config,
+                "error": None if error is None else str(error),
+                "changes": changes or [],
+            }
+            for config, changes, error in results
+        ],
+    }
+
+
+def query_config(
+    config, list_bundles=False, where=None, jobs=None, mirrors=None, index_cache=None
+):
+    """
+    Print the bundles used by a config.
+
+    :param str config: URL of the config, or path to a local copy of it.
+    :param bool list_bundles: If ``True``, list every bundle and version used
+        by the config.
+    :param str where: Bundle to look for, optionally followed by ``@`` and a
+        version or a pattern like ``v2.x``.
+    :param int jobs: Maximum number of processes used to parse the files.
+    :param MirrorCache mirrors: If set, the config is cloned from its mirror.
+    :param str index_cache: Folder caching the descriptors of the files.
+
+    :returns: 0 if the bundle searched for was found, 1 otherwise.
+    """
+    index = DescriptorIndex.build(get_config_root(config, mirrors), index_cache, jobs)
+
+    if list_bundles:
+        for bundle, versions in index.get_bundles().items():
+            for version, count in versions.items():
+                print(
+                    "{0} {1} ({2} reference{3})".format(
+                        bundle, version, count, "s" if count > 1 else ""
+                    )
+                )
+
+    if where:
+        bundle, _, version = where.partition("@")
+        descriptors = index.find(bundle, version or None)
+        for descriptor in descriptors:
+            print(
+                "{0}:{1}: {2} {3}".format(
+                    descriptor.file,
+                    descriptor.line + 1,
+                    ".".join(str(key) for key in descriptor.path),
+                    descriptor.version,
+                )
+            )
+        if not descriptors:
+            print("{0} is not used by this config.".format(where))
+            return 1
+
+    return 0
 
 
 ####################################################################################
@@ -231,19 +1429,37 @@ def main(arguments=None):
 
     parser.add_argument(
         "config",
+        nargs="?",
         help="URL to the TK config git repository to update",
     )
 
     parser.add_argument(
         "bundle",
+        nargs="?",
         help="Name of the TK component",
     )
 
     parser.add_argument(
         "version",
+        nargs="?",
         help="Version of the TK component",
     )
 
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="YAML or JSON file listing the configs to update and the versions "
+        "of the bundles. Replaces the config, bundle and version arguments.",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of processes used to update the files. Defaults to "
+        "the number of processors.",
+    )
+
     parser.add_argument(
         "--push-changes",
         help="""
@@ -254,39 +1470,192 @@ def main(arguments=None):
         default=False,
     )
 
+    parser.add_argument(
+        "--upgrade-all",
+        metavar="CATALOG",
+        default=None,
+        help="YAML or JSON file listing the versions available for each bundle. "
+        "Every bundle of the configs is upgraded to its latest compatible "
+        "version, instead of the bundle and version arguments.",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        help="List the changes that would be made to the configs without "
+        "making them.",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of the --dry-run report. Defaults to text.",
+    )
+
+    parser.add_argument(
+        "--full-rewrite",
+        help="Parse and write back the updated files entirely instead of only "
+        "replacing the versions in them.",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--git-plumbing",
+        help="Stage and commit the changes with git plumbing commands, which "
+        "skips the hooks of the config.",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        help="Clone the configs from their remote instead of updating a local "
+        "mirror of them.",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        help="Number of days after which unused mirrors and indexed files are "
+        "removed from the cache. Defaults to {0}.".format(DEFAULT_MAX_AGE),
+    )
+
+    parser.add_argument(
+        "--list-bundles",
+        help="List the bundles and versions used by the config.",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--where",
+        metavar="BUNDLE[@VERSION]",
+        default=None,
+        help="List where a bundle is used by the config. The version can be a "
+        "pattern like v2.x.",
+    )
+
     args = parser.parse_args(args=arguments)
 
-    repo = Repository.clone(args.config)
+    if args.no_cache:
+        mirrors = None
+        index_cache = None
+    else:
+        mirrors = MirrorCache()
+        mirrors.prune(args.cache_max_age)
+        index_cache = util.get_cache_location("descriptor-index")
+        DescriptorIndex.prune_cache(index_cache, args.cache_max_age)
+
+    if args.list_bundles or args.where:
+        if not args.config or args.bundle or args.manifest:
+            parser.error("--list-bundles and --where only take a config")
+        return query_config(
+            args.config, args.list_bundles, args.where, args.jobs, mirrors, index_cache
+        )
 
-    files_updated = []
+    positionals = [args.config, args.bundle, args.version]
+    catalog = None
+    try:
+        if args.manifest:
+            if any(positionals):
+                parser.error("config, bundle and version can't be used with --manifest")
+            configs, pairs = load_manifest(args.manifest)
+        elif args.upgrade_all and args.config and not args.bundle:
+            configs, pairs = [args.config], []
+        elif all(positionals):
+            configs, pairs = [args.config], [(args.bundle, args.version)]
+        else:
+            parser.error("config, bundle and version are required")
 
-    for yml_file in update_files(repo.root, args.bundle, args.version):
-        print("Updated '{0}'".format(yml_file))
-        repo.add(yml_file)
-        files_updated.append(yml_file)
+        if args.upgrade_all:
+            if pairs:
+                parser.error("--upgrade-all can't be used with bundle versions")
+            catalog = load_catalog(args.upgrade_all)
+        elif not pairs:
+            parser.error("{0} doesn't list any bundle".format(args.manifest))
+        updates = get_updates(pairs)
+    except ValueError as e:
+        parser.error(str(e))
 
-    # If the repository was not updated, we're done.
-    if not files_updated:
-        print("No files were updated.")
+    if args.dry_run:
+        results = _map_configs(
+            functools.partial(
+                preview_config,
+                updates=updates,
+                jobs=args.jobs,
+                mirrors=mirrors,
+                index_cache=index_cache,
+                catalog=catalog,
+            ),
+            configs,
+        )
+        results = list(results)
+        if catalog is not None:
+            # Report the versions the bundles were resolved to.
+            updates = get_updates(
+                (change["bundle"], change["new_version"])
+                for _, changes, _ in results
+                for change in changes or []
+            )
+        report = get_dry_run_report(updates, results)
+        if args.format == "json":
+            print(json.dumps(report, indent=2, default=str))
+        else:
+            for config_report in report["configs"]:
+                if len(configs) > 1:
+                    print("==> {0}".format(config_report["config"]))
+                if config_report["error"] is not None:
+                    print(
+                        "Failed to update {0}: {1}".format(
+                            config_report["config"], config_report["error"]
+                        )
+                    )
+                elif not config_report["changes"]:
+                    print("No files would be updated.")
+                for change in config_report["changes"]:
+                    print(
+                        "{file}:{line}: {bundle} {old_version} -> {new_version}".format(
+                            **change
+                        )
+                    )
+        if any(config_report["error"] for config_report in report["configs"]):
+            return 1
         return 0
 
-    repo.diff()
+    if args.format != "text":
+        parser.error("--format can only be used with --dry-run")
 
-    # Commit the repo and link to the release notes in the comments.
-    repo.commit(
-        (
-            "Updated {bundle} to {version}\n"
-            "Release notes: https://github.com/shotgunsoftware/{bundle}/releases/tag/{version}"
-        ).format(
-            bundle=args.bundle,
-            version=args.version,
-        )
+    update = functools.partial(
+        update_config,
+        updates=updates,
+        jobs=args.jobs,
+        push_changes=args.push_changes,
+        mirrors=mirrors,
+        index_cache=index_cache,
+        surgical=not args.full_rewrite,
+        plumbing=args.git_plumbing,
+        catalog=catalog,
     )
 
-    # This script does not upload changes by default.
-    if args.push_changes is True:
-        repo.push()
-    else:
-        print("Specify --push-changes to update the remote repository.")
+    if len(configs) == 1:
+        print(update(configs[0]))
+        return 0
 
-    return 0
+    # Configs are updated concurrently, but reported in the order they were
+    # listed in.
+    failed = False
+    for config, report, error in _map_configs(update, configs):
+        print("==> {0}".format(config))
+        if error is None:
+            print(report)
+        else:
+            print("Failed to update {0}: {1}".format(config, error))
+            failed = True
+
+    return 1 if failed else 0
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import subprocess
+
+
+class GitError(subprocess.CalledProcessError):
+    """
+    Raised when a git command fails. Unlike its base class, the message
+    includes what git printed, since it is not shown on the terminal.
+    """
+
+    def __str__(self):
+        output = (self.stderr or self.output or "").strip()
+        message = super(GitError, self).__str__()
+        return "{0}\n{1}".format(message, output) if output else message
+
+
+def _run_git(args, cwd=None, env=None, input=None, merge_output=True):
+    """
+    Run a git command, capturing everything it prints.
+
+    Configs are updated concurrently, so git must not write to the terminal
+    or the output of the configs would be interleaved.
+
+    :param list args: Arguments for the git command.
+    :param str cwd: Folder to run the command from.
+    :param dict env: Environment variables of the command.
+    :param str input: Text sent to the command.
+    :param bool merge_output: If ``True``, what git prints on its standard error
+        is returned along with its standard output. Otherwise it is only
+        reported if the command fails.
+
+    :returns: The output of the command.
+
+    :raises GitError: If the command failed.
+    """
+    result = subprocess.run(
+        ["git"] + list(args),
+        cwd=cwd,
+        env=env,
+        input=input,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if merge_output else subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if result.returncode != 0:
+        raise GitError(result.returncode, result.args, result.stdout, result.stderr)
+    return result.stdout
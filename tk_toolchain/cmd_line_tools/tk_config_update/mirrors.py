@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from tk_toolchain import util
+
+from .git import _run_git
+
+# Mirrors not used for this many days are removed.
+DEFAULT_MAX_AGE = 30
+
+# File touched every time a mirror is used.
+_LAST_USED_FILE_NAME = "tk-toolchain-last-used"
+
+
+def _git(*args, cwd=None):
+    """
+    Run a git command quietly.
+
+    :raises GitError: If git failed. Its message includes what git printed.
+    """
+    _run_git(args, cwd=cwd, merge_output=False)
+
+
+class MirrorCache(object):
+    """
+    Bare mirrors of remote repositories, kept between runs.
+
+    The first clone of a remote creates its mirror. Later clones only fetch
+    the new objects into the mirror, and then clone it with ``--shared``, which
+    borrows the objects of the mirror instead of copying them. The clones are
+    pointed back at the remote, so they can push to it.
+    """
+
+    def __init__(self, root=None):
+        """
+        :param str root: Folder holding the mirrors. Defaults to the
+            ``git-mirrors`` folder of the tk-toolchain cache.
+        """
+        self._root = root or util.get_cache_location("git-mirrors")
+        # Mirrors can't be updated by two threads at once.
+        self._locks = collections.defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    @property
+    def root(self):
+        """
+        Folder holding the mirrors.
+        """
+        return self._root
+
+    def get_path(self, remote):
+        """
+        Get the path to the mirror of a remote.
+
+        :param str remote: URL of the remote.
+        """
+        return os.path.join(
+            self._root, hashlib.sha1(remote.encode("utf-8")).hexdigest() + ".git"
+        )
+
+    def update(self, remote):
+        """
+        Create or update the mirror of a remote.
+
+        :param str remote: URL of the remote.
+
+        :returns: Path to the mirror.
+
+        :raises GitError: If git failed.
+        """
+        path = self.get_path(remote)
+        with self._locks_lock:
+            lock = self._locks[path]
+
+        with lock:
+            if os.path.isdir(path):
+                _git("fetch", "--quiet", "--prune", "--tags", "origin", cwd=path)
+            else:
+                os.makedirs(self._root, exist_ok=True)
+                # Mirror into a temporary folder first so an interrupted clone
+                # doesn't leave a broken mirror behind.
+                staging = tempfile.mkdtemp(dir=self._root, suffix=".tmp")
+                try:
+                    _git("clone", "--quiet", "--bare", remote, staging)
+                    # Only the branches and tags are needed, not the other refs
+                    # a mirror would get, like the pull requests.
+                    _git(
+                        "config",
+                        "remote.origin.fetch",
+                        "+refs/heads/*:refs/heads/*",
+                        cwd=staging,
+                    )
+                    os.rename(staging, path)
+                except BaseException:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    if not os.path.isdir(path):
+                        raise
+            self._touch(path)
+        return path
+
+    def clone(self, remote, destination):
+        """
+        Clone a remote through its mirror.
+
+        :param str remote: URL of the remote.
+        :param str destination: Folder to clone into. It must be empty or
+            missing.
+
+        :raises GitError: If git failed.
+        """
+        mirror = self.update(remote)
+        _git("clone", "--quiet", "--shared", mirror, destination)
+        _git("remote", "set-url", "origin", remote, cwd=destination)
+
+    def prune(self, max_age=DEFAULT_MAX_AGE):
+        """
+        Remove the mirrors that were not used recently.
+
+        :param float max_age: Number of days after which an unused mirror is
+            removed.
+
+        :returns: Paths of the removed mirrors.
+        """
+        if not os.path.isdir(self._root):
+            return []
+
+        deadline = time.time() - max_age * 24 * 60 * 60
+        removed = []
+        for name in sorted(os.listdir(self._root)):
+            path = os.path.join(self._root, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(path, _LAST_USED_FILE_NAME))
+            except OSError:
+                last_used = os.path.getmtime(path)
+            if last_used < deadline:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        return removed
+
+    def clear(self):
+        """
+        Remove every mirror.
+        """
+        shutil.rmtree(self._root, ignore_errors=True)
+
+    def _touch(self, path):
+        """
+        Record that a mirror was used.
+        """
+        last_used = os.path.join(path, _LAST_USED_FILE_NAME)
+        with open(last_used, "at"):
+            pass
+        os.utime(last_used, None)
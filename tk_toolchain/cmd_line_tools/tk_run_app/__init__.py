@@ -67,20 +67,20 @@ def _start_engine(repo, entity_type, entity_id, config):
         config if config else get_config_location()
     )
 
+    sg = authentication.get_shotgun_connection()
+
     if entity_type == "Project" and entity_id is None:
-        context = user.create_sg_connection().find_one(
+        context = sg.find_one(
             "Project",
             [["is_template", "is", False]],
             order=[{"direction": "asc", "field_name": "id"}],
         )
     elif entity_id is None:
-        context = user.create_sg_connection().find_one(
+        context = sg.find_one(
             entity_type, [], order=[{"direction": "asc", "field_name": "id"}]
         )
     elif entity_type and entity_id:
-        context = user.create_sg_connection().find_one(
-            entity_type, [["id", "is", entity_id]]
-        )
+        context = sg.find_one(entity_type, [["id", "is", entity_id]])
     else:
         raise RuntimeError(
             "Bad context argument for {0}@{1}".format(entity_type, entity_id)
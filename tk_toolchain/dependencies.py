@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Access to the repositories a repository needs to run its tests.
+
+info.yml is not sufficient, because it doesn't enumerate the dependencies
+needed to run the tests. azure-pipelines.yml, however, lists every repository
+the CI clones before running the tests, so that's what we use.
+
+Parsing YAML is slow, so the list is compiled into a JSON manifest kept in the
+tk-toolchain cache folder, which is only regenerated when azure-pipelines.yml
+changes.
+"""
+
+import concurrent.futures
+import hashlib
+import os
+import subprocess
+
+from tk_toolchain import util
+
+# Name of the file listing the repositories to clone.
+PIPELINE_FILE_NAME = "azure-pipelines.yml"
+
+# Bump this whenever the layout of the manifest changes.
+_MANIFEST_VERSION = 1
+
+# Where repositories are cloned from by default.
+DEFAULT_REMOTE_URL = "git@github.com:shotgunsoftware/{name}.git"
+
+# Environment variable pointing to a folder of local clones or bare
+# repositories used to speed up cloning.
+MIRROR_ENV_VAR = "TK_TOOLCHAIN_REPOSITORY_MIRROR"
+
+
+class MissingDependenciesError(RuntimeError):
+    """
+    Raised when repositories required by another one are not cloned.
+    """
+
+    def __init__(self, repo_name, missing):
+        """
+        :param str repo_name: Name of the repository that has the dependencies.
+        :param list missing: Dictionaries describing the missing repositories.
+        """
+        self.missing = missing
+        names = [repository["name"] for repository in missing]
+        super(MissingDependenciesError, self).__init__(
+            "{0}, which {1} of {2}, should be cloned before the tests are executed:\n"
+            "{3}".format(
+                ", ".join(names),
+                "is a dependency" if len(names) == 1 else "are dependencies",
+                repo_name,
+                "\n".join(
+                    "pushd .. && git clone {0} && popd".format(
+                        DEFAULT_REMOTE_URL.format(name=name)
+                    )
+                    for name in names
+                ),
+            )
+        )
+
+
+class CloneError(RuntimeError):
+    """
+    Raised when repositories could not be cloned.
+    """
+
+
+def parse_pipeline(path):
+    """
+    Read the additional repositories listed in a pipeline file.
+
+    Here's an example of an azure-pipelines.yml file::
+
+        jobs:
+        - template: build-pipeline.yml@templates
+          parameters:
+            additional_repositories:
+            - name: tk-framework-shotgunutils
+            - name: tk-multi-publish2
+              ref: v2.0.0
+
+    :param str path: Path to the pipeline file.
+
+    :returns: List of dictionaries with at least a ``name`` key.
+    """
+    # Lazy loading, so tools that only read the manifest don't pay for it.
+    from ruamel.yaml import YAML
+
+    with open(path, "rt") as fh:
+        pipeline = YAML(typ="safe").load(fh) or {}
+
+    repositories = []
+    # There can be multiple jobs. Look for the ones which have the
+    # additional_repositories parameter. Those enumerate all Toolkit
+    # repositories required for the tests.
+    for job in pipeline.get("jobs") or []:
+        if not isinstance(job, dict):
+            continue
+        parameters = job.get("parameters") or {}
+        for repository in parameters.get("additional_repositories") or []:
+            repositories.append(dict(repository))
+    return repositories
+
+
+def get_manifest_path(repo_root):
+    """
+    Get the path to the compiled manifest of a repository.
+
+    Manifests are kept in the tk-toolchain cache folder, keyed by the path
+    of the repository, so the repository itself is never written to.
+
+    :param str repo_root: Root of the repository.
+
+    :returns: Path to the manifest.
+    """
+    repo_root = os.path.normpath(os.path.abspath(repo_root))
+    return util.get_cache_location(
+        "dependencies",
+        "{0}.json".format(hashlib.sha1(repo_root.encode("utf-8")).hexdigest()[:16]),
+    )
+
+
+def compile_manifest(repo_root):
+    """
+    Parse the pipeline file of a repository and write the compiled manifest.
+
+    :param str repo_root: Root of the repository.
+
+    :returns: List of dictionaries with at least a ``name`` key.
+
+    :raises OSError: If the pipeline file can't be read.
+    """
+    pipeline_path = os.path.join(repo_root, PIPELINE_FILE_NAME)
+    source = _get_source_signature(pipeline_path)
+    repositories = parse_pipeline(pipeline_path)
+    try:
+        util.write_json_file(
+            get_manifest_path(repo_root),
+            {
+                "version": _MANIFEST_VERSION,
+                "source": source,
+                "additional_repositories": repositories,
+            },
+        )
+    except OSError:
+        # The cache folder may be read-only. We'll simply parse the pipeline
+        # again next time.
+        pass
+    return repositories
+
+
+def get_additional_repositories(repo_root):
+    """
+    Get the repositories that need to be cloned next to a repository for
+    its tests to run.
+
+    The compiled manifest is used when it is up to date. Otherwise the
+    pipeline file is parsed and the manifest is regenerated.
+
+    :param str repo_root: Root of the repository.
+
+    :returns: List of dictionaries with at least a ``name`` key. The list is
+        empty if the repository doesn't have a pipeline file.
+    """
+    source = _get_source_signature(os.path.join(repo_root, PIPELINE_FILE_NAME))
+    if source is None:
+        return []
+
+    manifest = util.read_json_file(get_manifest_path(repo_root))
+    if (
+        isinstance(manifest, dict)
+        and manifest.get("version") == _MANIFEST_VERSION
+        and manifest.get("source") == source
+    ):
+        return manifest["additional_repositories"]
+
+    return compile_manifest(repo_root)
+
+
+def _get_source_signature(path):
+    """
+    Get what identifies a version of the pipeline file.
+
+    :param str path: Path to the pipeline file.
+
+    :returns: Dictionary with the modification time and size of the file, or
+        ``None`` if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def find_missing_repositories(repositories, workspace):
+    """
+    Find which repositories are not cloned in a workspace.
+
+    :param list repositories: Dictionaries with at least a ``name`` key.
+    :param workspace: Names of the folders in the workspace, usually a
+        :class:`tk_toolchain.workspace.WorkspaceIndex`.
+
+    :returns: The repositories that are not in the workspace, in the same order.
+    """
+    return [
+        repository for repository in repositories if repository["name"] not in workspace
+    ]
+
+
+def _get_reference(mirror, name):
+    """
+    Find the copy of a repository inside a mirror.
+
+    :param str mirror: Folder of local clones or bare repositories.
+    :param str name: Name of the repository.
+
+    :returns: Path to the copy, or ``None`` if there is none.
+    """
+    if not mirror:
+        return None
+    for candidate in ("{0}.git".format(name), name):
+        path = os.path.join(mirror, candidate)
+        if os.path.isdir(path):
+            return path
+    return None
+
+
+def _clone_repository(repository, repos_root, mirror, remote_url):
+    """
+    Clone a repository.
+
+    :returns: Path to the clone.
+
+    :raises subprocess.CalledProcessError: If git failed.
+    """
+    name = repository["name"]
+    destination = os.path.join(repos_root, name)
+    args = ["git", "clone", "--quiet"]
+    if repository.get("ref"):
+        args += ["--branch", repository["ref"]]
+    reference = _get_reference(mirror, name)
+    if reference:
+        args += ["--reference", reference]
+    args += [remote_url.format(name=name), destination]
+    subprocess.run(
+        args, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    return destination
+
+
+def clone_repositories(
+    repositories,
+    repos_root,
+    mirror=None,
+    remote_url=DEFAULT_REMOTE_URL,
+    max_workers=None,
+):
+    """
+    Clone repositories concurrently.
+
+    When a mirror is given and holds a copy of a repository, the copy is
+    passed to ``git clone --reference`` so that only the objects missing from
+    it are downloaded. Note that the clones then borrow objects from the
+    mirror, which must not be removed.
+
+    :param list repositories: Dictionaries with a ``name`` key and an optional
+        ``ref`` key, as returned by :func:`get_additional_repositories`.
+    :param str repos_root: Folder to clone the repositories into.
+    :param str mirror: Folder of local clones or bare repositories, named after
+        the repositories, optionally with a ``.git`` suffix. Defaults to the
+        value of ``TK_TOOLCHAIN_REPOSITORY_MIRROR``.
+    :param str remote_url: URL to clone from. ``{name}`` is replaced with the
+        name of the repository.
+    :param int max_workers: Maximum number of repositories cloned at once.
+
+    :returns: Paths to the clones.
+
+    :raises CloneError: If any of the repositories could not be cloned. The
+        other repositories are still cloned.
+    """
+    if mirror is None:
+        mirror = os.environ.get(MIRROR_ENV_VAR)
+
+    clones = []
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(
+                _clone_repository, repository, repos_root, mirror, remote_url
+            )
+            for repository in repositories
+        ]
+        for repository, future in zip(repositories, futures):
+            try:
+                clones.append(future.result())
+            except subprocess.CalledProcessError as error:
+                errors.append(
+                    "{0}: {1}".format(repository["name"], (error.stderr or "").strip())
+                )
+
+    if errors:
+        raise CloneError(
+            "The following repositories could not be cloned:\n{0}".format(
+                "\n".join(errors)
+            )
+        )
+    return clones
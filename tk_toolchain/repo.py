@@ -12,6 +12,112 @@
 
 import os
 
+# Folders indicating that a folder is the root of a repository.
+_SOURCE_CONTROL_FOLDERS = (".git", ".svn", ".hg")
+
+# Maps a normalized folder path to a tuple of its modification time and
+# whether it is the root of a repository.
+_ROOT_CACHE = {}
+
+# Maps a normalized repository root to a tuple of its modification time and
+# its RepositoryInfo.
+_INFO_CACHE = {}
+
+
+def _normalize_path(path):
+    """
+    Make a path absolute and remove redundant separators and up-level references.
+
+    :param str path: Path to normalize.
+
+    :returns: The normalized path.
+    """
+    return os.path.normpath(os.path.abspath(path))
+
+
+class RepositoryInfo(object):
+    """
+    Snapshot of the component types found at the root of a repository.
+
+    The root is listed a single time and every component type is derived
+    from that listing, so querying the snapshot never touches the disk.
+    """
+
+    __slots__ = (
+        "root",
+        "is_tk_core",
+        "is_engine",
+        "is_framework",
+        "is_app",
+        "is_config",
+        "is_tk_toolchain",
+        "is_python_api",
+        "is_sg_jira_bridge",
+    )
+
+    def __init__(self, root, entries):
+        """
+        :param str root: Root of the repository.
+        :param entries: Names of the files and folders found under the root.
+        """
+        entries = frozenset(os.path.normcase(entry) for entry in entries)
+
+        self.root = root
+        self.is_tk_core = "_core_upgrader.py" in entries
+        self.is_engine = "engine.py" in entries
+        self.is_framework = "framework.py" in entries
+        self.is_app = "app.py" in entries
+        self.is_config = "core" in entries and "env" in entries
+        self.is_tk_toolchain = "pytest_tank_test" in entries
+        self.is_python_api = "shotgun_api3" in entries
+        self.is_sg_jira_bridge = "sg_jira" in entries
+
+    def __repr__(self):
+        """
+        Representation of this object.
+        """
+        return "<{0}.{1} for {2}>".format(
+            self.__class__.__module__, self.__class__.__name__, self.root
+        )
+
+    @classmethod
+    def scan(cls, root):
+        """
+        Take a snapshot of the repository at the given root.
+
+        Snapshots are cached for the whole process and taken again only when
+        the modification time of the root changes.
+
+        :param str root: Root of the repository.
+
+        :returns: The snapshot for the repository.
+        :rtype: RepositoryInfo
+        """
+        try:
+            mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            return cls(root, [])
+
+        cache_key = os.path.normcase(root)
+        cached = _INFO_CACHE.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            info = cls(root, os.listdir(root))
+        except OSError:
+            info = cls(root, [])
+
+        _INFO_CACHE[cache_key] = (mtime, info)
+        return info
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Forget every snapshot taken in this process.
+        """
+        _INFO_CACHE.clear()
+
 
 class Repository(object):
     """
@@ -23,6 +129,11 @@ class Repository(object):
         """
         Find the root of a repository for a given path inside it.
 
+        Results of the source control checks are cached for the whole process
+        and invalidated when the modification time of a folder changes, so
+        looking up the root a second time only costs one ``os.stat`` per
+        ancestor folder.
+
         :param str path: One of the descendant folders.
 
         :returns: Path to the repository root.
@@ -30,7 +141,7 @@ class Repository(object):
         :raises RuntimeError: If the path is not inside a repository
         """
 
-        child_path = path or os.getcwd()
+        child_path = _normalize_path(path or os.getcwd())
 
         # While we haven't reached the root.
         while not cls._is_repo_root(child_path):
@@ -45,6 +156,57 @@ class Repository(object):
 
         return child_path
 
+    @classmethod
+    def find_roots(cls, paths):
+        """
+        Find the root of the repository for each of the given paths.
+
+        Ancestor folders shared between the paths are only inspected once,
+        which makes this much cheaper than calling :meth:`find_root` for each
+        path when they live in the same tree.
+
+        :param list(str) paths: Paths to resolve.
+
+        :returns: Dictionary mapping each path to the root of its repository,
+            or to ``None`` if the path is not inside a repository.
+        """
+        # Maps the folders visited so far to the root they resolved to.
+        resolved = {}
+        roots = {}
+
+        for path in paths:
+            visited = []
+            child_path = _normalize_path(path)
+            while True:
+                if child_path in resolved:
+                    root = resolved[child_path]
+                    break
+                visited.append(child_path)
+                if cls._is_repo_root(child_path):
+                    root = child_path
+                    break
+                parent_path = os.path.dirname(child_path)
+                if child_path == parent_path:
+                    root = None
+                    break
+                child_path = parent_path
+
+            # Every folder we've gone through shares the same root, so remember
+            # it for the paths that follow.
+            for folder in visited:
+                resolved[folder] = root
+            roots[path] = root
+
+        return roots
+
+    @classmethod
+    def clear_root_cache(cls):
+        """
+        Forget everything that was learned about repository roots in this
+        process.
+        """
+        _ROOT_CACHE.clear()
+
     def __init__(self, path=None):
         """
         :param str path: Path inside a repository.
@@ -52,6 +214,7 @@ class Repository(object):
         :raises RuntimeError: If the path is not inside a repository
         """
         self._root = self.find_root(path)
+        self._info = None
 
     def __repr__(self):
         """
@@ -78,6 +241,23 @@ class Repository(object):
         """
         return self._root
 
+    @property
+    def info(self):
+        """
+        Snapshot of the component types found in this repository.
+
+        :rtype: RepositoryInfo
+        """
+        if self._info is None:
+            self._info = RepositoryInfo.scan(self._root)
+        return self._info
+
+    def refresh(self):
+        """
+        Discard the component snapshot so it is taken again on the next query.
+        """
+        self._info = None
+
     @property
     def parent(self):
         """
@@ -98,7 +278,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for tk-core, ``False`` otherwise.
         """
-        return self._folder_contains("_core_upgrader.py")
+        return self.info.is_tk_core
 
     def is_engine(self):
         """
@@ -106,7 +286,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for an engine, ``False`` otherwise.
         """
-        return self._folder_contains("engine.py")
+        return self.info.is_engine
 
     def is_framework(self):
         """
@@ -114,7 +294,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for a framework, ``False`` otherwise.
         """
-        return self._folder_contains("framework.py")
+        return self.info.is_framework
 
     def is_app(self):
         """
@@ -122,7 +302,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for an application, ``False`` otherwise.
         """
-        return self._folder_contains("app.py")
+        return self.info.is_app
 
     def is_config(self):
         """
@@ -130,7 +310,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for a configuration, ``False`` otherwise.
         """
-        return self._folder_contains("core") and self._folder_contains("env")
+        return self.info.is_config
 
     def is_toolkit_component(self):
         """
@@ -168,7 +348,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for tk-toolchain, ``False`` otherwise.
         """
-        return self._folder_contains("pytest_tank_test")
+        return self.info.is_tk_toolchain
 
     def is_python_api(self):
         """
@@ -176,7 +356,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for the Python API, ``False`` otherwise.
         """
-        return self._folder_contains("shotgun_api3")
+        return self.info.is_python_api
 
     def is_sg_jira_bridge(self):
         """
@@ -184,17 +364,7 @@ class Repository(object):
 
         :returns: ``True`` is the repository is for the Jira Bridge, ``False`` otherwise.
         """
-        return self._folder_contains("sg_jira")
-
-    def _folder_contains(self, filename):
-        """
-        Check if a given file is under the root.
-
-        :param str filename: File to look for.
-
-        :returns: ``True`` is the file was found under the root, ``False`` otherwise.
-        """
-        return os.path.exists(os.path.join(self._root, filename))
+        return self.info.is_sg_jira_bridge
 
     @classmethod
     def _is_repo_root(cls, path):
@@ -204,10 +374,29 @@ class Repository(object):
         A path is considered at the root of a repository if the folder contains
         a .git, .svn or .hg folder.
 
+        The result is cached using the modification time of the folder, which
+        changes whenever an entry is added to or removed from it.
+
         :returns: ``True`` if the folder is the root of a repository, ``False`` otherwise.
         """
-        files = os.listdir(path)
-        for source_control_folder in [".git", ".svn", ".hg"]:
-            if source_control_folder in files:
-                return True
-        return False
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+
+        cache_key = os.path.normcase(path)
+        cached = _ROOT_CACHE.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        is_root = False
+        for source_control_folder in _SOURCE_CONTROL_FOLDERS:
+            try:
+                os.stat(os.path.join(path, source_control_folder))
+            except OSError:
+                continue
+            is_root = True
+            break
+
+        _ROOT_CACHE[cache_key] = (mtime, is_root)
+        return is_root
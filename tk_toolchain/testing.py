@@ -12,7 +12,7 @@
 import os
 
 
-def create_unique_name(name):
+def create_unique_name(name, partitioned=False):
     """
     Create a unique name.
 
@@ -23,13 +23,22 @@ def create_unique_name(name):
     It is the responsibility of the CI environment to set ``SHOTGUN_TEST_ENTITY_SUFFIX`` for this method
     to work. If the environment variable is not set, the name is returned as is.
 
+    When ``partitioned`` is set, the id of the run, ``SHOTGUN_TEST_RUN_ID``, and the id of the
+    ``pytest-xdist`` worker, ``PYTEST_XDIST_WORKER``, are also added when they are set, so that
+    concurrent runs sharing a suffix don't step on each other.
+
     :param str name: Name that needs to be made unique.
+    :param bool partitioned: If ``True``, the run and worker ids are added as well.
 
     :returns: The name with a suffix is one was specified by the environment variable.
     """
-    if "SHOTGUN_TEST_ENTITY_SUFFIX" in os.environ:
-        unique_name = name + " - " + os.environ["SHOTGUN_TEST_ENTITY_SUFFIX"]
-    else:
-        unique_name = name
+    variables = ["SHOTGUN_TEST_ENTITY_SUFFIX"]
+    if partitioned:
+        variables += ["SHOTGUN_TEST_RUN_ID", "PYTEST_XDIST_WORKER"]
+
+    parts = [name]
+    for variable in variables:
+        if os.environ.get(variable):
+            parts.append(os.environ[variable])
 
-    return unique_name
+    return " - ".join(parts)
@@ -9,7 +9,10 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import json
 import os
+import sys
+import tempfile
 
 
 def expand_path(path):
@@ -34,3 +37,76 @@ def merge_into_environment_variables(env):
     """
     for name, value in env.items():
         os.environ.setdefault(name, value)
+
+
+def get_cache_location(*parts):
+    """
+    Build a path inside the tk-toolchain cache folder.
+
+    The cache folder can be overridden with ``TK_TOOLCHAIN_CACHE_DIR``. Otherwise
+    the platform's standard cache folder is used.
+
+    :param parts: Path components to append to the cache folder.
+
+    :returns: Path inside the cache folder. Parent folders are not created.
+    """
+    root = os.environ.get("TK_TOOLCHAIN_CACHE_DIR")
+    if root:
+        root = expand_path(root)
+    elif sys.platform == "win32":
+        root = os.path.join(
+            os.environ.get("LOCALAPPDATA", expand_path("~")), "tk-toolchain", "Cache"
+        )
+    elif sys.platform == "darwin":
+        root = expand_path(os.path.join("~", "Library", "Caches", "tk-toolchain"))
+    else:
+        root = os.path.join(
+            os.environ.get("XDG_CACHE_HOME")
+            or expand_path(os.path.join("~", ".cache")),
+            "tk-toolchain",
+        )
+    return os.path.join(root, *parts)
+
+
+def read_json_file(path):
+    """
+    Read a JSON file.
+
+    :param str path: Path to the file.
+
+    :returns: The decoded content of the file, or ``None`` if the file is
+        missing or could not be decoded.
+    """
+    try:
+        with open(path, "rt") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_file(path, data):
+    """
+    Write a JSON file atomically, creating parent folders as needed.
+
+    The data is written to a temporary file next to the destination, which
+    is then renamed over it, so readers never see a partially written file.
+
+    :param str path: Path to the file.
+    :param data: Data to encode.
+
+    :raises OSError: If the file could not be written.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder or None, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wt") as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import concurrent.futures
+import hashlib
+import os
+import stat
+
+from tk_toolchain import util
+from tk_toolchain.repo import Repository
+
+# Component types recorded for each repository, along with the predicate
+# used to detect them.
+_KINDS = (
+    ("tk_core", Repository.is_tk_core),
+    ("engine", Repository.is_engine),
+    ("framework", Repository.is_framework),
+    ("app", Repository.is_app),
+    ("config", Repository.is_config),
+    ("tk_toolchain", Repository.is_tk_toolchain),
+    ("python_api", Repository.is_python_api),
+    ("sg_jira_bridge", Repository.is_sg_jira_bridge),
+)
+
+
+def _classify(path):
+    """
+    Find out what a folder of the workspace contains.
+
+    :param str path: Path to the folder.
+
+    :returns: Tuple of whether the folder is a repository and the list of
+        component types found in it.
+    """
+    if not Repository._is_repo_root(path):
+        return False, []
+    repo = Repository(path)
+    return True, [kind for kind, predicate in _KINDS if predicate(repo)]
+
+
+def _is_dir(stat_result):
+    """
+    Check if the result of :func:`os.stat` is for a folder.
+    """
+    return stat.S_ISDIR(stat_result.st_mode)
+
+
+class WorkspaceIndex(object):
+    """
+    Index of the folders cloned side by side in a workspace.
+
+    tk-toolchain assumes that all the repositories are cloned in the same
+    folder, which is exposed to the tests as ``SHOTGUN_REPOS_ROOT``. This index
+    classifies the repositories in that folder and keeps the result on disk so
+    that later lookups don't need to touch the repositories.
+
+    Looking up a folder by name only inspects that folder, so the workspace
+    itself is never listed unless the index is iterated over, searched with
+    :meth:`find` or explicitly refreshed. In both cases only the folders whose
+    modification time changed since they were last classified are classified
+    again.
+    """
+
+    # Bump this whenever the layout of the index file changes.
+    _FORMAT_VERSION = 1
+
+    @classmethod
+    def load(cls, root=None, index_path=None, max_workers=None):
+        """
+        Create an index for a workspace and scan every folder of it.
+
+        :param str root: Folder containing the repositories. Defaults to
+            ``SHOTGUN_REPOS_ROOT`` or to the parent of the current repository.
+        :param str index_path: Where the index is persisted. Defaults to a file
+            inside the tk-toolchain cache folder.
+        :param int max_workers: Maximum number of folders classified in parallel.
+
+        :returns: The up to date index.
+        :rtype: WorkspaceIndex
+        """
+        index = cls(root, index_path)
+        index.refresh(max_workers)
+        return index
+
+    def __init__(self, root=None, index_path=None):
+        """
+        :param str root: Folder containing the repositories. Defaults to
+            ``SHOTGUN_REPOS_ROOT`` or to the parent of the current repository.
+        :param str index_path: Where the index is persisted. Defaults to a file
+            inside the tk-toolchain cache folder.
+        """
+        root = root or os.environ.get("SHOTGUN_REPOS_ROOT") or Repository().parent
+        self._root = os.path.normpath(os.path.abspath(root))
+        self._index_path = index_path or util.get_cache_location(
+            "workspaces",
+            "{0}.json".format(
+                hashlib.sha1(self._root.encode("utf-8")).hexdigest()[:16]
+            ),
+        )
+        self._entries = None
+        # Whether every folder of the workspace is known, as opposed to only
+        # the ones that were looked up by name.
+        self._scanned = False
+
+    def __repr__(self):
+        """
+        Representation of this object.
+        """
+        return "<{0}.{1} for {2}>".format(
+            self.__class__.__module__, self.__class__.__name__, self._root
+        )
+
+    @property
+    def root(self):
+        """
+        Folder containing the repositories.
+        """
+        return self._root
+
+    @property
+    def index_path(self):
+        """
+        Path to the file the index is persisted to.
+        """
+        return self._index_path
+
+    def refresh(self, max_workers=None):
+        """
+        Scan the workspace and bring the index up to date with what is on disk.
+
+        The index is written back to disk if anything changed. Failing to write
+        it is not an error, the index simply won't be reused by the next process.
+
+        :param int max_workers: Maximum number of folders classified in parallel.
+
+        :returns: ``True`` if the index changed, ``False`` otherwise.
+        """
+        previous = self._load_entries()
+
+        entries = {}
+        to_classify = []
+        try:
+            dir_entries = list(os.scandir(self._root))
+        except OSError:
+            dir_entries = []
+
+        for dir_entry in dir_entries:
+            try:
+                if not dir_entry.is_dir():
+                    continue
+                mtime = dir_entry.stat().st_mtime_ns
+            except OSError:
+                continue
+            cached = previous.get(dir_entry.name)
+            if cached is not None and cached["mtime"] == mtime:
+                entries[dir_entry.name] = cached
+            else:
+                entries[dir_entry.name] = {"mtime": mtime}
+                to_classify.append(dir_entry.name)
+
+        if to_classify:
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                results = executor.map(
+                    _classify,
+                    [os.path.join(self._root, name) for name in to_classify],
+                )
+                for name, (is_repository, kinds) in zip(to_classify, results):
+                    entries[name]["is_repository"] = is_repository
+                    entries[name]["kinds"] = kinds
+
+        self._entries = entries
+        self._scanned = True
+        changed = bool(to_classify) or set(entries) != set(previous)
+        if changed:
+            self._write_index()
+        return changed
+
+    def __contains__(self, name):
+        """
+        Check if a folder with the given name is in the workspace.
+        """
+        return self._get_entry(name) is not None
+
+    def __iter__(self):
+        """
+        Iterate over the names of the folders in the workspace, sorted.
+        """
+        return iter(sorted(self._get_entries()))
+
+    def __len__(self):
+        """
+        Number of folders in the workspace.
+        """
+        return len(self._get_entries())
+
+    def get_path(self, name):
+        """
+        Get the path to a folder of the workspace.
+
+        :param str name: Name of the folder.
+
+        :returns: The path to the folder, or ``None`` if it is not in the workspace.
+        """
+        if self._get_entry(name) is None:
+            return None
+        return os.path.join(self._root, name)
+
+    def is_repository(self, name):
+        """
+        Check if a folder of the workspace is a repository.
+
+        :param str name: Name of the folder.
+
+        :returns: ``True`` if the folder is a repository, ``False`` otherwise.
+        """
+        entry = self._get_entry(name)
+        return bool(entry and entry["is_repository"])
+
+    def get_kinds(self, name):
+        """
+        Get the component types found in a repository of the workspace.
+
+        :param str name: Name of the folder.
+
+        :returns: List of component types, e.g. ``["framework"]``. The list is empty
+            if the folder is not a Shotgun component or is not in the workspace.
+        """
+        entry = self._get_entry(name)
+        return list(entry["kinds"]) if entry else []
+
+    def find(self, kind):
+        """
+        Find all the repositories of a given component type.
+
+        :param str kind: One of ``tk_core``, ``engine``, ``framework``, ``app``,
+            ``config``, ``tk_toolchain``, ``python_api`` or ``sg_jira_bridge``.
+
+        :returns: Sorted list of folder names.
+        """
+        return sorted(
+            name
+            for name, entry in self._get_entries().items()
+            if kind in entry["kinds"]
+        )
+
+    def _get_entries(self):
+        """
+        Get the entries of the index, scanning the workspace if it never was.
+        """
+        if not self._scanned:
+            self.refresh()
+        return self._entries
+
+    def _get_entry(self, name):
+        """
+        Get the entry of a single folder.
+
+        Once the workspace was scanned, the entry comes from the index.
+        Otherwise only that folder is inspected and classified again if it
+        changed since it was last classified.
+
+        :param str name: Name of the folder.
+
+        :returns: The entry, or ``None`` if the folder is not in the workspace.
+        """
+        if self._scanned:
+            return self._entries.get(name)
+
+        entries = self._load_entries()
+        stat_result = None
+        # Only folders directly inside the workspace are part of it.
+        if name and os.path.basename(name) == name:
+            try:
+                stat_result = os.stat(os.path.join(self._root, name))
+            except (OSError, ValueError):
+                pass
+        if stat_result is None or not _is_dir(stat_result):
+            if entries.pop(name, None) is not None:
+                self._write_index()
+            return None
+
+        cached = entries.get(name)
+        if cached is not None and cached["mtime"] == stat_result.st_mtime_ns:
+            return cached
+
+        is_repository, kinds = _classify(os.path.join(self._root, name))
+        entries[name] = {
+            "mtime": stat_result.st_mtime_ns,
+            "is_repository": is_repository,
+            "kinds": kinds,
+        }
+        self._write_index()
+        return entries[name]
+
+    def _load_entries(self):
+        """
+        Get the entries known so far, reading them from disk the first time.
+        """
+        if self._entries is None:
+            self._entries = self._read_index()
+        return self._entries
+
+    def _write_index(self):
+        """
+        Persist the index. Failing to write it is not an error, the index
+        simply won't be reused by the next process.
+        """
+        try:
+            util.write_json_file(
+                self._index_path,
+                {
+                    "version": self._FORMAT_VERSION,
+                    "root": self._root,
+                    "folders": self._entries,
+                },
+            )
+        except OSError:
+            pass
+
+    def _read_index(self):
+        """
+        Read the index persisted on disk.
+
+        :returns: The persisted entries, or an empty dictionary if the index is
+            missing, outdated or for another workspace.
+        """
+        data = util.read_json_file(self._index_path)
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != self._FORMAT_VERSION
+            or data.get("root") != self._root
+        ):
+            return {}
+        return data.get("folders", {})